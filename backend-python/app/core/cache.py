@@ -0,0 +1,188 @@
+"""In-Process Caching
+
+Entries live in each worker process. Cached responses are versioned by a
+generation counter kept in the repository backend, so a write made on one
+worker is seen by every other worker's next request.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.config import (
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from app.core.database import primary_reads
+from app.core.metrics import registry
+from app.repositories import SubscriptionRepository, get_subscription_repository
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Remove a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class GenerationCounter:
+    """
+    Counter bumped on every write to a collection, used to version cached responses
+
+    The value is stored by the collection's repository and shared by all
+    workers, so it costs one small read per cached request.
+    """
+
+    def __init__(self, repository: Callable[[], SubscriptionRepository]):
+        self._repository = repository
+
+    async def value(self) -> int:
+        return await self._repository().generation()
+
+    async def bump(self):
+        """Mark cached responses built from the collection as stale on every worker"""
+        await self._repository().bump_generation()
+
+
+# Authenticated users keyed by user id; entries are invalidated by UserService
+# on update/delete and otherwise expire after USER_CACHE_TTL_SECONDS
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+
+# Serialized JSON responses keyed by ETag
+response_cache = TTLCache(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+# Bumped by SubscriptionService on every write
+subscriptions_generation = GenerationCounter(get_subscription_repository)
+
+_caches = {"user": user_cache, "response": response_cache}
+registry.callback(
+    "cache_hits_total", "Cache lookups that found a live entry", "counter", ("cache",),
+    lambda: {(name,): cache.hits for name, cache in _caches.items()}
+)
+registry.callback(
+    "cache_misses_total", "Cache lookups that found no entry or an expired one", "counter", ("cache",),
+    lambda: {(name,): cache.misses for name, cache in _caches.items()}
+)
+registry.callback(
+    "cache_entries", "Entries currently held in the cache", "gauge", ("cache",),
+    lambda: {(name,): len(cache._entries) for name, cache in _caches.items()}
+)
+
+
+async def response_etag(request: Request, generation: GenerationCounter) -> str:
+    """
+    ETag for a cacheable GET response
+
+    Derived from the request path and query, the shared collection generation
+    and the current UTC date (statuses change at midnight). The key also rolls
+    over every RESPONSE_CACHE_TTL_SECONDS to bound how long writes that bypass
+    the services, such as manual database edits, go unnoticed.
+    """
+    key = "|".join((
+        str(await generation.value()),
+        datetime.now(timezone.utc).date().isoformat(),
+        str(int(time.time() // max(RESPONSE_CACHE_TTL_SECONDS, 1))),
+        request.url.path,
+        request.url.query,
+    ))
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+async def cached_json_response(
+    request: Request,
+    generation: GenerationCounter,
+    build: Callable[[], Awaitable[Union[BaseModel, bytes]]]
+) -> Response:
+    """
+    Serve a GET response from the response cache, with ETag/304 support
+
+    A matching If-None-Match header gets 304 without calling build. Otherwise the
+    serialized body is served from the cache, or built from primary reads and
+    cached on a miss.
+
+    Args:
+        request: Incoming request
+        generation: Counter of the collection the response is built from
+        build: Coroutine function producing the response model, or its JSON bytes
+
+    Returns:
+        304 response, or JSON response carrying the ETag
+    """
+    etag = await response_etag(request, generation)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(etag)
+    if body is None:
+        # Cached under the current generation, so it must not come from a lagging secondary
+        with primary_reads():
+            result = await build()
+        body = result if isinstance(result, bytes) else result.model_dump_json().encode()
+        response_cache.set(etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -4,6 +4,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from app.utils.constants import DEFAULT_REMINDER_OFFSETS_DAYS
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent.parent.parent
 load_dotenv(ROOT_DIR / '.env')
@@ -16,6 +18,19 @@ APP_VERSION = "1.0.0"
 # ============ Database Configuration ============
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 DB_NAME = os.environ.get('DB_NAME', 'subscription_manager')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))  # Per worker process
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ['MONGO_MAX_IDLE_TIME_MS']) if os.environ.get('MONGO_MAX_IDLE_TIME_MS') else None
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))  # Wait for a free connection
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')  # e.g. "zstd,snappy,zlib"; zstd/snappy need extra packages
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')  # Default for all reads
+MONGO_READ_HEAVY_PREFERENCE = os.environ.get('MONGO_READ_HEAVY_PREFERENCE', 'secondaryPreferred')  # List, search, dashboard
+MONGO_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '-1'))  # -1: no limit, otherwise >= 90
+
+# ============ Repository Configuration ============
+# Where users and subscriptions are stored: "mongo", "memory" (tests, lost on restart) or "sqlite" (single node)
+REPOSITORY_BACKEND = os.environ.get('REPOSITORY_BACKEND', 'mongo')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'subscription_manager.db')  # Used by the sqlite backend
 
 # ============ JWT Configuration ============
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
@@ -25,11 +40,71 @@ if SECRET_KEY == 'your-secret-key-change-in-production' and not DEBUG:
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
+REVOCATION_REFRESH_SECONDS = float(os.environ.get('REVOCATION_REFRESH_SECONDS', '5'))  # Max delay for other workers
+
+# ============ Password Hashing Configuration ============
+PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')  # "thread" or "process"
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '32'))  # 503 beyond this
+
+# ============ Login Rate Limit Configuration ============
+LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'True') == 'True'
+LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')  # "memory" (per worker) or "mongo" (shared)
+LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS = int(os.environ.get('LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS', '5'))  # Per email per window
+LOGIN_RATE_LIMIT_IP_ATTEMPTS = int(os.environ.get('LOGIN_RATE_LIMIT_IP_ATTEMPTS', '20'))  # Per client IP per window
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.environ.get('LOGIN_RATE_LIMIT_WINDOW_SECONDS', '60'))
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.environ.get('LOGIN_RATE_LIMIT_MAX_KEYS', '10000'))  # In-process buckets kept per scope
+TRUST_X_FORWARDED_FOR = os.environ.get('TRUST_X_FORWARDED_FOR', 'False') == 'True'  # Only behind a reverse proxy
+
+# ============ Cache Configuration ============
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '1024'))
+USER_CACHE_TTL_SECONDS = int(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+RESPONSE_CACHE_MAX_SIZE = int(os.environ.get('RESPONSE_CACHE_MAX_SIZE', '256'))
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '300'))
+
+# ============ Live Events Configuration ============
+EVENTS_MODE = os.environ.get('EVENTS_MODE', 'auto')  # "auto" (change stream if available) or "polling"
+EVENTS_CLIENT_QUEUE_SIZE = int(os.environ.get('EVENTS_CLIENT_QUEUE_SIZE', '100'))  # Slower clients are dropped
+EVENTS_POLL_INTERVAL_SECONDS = float(os.environ.get('EVENTS_POLL_INTERVAL_SECONDS', '2'))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15'))
+
+# ============ Lock Configuration ============
+LOCK_TTL_SECONDS = float(os.environ.get('LOCK_TTL_SECONDS', '30'))  # Failover time when a holder dies
+LOCK_POLL_INTERVAL_SECONDS = float(os.environ.get('LOCK_POLL_INTERVAL_SECONDS', '1'))
+STARTUP_LOCK_HOLD_SECONDS = float(os.environ.get('STARTUP_LOCK_HOLD_SECONDS', '60'))  # Later workers skip startup tasks
+
+# ============ Metrics Configuration ============
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'  # /metrics, request and MongoDB timing
 
 # ============ Admin Configuration ============
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@subscriptionmanager.com')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
 
+# ============ Notification Configuration ============
+# Channels to deliver renewal reminders through ("smtp", "webhook", "file"); none disables reminders
+NOTIFICATION_CHANNELS = [c.strip() for c in os.environ.get('NOTIFICATION_CHANNELS', '').split(',') if c.strip()]
+REMINDER_OFFSETS_DAYS = [
+    int(days) for days in os.environ['REMINDER_OFFSETS_DAYS'].split(',')
+] if os.environ.get('REMINDER_OFFSETS_DAYS') else DEFAULT_REMINDER_OFFSETS_DAYS
+REMINDER_INTERVAL_SECONDS = float(os.environ.get('REMINDER_INTERVAL_SECONDS', '3600'))
+NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', '4'))
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', '20'))
+NOTIFICATION_POLL_INTERVAL_SECONDS = float(os.environ.get('NOTIFICATION_POLL_INTERVAL_SECONDS', '10'))
+NOTIFICATION_LEASE_SECONDS = int(os.environ.get('NOTIFICATION_LEASE_SECONDS', '300'))  # Then reclaimed
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', '5'))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_BASE_SECONDS', '60'))  # Doubles per attempt
+NOTIFICATION_EMAIL_TO = os.environ.get('NOTIFICATION_EMAIL_TO', ADMIN_EMAIL).split(',')
+SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'True') == 'True'
+SMTP_FROM = os.environ.get('SMTP_FROM', ADMIN_EMAIL)
+NOTIFICATION_WEBHOOK_URL = os.environ.get('NOTIFICATION_WEBHOOK_URL')
+NOTIFICATION_WEBHOOK_SECRET = os.environ.get('NOTIFICATION_WEBHOOK_SECRET')  # Signs payloads with HMAC-SHA256
+NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS', '10'))
+NOTIFICATION_FILE_PATH = os.environ.get('NOTIFICATION_FILE_PATH', 'notifications.ndjson')
+
 # ============ CORS Configuration ============
 CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
 
@@ -1,22 +1,241 @@
 """Database Connection and Management"""
 
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from app.core.config import MONGO_URL, DB_NAME
+from pymongo import monitoring
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from app.core.config import (
+    MONGO_URL,
+    DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_COMPRESSORS,
+    MONGO_READ_PREFERENCE,
+    MONGO_READ_HEAVY_PREFERENCE,
+    MONGO_MAX_STALENESS_SECONDS,
+    METRICS_ENABLED,
+)
+from app.core.metrics import registry, command_metrics
 
 # Global database instance
 _db_client: AsyncIOMotorClient = None
 _db: AsyncIOMotorDatabase = None
 
+_READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def read_preference(mode: str, max_staleness: int = MONGO_MAX_STALENESS_SECONDS):
+    """
+    Build a read preference from its mode name
+
+    Args:
+        mode: "primary", "primaryPreferred", "secondary", "secondaryPreferred" or "nearest"
+        max_staleness: Skip secondaries lagging more than this many seconds (-1: no limit)
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode == "primary":
+        return Primary()
+    if mode not in _READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    return _READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+_read_heavy_preference = read_preference(MONGO_READ_HEAVY_PREFERENCE)
+
+# Set while a result is built for the response cache (see primary_reads)
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Serve read-heavy queries from the primary inside the block
+
+    Used while filling the response cache: the entry is keyed by the latest
+    generation, so a result lagging on a secondary would be cached as current.
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool statistics per server, fed by pymongo pool events
+
+    Check-outs happen on the thread that runs the operation, so the time
+    between check-out started and checked out (or failed) is measured per
+    thread. Callbacks arrive from Motor's executor threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._servers: Dict[str, dict] = {}
+
+    def _server(self, address) -> dict:
+        key = f"{address[0]}:{address[1]}"
+        if key not in self._servers:
+            self._servers[key] = {
+                "open": 0,
+                "checked_out": 0,
+                "max_checked_out": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "wait_ms_total": 0.0,
+                "wait_ms_max": 0.0,
+                "cleared": 0,
+            }
+        return self._servers[key]
+
+    def _waited_ms(self) -> float:
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            server = self._server(event.address)
+            server['checked_out'] += 1
+            server['max_checked_out'] = max(server['max_checked_out'], server['checked_out'])
+            server['checkouts'] += 1
+            server['wait_ms_total'] += waited
+            server['wait_ms_max'] = max(server['wait_ms_max'], waited)
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            server = self._server(event.address)
+            server['checkout_failures'] += 1
+            server['wait_ms_total'] += waited
+            server['wait_ms_max'] = max(server['wait_ms_max'], waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server['checked_out'] = max(0, server['checked_out'] - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address)['open'] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server['open'] = max(0, server['open'] - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event.address)['cleared'] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            servers = {}
+            for address, server in self._servers.items():
+                checkouts = server['checkouts'] + server['checkout_failures']
+                servers[address] = {
+                    **server,
+                    "wait_ms_avg": round(server['wait_ms_total'] / checkouts, 3) if checkouts else 0.0,
+                    "wait_ms_total": round(server['wait_ms_total'], 3),
+                    "wait_ms_max": round(server['wait_ms_max'], 3),
+                }
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "servers": servers,
+        }
 
-async def connect_db():
+
+pool_stats = PoolStats()
+
+
+def _pool_values(field: str, scale: float = 1) -> Dict[tuple, float]:
+    return {(address,): server[field] * scale for address, server in pool_stats.stats()['servers'].items()}
+
+
+registry.callback(
+    "mongodb_pool_connections_open", "Open connections in the pool", "gauge", ("server",),
+    lambda: _pool_values("open")
+)
+registry.callback(
+    "mongodb_pool_connections_checked_out", "Connections currently checked out of the pool", "gauge", ("server",),
+    lambda: _pool_values("checked_out")
+)
+registry.callback(
+    "mongodb_pool_checkout_wait_seconds_total", "Time spent waiting to check out a connection", "counter", ("server",),
+    lambda: _pool_values("wait_ms_total", 0.001)
+)
+registry.callback(
+    "mongodb_pool_checkout_failures_total", "Connection check-outs that failed or timed out", "counter", ("server",),
+    lambda: _pool_values("checkout_failures")
+)
+
+
+def client_options() -> dict:
+    """AsyncIOMotorClient keyword arguments built from the configuration"""
+    options = {
+        # tz_aware so BSON dates come back as UTC datetimes
+        "tz_aware": True,
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "read_preference": read_preference(MONGO_READ_PREFERENCE),
+        "event_listeners": [pool_stats, command_metrics] if METRICS_ENABLED else [pool_stats],
+    }
+    if MONGO_MAX_IDLE_TIME_MS is not None:
+        options['maxIdleTimeMS'] = MONGO_MAX_IDLE_TIME_MS
+    if MONGO_COMPRESSORS:
+        options['compressors'] = MONGO_COMPRESSORS
+    return options
+
+
+async def connect_db(url: str = MONGO_URL, db_name: str = DB_NAME):
     """Establish database connection"""
     global _db_client, _db
-    _db_client = AsyncIOMotorClient(MONGO_URL)
-    _db = _db_client[DB_NAME]
-    
+    _db_client = AsyncIOMotorClient(url, **client_options())
+    _db = _db_client[db_name]
+
     # Test connection
     await _db.command('ping')
-    print(f"Connected to MongoDB: {DB_NAME}")
+    print(f"Connected to MongoDB: {db_name}")
 
 
 async def close_db():
@@ -44,3 +263,47 @@ async def get_subscriptions_collection():
     """Get subscriptions collection"""
     db = get_db()
     return db.subscriptions
+
+
+async def get_subscriptions_read_collection():
+    """
+    Get subscriptions collection for read-heavy queries (list, search, export, dashboard)
+
+    Reads follow MONGO_READ_HEAVY_PREFERENCE, so on a replica set they may be
+    served by a secondary and lag recent writes by the replication delay, except
+    inside primary_reads(). Writes always go to the primary.
+    """
+    db = get_db()
+    if _primary_reads.get():
+        return db.subscriptions.with_options(read_preference=Primary())
+    return db.subscriptions.with_options(read_preference=_read_heavy_preference)
+
+
+async def get_notifications_collection():
+    """Get notifications collection"""
+    db = get_db()
+    return db.notifications
+
+
+async def get_locks_collection():
+    """Get locks collection"""
+    db = get_db()
+    return db.locks
+
+
+async def get_rate_limits_collection():
+    """Get rate_limits collection"""
+    db = get_db()
+    return db.rate_limits
+
+
+async def get_revoked_tokens_collection():
+    """Get revoked_tokens collection"""
+    db = get_db()
+    return db.revoked_tokens
+
+
+async def get_counters_collection():
+    """Get counters collection, always read from the primary so generations never go back"""
+    db = get_db()
+    return db.counters.with_options(read_preference=Primary())
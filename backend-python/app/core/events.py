@@ -0,0 +1,280 @@
+"""Live Subscription Change Events
+
+A single background task per worker follows the subscriptions and fans changes
+out to connected clients. It uses a MongoDB change stream when the server
+supports one (replica set or sharded cluster) and otherwise polls updated_at
+through the subscription repository: on a standalone mongod and on the memory
+and sqlite backends.
+
+Each client gets a bounded queue. A client whose queue fills up is dropped
+rather than slowing the feed down for everyone; it is sent a final "dropped"
+event and is expected to reload and reconnect.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import (
+    EVENTS_MODE,
+    EVENTS_CLIENT_QUEUE_SIZE,
+    EVENTS_POLL_INTERVAL_SECONDS,
+    EVENTS_HEARTBEAT_SECONDS,
+)
+from app.core.database import get_subscriptions_collection
+from app.core.storage import subscription_from_document
+from app.repositories import get_subscription_repository, repository_backend
+from app.core.metrics import registry
+from app.schemas.subscription import Subscription
+
+logger = logging.getLogger(__name__)
+
+EVENT_UPSERT = "upsert"
+EVENT_DELETE = "delete"
+EVENT_INVALIDATE = "invalidate"  # Changes could not be described as deltas; reload
+EVENT_DROPPED = "dropped"  # Client fell behind and was disconnected
+
+# Server error code when change streams are unavailable (standalone mongod)
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A change to broadcast to clients"""
+    event: str
+    data: dict = field(default_factory=dict)
+
+    def to_sse(self) -> str:
+        """Format as a Server-Sent Events message"""
+        return f"event: {self.event}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class EventSubscriber:
+    """A connected client and its bounded event queue"""
+
+    def __init__(self, max_size: int):
+        self.queue: "asyncio.Queue[ChangeEvent]" = asyncio.Queue(max_size)
+        self.dropped = False
+
+
+def _subscription_event(doc: dict) -> ChangeEvent:
+    """Upsert event carrying the subscription in its API representation"""
+    doc.pop('_id', None)
+    subscription = Subscription(**subscription_from_document(doc))
+    return ChangeEvent(EVENT_UPSERT, json.loads(subscription.model_dump_json()))
+
+
+class SubscriptionEventBroker:
+    """Follows the subscriptions and fans changes out to subscribers"""
+
+    def __init__(self):
+        self._subscribers: Set[EventSubscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.mode: Optional[str] = None  # "change_stream" or "polling" once started
+
+    # ============ Subscribers ============
+
+    def subscribe(self) -> EventSubscriber:
+        """Register a new client"""
+        subscriber = EventSubscriber(EVENTS_CLIENT_QUEUE_SIZE)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: EventSubscriber):
+        """Remove a client"""
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: ChangeEvent):
+        """Queue an event for every client, dropping clients that have fallen behind"""
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: EventSubscriber):
+        """Disconnect a slow client, replacing its backlog with a final dropped event"""
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(ChangeEvent(EVENT_DROPPED))
+        logger.warning("Dropped slow event stream client")
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "clients": len(self._subscribers)}
+
+    async def event_stream(self, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+        """
+        Server-Sent Events body for one client
+
+        Sends a keepalive comment after EVENTS_HEARTBEAT_SECONDS without events
+        and ends when the client disconnects or is dropped.
+
+        Args:
+            is_disconnected: Request.is_disconnected of the client's request
+        """
+        subscriber = self.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield event.to_sse()
+                if event.event == EVENT_DROPPED:
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    # ============ Sources ============
+
+    async def _follow_change_stream(self):
+        """
+        Publish change stream events, resuming after transient errors
+
+        Raises OperationFailure when a stream cannot be opened at all, so the
+        caller falls back to polling.
+        """
+        subs_collection = await get_subscriptions_collection()
+        options = {"full_document": "updateLookup"}
+        build_info = await subs_collection.database.command("buildInfo")
+        if build_info.get('versionArray', [0])[0] >= 6:
+            # Pre-images (MongoDB 6.0+) let delete events carry the public id
+            options['full_document_before_change'] = "whenAvailable"
+
+        resume_token = None
+        while True:
+            try:
+                async with subs_collection.watch(resume_after=resume_token, **options) as stream:
+                    self.mode = "change_stream"
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.publish(self._change_to_event(change))
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED or resume_token is None:
+                    raise
+                # Resumable errors are retried by the driver, so the resume point is
+                # gone (e.g. ChangeStreamHistoryLost); start over from now
+                logger.error(f"Change stream cannot resume, restarting: {e}")
+                resume_token = None
+            except PyMongoError as e:
+                logger.error(f"Change stream interrupted, resuming: {e}")
+            # Events may have been missed if the stream could not resume
+            self.publish(ChangeEvent(EVENT_INVALIDATE))
+            await asyncio.sleep(1)
+
+    @staticmethod
+    def _change_to_event(change: dict) -> ChangeEvent:
+        """Translate a change stream document into a client event"""
+        operation = change.get('operationType')
+        if operation in ("insert", "update", "replace") and change.get('fullDocument'):
+            try:
+                return _subscription_event(change['fullDocument'])
+            except Exception as e:
+                logger.error(f"Unreadable subscription in change stream: {e}")
+                return ChangeEvent(EVENT_INVALIDATE)
+        if operation == "delete":
+            # The public id is only known when pre-images are enabled on the collection
+            before = change.get('fullDocumentBeforeChange') or {}
+            if 'id' in before:
+                return ChangeEvent(EVENT_DELETE, {"id": before['id']})
+        return ChangeEvent(EVENT_INVALIDATE)
+
+    async def _poll(self):
+        """
+        Publish changes found by polling updated_at
+
+        Polling cannot see deletes or writes that leave updated_at alone (such as
+        the daily status job), so an invalidate event is sent when the document
+        count moves unexpectedly or the UTC date changes. Batches larger than a
+        client queue are also sent as a single invalidate.
+        """
+        self.mode = "polling"
+        subscriptions = get_subscription_repository()
+        last_seen = datetime.now(timezone.utc)
+        last_count = await subscriptions.count()
+        last_date = last_seen.date()
+
+        while True:
+            await asyncio.sleep(EVENTS_POLL_INTERVAL_SECONDS)
+            try:
+                changed = await subscriptions.find_updated_since(last_seen, EVENTS_CLIENT_QUEUE_SIZE + 1)
+                if len(changed) > EVENTS_CLIENT_QUEUE_SIZE:
+                    latest = await subscriptions.last_updated_at()
+                    if latest:
+                        last_seen = max(last_seen, latest)
+                    changed = []
+                    self.publish(ChangeEvent(EVENT_INVALIDATE))
+                count = await subscriptions.count()
+            except Exception as e:
+                logger.error(f"Polling for subscription changes failed: {e}")
+                continue
+
+            created = 0
+            previous_seen = last_seen
+            for doc in changed:
+                try:
+                    last_seen = max(last_seen, doc['updated_at'])
+                    if isinstance(doc.get('created_at'), datetime) and doc['created_at'] > previous_seen:
+                        created += 1
+                    event = _subscription_event(doc)
+                except Exception as e:
+                    logger.error(f"Skipping unreadable subscription {doc.get('id')} in change feed: {e}")
+                    continue
+                self.publish(event)
+
+            today = datetime.now(timezone.utc).date()
+            if count != last_count + created or today != last_date:
+                self.publish(ChangeEvent(EVENT_INVALIDATE))
+            last_count = count
+            last_date = today
+
+    async def _run(self):
+        try:
+            # Change streams follow the MongoDB collection, so other backends always poll
+            if EVENTS_MODE != "polling" and repository_backend() == "mongo":
+                try:
+                    await self._follow_change_stream()
+                except OperationFailure as e:
+                    logger.info(f"Change streams unavailable, polling for changes: {e}")
+            await self._poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Subscription event feed stopped: {e}")
+            self.mode = None
+
+    # ============ Lifecycle ============
+
+    def start(self):
+        """Start following the subscriptions"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="subscription_events")
+
+    async def stop(self):
+        """Stop the feed and disconnect all clients"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for subscriber in list(self._subscribers):
+            self._drop(subscriber)
+        self.mode = None
+
+
+subscription_events = SubscriptionEventBroker()
+
+registry.callback(
+    "sse_clients", "Clients connected to the subscription event stream", "gauge", (),
+    lambda: {(): len(subscription_events._subscribers)}
+)
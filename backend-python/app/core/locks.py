@@ -0,0 +1,212 @@
+"""Lease Locks and Leader Election
+
+Locks are kept by the lock repository, one per lock name. On the mongo
+backend they live in the locks collection and are shared by every worker:
+
+    {"_id": name, "owner": ..., "acquired_at": ..., "heartbeat_at": ..., "expires_at": ...}
+
+The memory and sqlite backends run a single process and keep them in memory.
+
+A lock is held until expires_at. Holders renew it from a heartbeat task well
+before then; a holder that dies simply stops renewing and any other worker can
+take the lock over once it expires.
+
+Expiry is judged by the workers' clocks, so LOCK_TTL_SECONDS must stay well
+above the clock skew between hosts. A TTL index on expires_at removes stale
+lock documents; it is housekeeping only, since expired locks can be taken
+over whether or not they have been removed yet.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.core.config import LOCK_TTL_SECONDS, LOCK_POLL_INTERVAL_SECONDS
+from app.repositories import get_lock_repository
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lock owner; readable in the locks collection
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over while work was running under it"""
+
+
+class Lease:
+    """
+    A named, expiring lock held by this process
+
+    Usable as an async context manager, which waits for the lock, keeps it alive
+    with heartbeats while the block runs and releases it on exit:
+
+        async with Lease("migrations"):
+            ...
+    """
+
+    def __init__(self, name: str, ttl: float = LOCK_TTL_SECONDS, owner: str = INSTANCE_ID):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner
+        self.lost = asyncio.Event()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._expires_at: Optional[datetime] = None  # Of the last successful acquire or renewal
+
+    async def acquire(self) -> bool:
+        """
+        Try once to take or renew the lock
+
+        Returns:
+            True if this process now holds the lock
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl)
+        if not await get_lock_repository().acquire(self.name, self.owner, now, expires_at):
+            return False
+        self._expires_at = expires_at
+        self.lost.clear()
+        return True
+
+    async def wait_acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Poll until the lock is acquired
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            False if the timeout passed first
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while not await self.acquire():
+            if deadline is not None and loop.time() >= deadline:
+                return False
+            await asyncio.sleep(LOCK_POLL_INTERVAL_SECONDS)
+        return True
+
+    async def renew(self, hold_for: Optional[float] = None) -> bool:
+        """
+        Extend the lease
+
+        Args:
+            hold_for: Seconds from now to hold the lock for (defaults to the TTL)
+
+        Returns:
+            False if the lock is no longer owned by this process
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl if hold_for is None else hold_for)
+        if not await get_lock_repository().renew(self.name, self.owner, now, expires_at):
+            return False
+        self._expires_at = expires_at
+        return True
+
+    async def release(self):
+        """Give the lock up, if this process still holds it"""
+        self.stop_heartbeat()
+        await get_lock_repository().release(self.name, self.owner)
+
+    # ============ Heartbeat ============
+
+    async def _heartbeat(self):
+        try:
+            while True:
+                await asyncio.sleep(self.ttl / 3)
+                try:
+                    renewed = await self.renew()
+                except Exception as e:
+                    # Keep trying until the lease has expired, after which another worker may hold it
+                    logger.warning(f"Renewing lock '{self.name}' failed: {e}")
+                    renewed = self._expires_at is not None and datetime.now(timezone.utc) < self._expires_at
+                if not renewed:
+                    logger.warning(f"Lost lock '{self.name}'")
+                    self.lost.set()
+                    return
+        finally:
+            # Let start_heartbeat() run a new heartbeat once the lock is acquired again
+            if self._heartbeat_task is asyncio.current_task():
+                self._heartbeat_task = None
+
+    def start_heartbeat(self):
+        """Renew the lease every third of its TTL, setting `lost` if it is taken over or expires"""
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat(), name=f"lock_heartbeat:{self.name}")
+
+    def stop_heartbeat(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def __aenter__(self) -> "Lease":
+        await self.wait_acquire()
+        self.start_heartbeat()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+async def run_while_held(lease: Lease, func: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run func under an acquired lease, cancelling it if the lease is lost
+
+    Raises:
+        LeaseLost: If the lease was lost before func finished
+    """
+    lease.start_heartbeat()
+    try:
+        work = asyncio.ensure_future(func())
+        lost = asyncio.ensure_future(lease.lost.wait())
+        try:
+            await asyncio.wait({work, lost}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            raise LeaseLost(lease.name)
+        return work.result()
+    finally:
+        lease.stop_heartbeat()
+
+
+async def run_exclusive(
+    name: str,
+    func: Callable[[], Awaitable[Any]],
+    hold_for: float = 0,
+    ttl: float = LOCK_TTL_SECONDS
+) -> Tuple[bool, Any]:
+    """
+    Run func on at most one worker cluster-wide
+
+    Workers that find the lock held skip the work instead of waiting.
+
+    Args:
+        name: Lock name
+        func: Work to run
+        hold_for: Seconds to keep the lock after func succeeds instead of
+            releasing it, so workers that start a little later skip it too
+        ttl: Lease TTL while func runs
+
+    Returns:
+        (ran, result): ran is False when another worker holds the lock
+    """
+    lease = Lease(name, ttl)
+    if not await lease.acquire():
+        return False, None
+    try:
+        result = await run_while_held(lease, func)
+    except BaseException:
+        await lease.release()
+        raise
+    if hold_for > 0:
+        await lease.renew(hold_for)
+    else:
+        await lease.release()
+    return True, result
@@ -0,0 +1,333 @@
+"""In-Process Metrics
+
+A small Prometheus-compatible registry: counters and histograms are aggregated
+in memory per worker process and rendered in the Prometheus text format by the
+/metrics endpoint, so they can be read with curl or scraped by any collector.
+Observations are a bisect and a few additions under a per-metric lock (pymongo
+reports command events from Motor's executor threads).
+
+Sources:
+- MetricsMiddleware: HTTP request latency per method and route template
+- CommandMetrics: MongoDB command latency per collection and command
+- hash/verify timing in app.core.security, cache hit counters in
+  app.core.cache and model validation timing in the service layer
+"""
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; suits requests and database commands alike
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base class: a named metric family with fixed label names"""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, LabelValues, Sequence[str], float]]:
+        """(sample name, label values, label names, value) tuples"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, values, labelnames, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, labels, self.labelnames, value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, with sum and count"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (the last one is +Inf), sum
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        """Observe the duration of the block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (_format_value(bound),), bucket_labelnames, cumulative
+            yield f"{self.name}_sum", labels, self.labelnames, total
+            yield f"{self.name}_count", labels, self.labelnames, cumulative
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose values are read from their owner at render time"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]]
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.type = metric_type
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in sorted(self.collect().items()):
+            yield self.name, labels, self.labelnames, value
+
+
+class Registry:
+    """The metric families rendered by /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]]
+    ) -> CallbackMetric:
+        """Register a counter or gauge read from collect() at render time"""
+        return self.register(CallbackMetric(name, documentation, metric_type, labelnames, collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response is complete",
+    ("method", "route", "status"),
+)
+mongo_command_duration = registry.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency as reported by the driver",
+    ("collection", "command"),
+)
+mongo_command_failures = registry.counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error",
+    ("collection", "command"),
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash/verify time, including the wait for a hashing pool worker",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+password_hash_rejected = registry.counter(
+    "password_hash_rejected_total",
+    "bcrypt jobs rejected with 503 because the hashing pool queue was full",
+)
+validation_duration = registry.histogram(
+    "pydantic_validation_duration_seconds",
+    "Time spent validating database documents into Pydantic models in the service layer",
+    ("model",),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+# ============ HTTP Requests ============
+
+def _route_template(scope: dict) -> str:
+    """
+    Path template of the route that handled the request, e.g. /api/subscriptions/{subscription_id}
+
+    The router leaves the matched endpoint in the scope; it is mapped back to
+    its route once per endpoint. Unmatched requests share one label so that
+    arbitrary paths cannot create new series.
+    """
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    templates = getattr(app.state, "metrics_route_templates", None)
+    if templates is None:
+        templates = app.state.metrics_route_templates = {}
+    template = templates.get(endpoint)
+    if template is None:
+        template = next(
+            (getattr(route, "path_format", route.path) for route in app.routes
+             if getattr(route, "endpoint", None) is endpoint),
+            "unmatched"
+        )
+        templates[endpoint] = template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per method, route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                _route_template(scope),
+                str(status_code)
+            )
+
+
+# ============ MongoDB Commands ============
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Times MongoDB commands per collection and command name
+
+    Only started events carry the command document, so the collection is kept
+    per request id until the command finishes; the duration itself comes from
+    the driver.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, Optional[int]], str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple[int, Optional[int]]:
+        return event.request_id, event.operation_id
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[self._key(event)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event) -> Tuple[str, str]:
+        collection = self._collections.pop(self._key(event), "")
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, collection, event.command_name)
+        return collection, event.command_name
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        mongo_command_failures.inc(*self._finish(event))
+
+
+command_metrics = CommandMetrics()
@@ -0,0 +1,456 @@
+"""Database Migrations and Index Management"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, TEXT, IndexModel, UpdateOne
+
+from app.core.database import get_db
+from app.core.locks import Lease, run_exclusive
+from app.core.storage import (
+    SUBSCRIPTION_DATE_FIELDS,
+    SUBSCRIPTION_TIMESTAMP_FIELDS,
+    USER_TIMESTAMP_FIELDS,
+    date_to_storage,
+    timestamp_to_storage,
+)
+from app.repositories.mongo import build_filter_query
+from app.schemas.subscription import SubscriptionFilters
+from app.services.notification_service import claimable_query
+from app.utils.constants import (
+    MIGRATION_BATCH_SIZE,
+    SUBSCRIPTION_SEARCH_FIELDS,
+    SUBSCRIPTION_STATUS_EXPIRED,
+    SUBSCRIPTION_TEXT_INDEX_WEIGHTS,
+    USER_ROLE_STAFF,
+)
+from app.utils.helpers import subscription_search_terms
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "_migrations"
+MIGRATIONS_LOCK = "migrations"
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A versioned, run-once database migration"""
+    version: int
+    description: str
+    apply: Callable[[AsyncIOMotorDatabase], Awaitable[None]]
+    background: bool = False  # Run as a task instead of blocking startup
+
+
+_migrations: List[Migration] = []
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def migration(version: int, description: str, background: bool = False):
+    """
+    Register a migration function under a unique version number
+
+    Background migrations must be idempotent: they only become recorded once
+    they finish, so an interrupted run is started again on the next startup.
+    """
+    def decorator(func: Callable[[AsyncIOMotorDatabase], Awaitable[None]]):
+        if any(m.version == version for m in _migrations):
+            raise ValueError(f"Duplicate migration version: {version}")
+        _migrations.append(Migration(version, description, func, background))
+        return func
+    return decorator
+
+
+# ============ Migrations ============
+
+@migration(1, "Create initial indexes on users and subscriptions")
+async def create_initial_indexes(db: AsyncIOMotorDatabase):
+    await db.users.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("role", ASCENDING)], name="role"),
+    ])
+
+    # Compound indexes follow equality -> sort/range order and end with id so
+    # they also serve the keyset pagination sort (renewal_date, id)
+    await db.subscriptions.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("renewal_date", ASCENDING), ("id", ASCENDING)], name="renewal_date_id"),
+        IndexModel(
+            [("status", ASCENDING), ("renewal_date", ASCENDING), ("id", ASCENDING)],
+            name="status_renewal_date_id"
+        ),
+        IndexModel(
+            [("category", ASCENDING), ("renewal_date", ASCENDING), ("id", ASCENDING)],
+            name="category_renewal_date_id"
+        ),
+        IndexModel(
+            [("created_by", ASCENDING), ("renewal_date", ASCENDING), ("id", ASCENDING)],
+            name="created_by_renewal_date_id"
+        ),
+    ])
+
+
+async def _convert_in_batches(
+    collection: AsyncIOMotorCollection,
+    date_fields: Tuple[str, ...],
+    timestamp_fields: Tuple[str, ...]
+):
+    """Rewrite string dates and timestamps as BSON dates, MIGRATION_BATCH_SIZE documents at a time"""
+    fields = date_fields + timestamp_fields
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    last_id = None
+
+    while True:
+        # Page by _id so documents with unparseable values are not selected again
+        batch_query = {"$and": [query, {"_id": {"$gt": last_id}}]} if last_id else query
+        batch = await collection.find(batch_query, projection) \
+            .sort("_id", ASCENDING) \
+            .limit(MIGRATION_BATCH_SIZE) \
+            .to_list(MIGRATION_BATCH_SIZE)
+        if not batch:
+            return
+
+        operations = []
+        for doc in batch:
+            converted = {}
+            for field in date_fields:
+                if isinstance(doc.get(field), str):
+                    converted[field] = date_to_storage(doc[field])
+            for field in timestamp_fields:
+                if isinstance(doc.get(field), str):
+                    converted[field] = timestamp_to_storage(doc[field])
+            converted = {k: v for k, v in converted.items() if isinstance(v, datetime)}
+            if converted:
+                operations.append(UpdateOne({"_id": doc['_id']}, {"$set": converted}))
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        last_id = batch[-1]['_id']
+
+        # Yield to request handlers between batches
+        await asyncio.sleep(0)
+
+
+@migration(2, "Store subscription dates and timestamps as BSON dates", background=True)
+async def convert_dates_to_bson(db: AsyncIOMotorDatabase):
+    await _convert_in_batches(db.subscriptions, SUBSCRIPTION_DATE_FIELDS, SUBSCRIPTION_TIMESTAMP_FIELDS)
+    await _convert_in_batches(db.users, (), USER_TIMESTAMP_FIELDS)
+
+    # Statuses of converted documents can now be materialized by date range
+    from app.repositories.mongo import MongoSubscriptionRepository
+    from app.services.subscription_service import SubscriptionService
+    await SubscriptionService.recompute_statuses(MongoSubscriptionRepository())
+
+
+@migration(3, "Add version field for optimistic concurrency")
+async def add_version_field(db: AsyncIOMotorDatabase):
+    for collection in (db.subscriptions, db.users):
+        await collection.update_many({"version": {"$exists": False}}, {"$set": {"version": 1}})
+
+
+@migration(4, "Index subscriptions by updated_at for change polling")
+async def create_updated_at_index(db: AsyncIOMotorDatabase):
+    await db.subscriptions.create_index([("updated_at", ASCENDING)], name="updated_at")
+
+
+@migration(5, "Create subscription search indexes")
+async def create_search_indexes(db: AsyncIOMotorDatabase):
+    await db.subscriptions.create_indexes([
+        # Stemming and stop words do not suit names and emails
+        IndexModel(
+            [(field, TEXT) for field in SUBSCRIPTION_TEXT_INDEX_WEIGHTS],
+            weights=SUBSCRIPTION_TEXT_INDEX_WEIGHTS,
+            default_language="none",
+            name="search_text"
+        ),
+        IndexModel([("search_terms", ASCENDING)], name="search_terms"),
+    ])
+
+
+@migration(6, "Backfill subscription search terms", background=True)
+async def backfill_search_terms(db: AsyncIOMotorDatabase):
+    projection = {field: 1 for field in SUBSCRIPTION_SEARCH_FIELDS}
+    last_id = None
+
+    while True:
+        query = {"search_terms": {"$exists": False}}
+        if last_id:
+            query["_id"] = {"$gt": last_id}
+        batch = await db.subscriptions.find(query, projection) \
+            .sort("_id", ASCENDING) \
+            .limit(MIGRATION_BATCH_SIZE) \
+            .to_list(MIGRATION_BATCH_SIZE)
+        if not batch:
+            return
+
+        await db.subscriptions.bulk_write([
+            UpdateOne({"_id": doc['_id']}, {"$set": {"search_terms": subscription_search_terms(doc)}})
+            for doc in batch
+        ], ordered=False)
+        last_id = batch[-1]['_id']
+        await asyncio.sleep(0)
+
+
+@migration(7, "Create notification queue indexes")
+async def create_notification_indexes(db: AsyncIOMotorDatabase):
+    await db.notifications.create_indexes([
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        IndexModel([("claim_id", ASCENDING)], name="claim_id", sparse=True),
+        IndexModel([("subscription_id", ASCENDING)], name="subscription_id"),
+    ])
+
+
+@migration(8, "Expire stale locks")
+async def create_locks_ttl_index(db: AsyncIOMotorDatabase):
+    await db.locks.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+
+
+@migration(9, "Expire login rate limit windows")
+async def create_rate_limits_ttl_index(db: AsyncIOMotorDatabase):
+    await db.rate_limits.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+
+
+@migration(10, "Create token revocation indexes")
+async def create_revoked_tokens_indexes(db: AsyncIOMotorDatabase):
+    await db.revoked_tokens.create_indexes([
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+    ])
+
+
+@migration(11, "Index subscriptions by type and by duration")
+async def create_type_duration_indexes(db: AsyncIOMotorDatabase):
+    # Same shape as the status and category indexes, so these list filters are
+    # answered from index bounds instead of filtering the renewal_date_id scan
+    await db.subscriptions.create_indexes([
+        IndexModel(
+            [("type", ASCENDING), ("renewal_date", ASCENDING), ("id", ASCENDING)],
+            name="type_renewal_date_id"
+        ),
+        IndexModel(
+            [("duration", ASCENDING), ("renewal_date", ASCENDING), ("id", ASCENDING)],
+            name="duration_renewal_date_id"
+        ),
+    ])
+
+
+# ============ Runner ============
+
+async def _record_migration(db: AsyncIOMotorDatabase, applied: Migration):
+    """Mark a migration as applied"""
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": applied.version},
+        {"$setOnInsert": {
+            "description": applied.description,
+            "applied_at": datetime.now(timezone.utc),
+        }},
+        upsert=True
+    )
+
+
+async def _run_in_background(db: AsyncIOMotorDatabase, pending: Migration):
+    """Apply a background migration on one worker and record it when it completes"""
+    async def apply():
+        await pending.apply(db)
+        await _record_migration(db, pending)
+
+    try:
+        ran, _ = await run_exclusive(f"migration:{pending.version}", apply)
+        if ran:
+            logger.info(f"Background migration {pending.version} completed")
+        else:
+            logger.info(f"Background migration {pending.version} is running on another worker")
+    except asyncio.CancelledError:
+        logger.info(f"Background migration {pending.version} interrupted, will resume on next startup")
+        raise
+    except Exception as e:
+        logger.error(f"Background migration {pending.version} failed: {e}")
+
+
+async def run_migrations() -> List[int]:
+    """
+    Apply pending migrations in version order
+
+    Applied versions are recorded in the _migrations collection so each
+    migration runs once per database. Workers starting together take turns
+    through the migrations lock, so later ones find everything applied.
+    Background migrations are started as tasks and recorded when they finish.
+
+    Returns:
+        Versions applied or started by this call
+    """
+    async with Lease(MIGRATIONS_LOCK):
+        return await _apply_pending_migrations()
+
+
+async def _apply_pending_migrations() -> List[int]:
+    db = get_db()
+    migrations_collection = db[MIGRATIONS_COLLECTION]
+    applied = {doc['_id'] async for doc in migrations_collection.find({}, {"_id": 1})}
+
+    newly_applied = []
+    for pending in sorted(_migrations, key=lambda m: m.version):
+        if pending.version in applied:
+            continue
+
+        logger.info(f"Applying migration {pending.version}: {pending.description}")
+        if pending.background:
+            task = asyncio.create_task(_run_in_background(db, pending))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        else:
+            await pending.apply(db)
+            await _record_migration(db, pending)
+        newly_applied.append(pending.version)
+
+    return newly_applied
+
+
+async def stop_background_migrations():
+    """Cancel running background migrations (they resume on next startup)"""
+    for task in list(_background_tasks):
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
+# ============ Query Plan Checks ============
+
+class ServiceQuery(NamedTuple):
+    """A query issued by the service layer and the indexes that should serve it"""
+    name: str
+    collection: str
+    query: dict
+    sort: Optional[List[Tuple[str, int]]]
+    indexes: Tuple[str, ...]
+
+
+def _plan_stages(plan: dict):
+    """Yield every stage in a query plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+
+async def explain_winning_plan(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    sort: Optional[List[Tuple[str, int]]] = None
+) -> dict:
+    """
+    Explain a query and return the plan the server chose
+
+    Args:
+        collection: Collection to query
+        query: Find filter
+        sort: Optional sort specification
+    """
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.explain()
+    return explanation.get('queryPlanner', {}).get('winningPlan', {})
+
+
+def plan_problems(plan: dict, indexes: Tuple[str, ...]) -> List[str]:
+    """
+    Describe how a winning plan falls short of being served by the given indexes
+
+    The plan must scan exactly those indexes, and no stage other than an index
+    scan may filter documents: a FETCH filter means part of the query is checked
+    against every document the index scan returns.
+
+    Returns:
+        Problems found, empty when the plan is fully served by the indexes
+    """
+    stages = list(_plan_stages(plan))
+    # EXPRESS_IXSCAN is the single-document lookup on a unique index (MongoDB 8.0+)
+    used = {stage.get('indexName') for stage in stages if stage['stage'].endswith("IXSCAN")}
+    problems = []
+    if used != set(indexes):
+        problems.append(f"scans {', '.join(sorted(used)) or 'no index'} instead of {', '.join(indexes)}")
+    filtered = [stage['stage'] for stage in stages if 'filter' in stage and not stage['stage'].endswith("IXSCAN")]
+    if filtered:
+        problems.append(f"filters documents in {', '.join(filtered)}")
+    return problems
+
+
+def _service_queries() -> List[ServiceQuery]:
+    """Representative queries issued by the service layer"""
+    page_sort = [("renewal_date", ASCENDING), ("id", ASCENDING)]
+    build = build_filter_query
+    now = datetime.now(timezone.utc)
+    return [
+        ServiceQuery("users by id", "users", {"id": "x"}, None, ("id_unique",)),
+        ServiceQuery("users by email", "users", {"email": "x@example.com"}, None, ("email_unique",)),
+        ServiceQuery("staff members", "users", {"role": USER_ROLE_STAFF}, None, ("role",)),
+        ServiceQuery("subscription by id", "subscriptions", {"id": "x"}, None, ("id_unique",)),
+        ServiceQuery("subscription page", "subscriptions", build(None), page_sort, ("renewal_date_id",)),
+        ServiceQuery("subscriptions by status", "subscriptions",
+                     build(SubscriptionFilters(status=SUBSCRIPTION_STATUS_EXPIRED)), page_sort,
+                     ("status_renewal_date_id",)),
+        ServiceQuery("subscriptions by category", "subscriptions",
+                     build(SubscriptionFilters(category="Domain")), page_sort, ("category_renewal_date_id",)),
+        ServiceQuery("subscriptions by type", "subscriptions",
+                     build(SubscriptionFilters(type="Client")), page_sort, ("type_renewal_date_id",)),
+        ServiceQuery("subscriptions by duration", "subscriptions",
+                     build(SubscriptionFilters(duration="Monthly")), page_sort, ("duration_renewal_date_id",)),
+        ServiceQuery("subscriptions by creator", "subscriptions",
+                     build(SubscriptionFilters(created_by="x")), page_sort, ("created_by_renewal_date_id",)),
+        ServiceQuery("subscriptions by search prefix", "subscriptions",
+                     {"search_terms": {"$regex": "^acme"}}, None, ("search_terms",)),
+        ServiceQuery("recently changed subscriptions", "subscriptions",
+                     {"updated_at": {"$gt": now}}, [("updated_at", ASCENDING)], ("updated_at",)),
+        ServiceQuery("subscriptions due for reminders", "subscriptions",
+                     {"renewal_date": {"$gte": now, "$lte": now}}, page_sort, ("renewal_date_id",)),
+        ServiceQuery("claimable notifications", "notifications", claimable_query(now),
+                     [("next_attempt_at", ASCENDING)], ("status_next_attempt_at", "status_locked_until")),
+        ServiceQuery("notifications by claim", "notifications", {"claim_id": "x"}, None, ("claim_id",)),
+        ServiceQuery("live token revocations", "revoked_tokens", {"expires_at": {"$gt": now}}, None,
+                     ("expires_at_ttl",)),
+        ServiceQuery("recent token revocations", "revoked_tokens", {"revoked_at": {"$gte": now}}, None,
+                     ("revoked_at",)),
+    ]
+
+
+async def find_query_plan_problems() -> List[str]:
+    """
+    Explain the service-layer queries and report any not fully served by their indexes
+
+    The planner only prefers the tightest index once the collections hold data,
+    so run this against a populated database.
+
+    Returns:
+        "name: problem" for every query whose winning plan falls short
+    """
+    db = get_db()
+    found = []
+    for service_query in _service_queries():
+        plan = await explain_winning_plan(db[service_query.collection], service_query.query, service_query.sort)
+        found.extend(f"{service_query.name}: {problem}" for problem in plan_problems(plan, service_query.indexes))
+    return found
+
+
+async def assert_queries_use_indexes():
+    """
+    Fail when a service-layer query is not fully served by its expected indexes
+
+    Awaited by tests/test_migrations.py after run_migrations().
+
+    Raises:
+        AssertionError: If a query scans other indexes or a collection, or filters fetched documents
+    """
+    problems = await find_query_plan_problems()
+    assert not problems, "Queries not served by their indexes:\n" + "\n".join(problems)
@@ -0,0 +1,276 @@
+"""Renewal Reminder Delivery
+
+Senders deliver one queued notification through one channel. The worker pool
+runs a fixed number of workers per app process; each claims a batch from the
+notifications queue and delivers it, so at most NOTIFICATION_WORKERS sends are
+in flight per process. Further channels can be added with register_sender.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import smtplib
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import (
+    APP_NAME,
+    NOTIFICATION_CHANNELS,
+    NOTIFICATION_WORKERS,
+    NOTIFICATION_BATCH_SIZE,
+    NOTIFICATION_POLL_INTERVAL_SECONDS,
+    NOTIFICATION_EMAIL_TO,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    SMTP_STARTTLS,
+    SMTP_FROM,
+    NOTIFICATION_WEBHOOK_URL,
+    NOTIFICATION_WEBHOOK_SECRET,
+    NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS,
+    NOTIFICATION_FILE_PATH,
+)
+from app.core.metrics import registry
+from app.services.notification_service import NotificationService
+from app.utils.constants import (
+    NOTIFICATION_CHANNEL_SMTP,
+    NOTIFICATION_CHANNEL_WEBHOOK,
+    NOTIFICATION_CHANNEL_FILE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_subject(notification: dict) -> str:
+    """One-line summary of a renewal reminder"""
+    sub = notification['subscription']
+    days = notification['days_left']
+    when = "today" if days == 0 else "tomorrow" if days == 1 else f"in {days} days"
+    return f"Renewal {when}: {sub['client_name']} - {sub['category']} ({sub['renewal_date']})"
+
+
+def reminder_payload(notification: dict) -> dict:
+    """Channel-independent body of a renewal reminder"""
+    return {
+        "id": notification['id'],
+        "event": "subscription.renewal_reminder",
+        "offset_days": notification['offset_days'],
+        "days_left": notification['days_left'],
+        "subscription": notification['subscription'],
+    }
+
+
+# ============ Senders ============
+
+class NotificationSender(ABC):
+    """Delivers notifications through one channel"""
+
+    @abstractmethod
+    async def send(self, notification: dict):
+        """Deliver one notification, raising on failure"""
+
+    async def close(self):
+        pass
+
+
+class SmtpSender(NotificationSender):
+    """Emails reminders to NOTIFICATION_EMAIL_TO; smtplib runs in a thread"""
+
+    def _send_sync(self, message: EmailMessage):
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USERNAME:
+                smtp.login(SMTP_USERNAME, SMTP_PASSWORD or "")
+            smtp.send_message(message)
+
+    async def send(self, notification: dict):
+        sub = notification['subscription']
+        message = EmailMessage()
+        message['Subject'] = reminder_subject(notification)
+        message['From'] = SMTP_FROM
+        message['To'] = ", ".join(NOTIFICATION_EMAIL_TO)
+        message.set_content(
+            f"{sub['client_name']} ({sub.get('business_name') or '-'}) renews on {sub['renewal_date']}.\n\n"
+            f"Category: {sub['category']}\n"
+            f"Duration: {sub['duration']}\n"
+            f"Price: {sub['price']}\n"
+            f"Client email: {sub.get('client_email') or '-'}\n\n"
+            f"-- {APP_NAME}\n"
+        )
+        await asyncio.to_thread(self._send_sync, message)
+
+
+class WebhookSender(NotificationSender):
+    """
+    POSTs reminders as JSON to NOTIFICATION_WEBHOOK_URL
+
+    The notification id is sent as Idempotency-Key so receivers can discard
+    redeliveries, and the body is signed in X-Signature when a secret is set.
+    """
+
+    def __init__(self):
+        self._client = httpx.AsyncClient(timeout=NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS)
+
+    async def send(self, notification: dict):
+        if not NOTIFICATION_WEBHOOK_URL:
+            raise RuntimeError("NOTIFICATION_WEBHOOK_URL is not set")
+        body = json.dumps(reminder_payload(notification)).encode()
+        headers = {"Content-Type": "application/json", "Idempotency-Key": notification['id']}
+        if NOTIFICATION_WEBHOOK_SECRET:
+            digest = hmac.new(NOTIFICATION_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Signature'] = f"sha256={digest}"
+        response = await self._client.post(NOTIFICATION_WEBHOOK_URL, content=body, headers=headers)
+        response.raise_for_status()
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class FileSender(NotificationSender):
+    """Appends reminders as NDJSON lines to NOTIFICATION_FILE_PATH, for development and tests"""
+
+    def __init__(self, path: str = NOTIFICATION_FILE_PATH):
+        self.path = Path(path)
+        self._lock = asyncio.Lock()
+
+    def _append(self, line: str):
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def send(self, notification: dict):
+        line = json.dumps(reminder_payload(notification)) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._append, line)
+
+
+_sender_factories: Dict[str, Callable[[], NotificationSender]] = {
+    NOTIFICATION_CHANNEL_SMTP: SmtpSender,
+    NOTIFICATION_CHANNEL_WEBHOOK: WebhookSender,
+    NOTIFICATION_CHANNEL_FILE: FileSender,
+}
+
+
+def register_sender(channel: str, factory: Callable[[], NotificationSender]):
+    """Make a channel available to NOTIFICATION_CHANNELS, replacing any existing sender"""
+    _sender_factories[channel] = factory
+
+
+# ============ Worker Pool ============
+
+class NotificationWorkerPool:
+    """Drains the notifications queue through the configured senders"""
+
+    def __init__(self):
+        self._senders: Dict[str, NotificationSender] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def channels(self) -> List[str]:
+        return list(self._senders)
+
+    async def enqueue_due_reminders(self) -> int:
+        """Scheduled job: queue due reminders for the configured channels and wake the workers"""
+        queued = await NotificationService.enqueue_due_reminders(self.channels)
+        if queued:
+            self._wakeup.set()
+        return queued
+
+    async def _deliver(self, notification: dict):
+        sender = self._senders.get(notification['channel'])
+        try:
+            if sender is None:
+                raise RuntimeError(f"No sender configured for channel '{notification['channel']}'")
+            await sender.send(notification)
+        except Exception as e:
+            self.failed += 1
+            retry_at = await NotificationService.mark_failed(notification, str(e) or type(e).__name__)
+            logger.warning(
+                f"Notification {notification['id']} via {notification['channel']} failed "
+                f"(attempt {notification['attempts']}): {e}; "
+                + (f"retrying at {retry_at.isoformat()}" if retry_at else "giving up")
+            )
+            return
+        self.sent += 1
+        if not await NotificationService.mark_sent(notification):
+            logger.warning(f"Notification {notification['id']} was sent after its claim expired")
+
+    async def _worker(self):
+        while True:
+            try:
+                batch = await NotificationService.claim_batch(NOTIFICATION_BATCH_SIZE)
+            except Exception as e:
+                logger.error(f"Claiming notifications failed: {e}")
+                batch = []
+            if not batch:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), NOTIFICATION_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for notification in batch:
+                try:
+                    await self._deliver(notification)
+                except Exception:
+                    # Left claimed, so any worker retries it once the claim expires
+                    logger.exception(f"Delivering notification {notification.get('id')} failed")
+
+    def stats(self) -> dict:
+        return {
+            "channels": self.channels,
+            "workers": len(self._tasks),
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    # ============ Lifecycle ============
+
+    def start(self, channels: Optional[List[str]] = None) -> bool:
+        """
+        Create senders and start the workers
+
+        Returns:
+            False when no channels are configured and reminders stay disabled
+        """
+        channels = NOTIFICATION_CHANNELS if channels is None else channels
+        unknown = [channel for channel in channels if channel not in _sender_factories]
+        if unknown:
+            raise ValueError(f"Unknown notification channels: {', '.join(unknown)}")
+        if not channels or self._tasks:
+            return bool(self._tasks)
+
+        self._senders = {channel: _sender_factories[channel]() for channel in channels}
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"notification_worker_{i}")
+            for i in range(NOTIFICATION_WORKERS)
+        ]
+        return True
+
+    async def stop(self):
+        """Stop the workers; claims in flight are retried by any worker once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for sender in self._senders.values():
+            await sender.close()
+        self._senders = {}
+
+
+notification_workers = NotificationWorkerPool()
+
+registry.callback(
+    "notification_deliveries_total", "Notification delivery attempts by this process", "counter", ("outcome",),
+    lambda: {("sent",): notification_workers.sent, ("failed",): notification_workers.failed}
+)
@@ -0,0 +1,200 @@
+"""Login Rate Limiting
+
+Login attempts are limited per email and per client IP before any password
+hashing happens, so a credential-stuffing burst is answered with cheap 429s
+instead of pinning the hashing pool.
+
+Two backends share the same interface:
+- memory: token buckets per key in this worker process; no I/O, but each
+  worker enforces the limit on its own
+- mongo: sliding-window counters in the rate_limits collection, so the limit
+  holds across workers and hosts at the cost of two small queries per attempt;
+  only with the mongo repository backend, since the memory and sqlite backends
+  run a single process whose in-process limit is already global
+
+Rejected attempts still count, so a client that keeps hammering stays limited.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.core.config import (
+    LOGIN_RATE_LIMIT_ENABLED,
+    LOGIN_RATE_LIMIT_BACKEND,
+    LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS,
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS,
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    LOGIN_RATE_LIMIT_MAX_KEYS,
+    TRUST_X_FORWARDED_FOR,
+)
+from app.core.database import get_rate_limits_collection
+from app.core.metrics import registry
+from app.repositories import repository_backend
+
+logger = logging.getLogger(__name__)
+
+login_throttled = registry.counter(
+    "login_throttled_total",
+    "Login attempts rejected with 429 before password verification",
+    ("scope",),
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the client that sent the request
+
+    Behind a reverse proxy set TRUST_X_FORWARDED_FOR; the last X-Forwarded-For
+    entry (the one appended by the proxy) is then used, since earlier entries
+    are supplied by the client and can be forged.
+    """
+    if TRUST_X_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets: `attempts` per `window_seconds`, allowing bursts up to `attempts`
+
+    Buckets live in an LRU bounded to max_keys so a flood of distinct keys
+    cannot grow memory without limit.
+    """
+
+    def __init__(self, attempts: int, window_seconds: float, max_keys: int = LOGIN_RATE_LIMIT_MAX_KEYS):
+        self.capacity = attempts
+        self.refill_per_second = attempts / window_seconds
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def hit(self, key: str) -> Optional[float]:
+        """
+        Count an attempt
+
+        Returns:
+            None if allowed, otherwise seconds until the next attempt would be
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return None if allowed else (1 - tokens) / self.refill_per_second
+
+
+class MongoSlidingWindowLimiter:
+    """
+    Sliding-window counters shared by all workers through MongoDB
+
+    Attempts are counted per fixed window in one document per key and window;
+    the previous window's count is weighted by how much of it still overlaps
+    the sliding window. Documents expire through a TTL index.
+    """
+
+    def __init__(self, attempts: int, window_seconds: float):
+        self.limit = attempts
+        self.window_seconds = window_seconds
+
+    async def _increment(self, collection, doc_id: str, expires_at: datetime) -> int:
+        for _ in range(2):
+            try:
+                doc = await collection.find_one_and_update(
+                    {"_id": doc_id},
+                    {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                return doc['count']
+            except DuplicateKeyError:
+                # Two first attempts raced to create the window; the retry increments it
+                continue
+        return self.limit + 1
+
+    async def hit(self, key: str) -> Optional[float]:
+        """
+        Count an attempt
+
+        Returns:
+            None if allowed, otherwise seconds until the next attempt would be
+        """
+        collection = await get_rate_limits_collection()
+        now = time.time()
+        window = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        expires_at = datetime.fromtimestamp((window + 2) * self.window_seconds, timezone.utc)
+
+        current, previous = await asyncio.gather(
+            self._increment(collection, f"{key}:{window}", expires_at),
+            collection.find_one({"_id": f"{key}:{window - 1}"}, {"count": 1})
+        )
+        previous_count = previous['count'] if previous else 0
+
+        if previous_count * (1 - elapsed) + current <= self.limit:
+            return None
+        if current > self.limit or previous_count == 0:
+            return (1 - elapsed) * self.window_seconds
+        # The previous window's weight falls until the estimate fits under the limit
+        needed = 1 - (self.limit - current) / previous_count
+        return max(needed - elapsed, 0) * self.window_seconds
+
+
+class LoginThrottle:
+    """Per-IP and per-email login limits"""
+
+    def __init__(self, backend: str = LOGIN_RATE_LIMIT_BACKEND):
+        self.backend = backend
+        window = LOGIN_RATE_LIMIT_WINDOW_SECONDS
+        self._local = {
+            "ip": TokenBucketLimiter(LOGIN_RATE_LIMIT_IP_ATTEMPTS, window),
+            "email": TokenBucketLimiter(LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS, window),
+        }
+        self._shared = {
+            "ip": MongoSlidingWindowLimiter(LOGIN_RATE_LIMIT_IP_ATTEMPTS, window),
+            "email": MongoSlidingWindowLimiter(LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS, window),
+        }
+
+    async def _hit(self, scope: str, key: str) -> Optional[float]:
+        if self.backend == "mongo" and repository_backend() == "mongo":
+            try:
+                return await self._shared[scope].hit(f"login:{scope}:{key}")
+            except PyMongoError as e:
+                # Keep limiting per worker rather than failing open
+                logger.warning(f"Shared rate limit unavailable, using in-process limit: {e}")
+        return await self._local[scope].hit(key)
+
+    async def check(self, email: str, ip: str):
+        """
+        Count a login attempt
+
+        Raises:
+            HTTPException: 429 with Retry-After when the IP or the email is over its limit
+        """
+        if not LOGIN_RATE_LIMIT_ENABLED:
+            return
+        for scope, key in (("ip", ip), ("email", email.strip().lower())):
+            retry_after = await self._hit(scope, key)
+            if retry_after is not None:
+                login_throttled.inc(scope)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again later",
+                    headers={"Retry-After": str(max(1, round(retry_after + 0.5)))}
+                )
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,172 @@
+"""Access Token Revocation
+
+Revocations are stored through the revocation repository (the revoked_tokens
+collection on the mongo backend) and mirrored into memory by every worker, so
+authenticating a request checks revocation with two dict lookups and no
+database round-trip.
+
+Two kinds of entries share the store, keyed by "token:<jti>" and "user:<user_id>":
+
+    {"kind": "token", "jti": ..., "user_id": ..., "revoked_at": ..., "expires_at": <token exp>}
+    {"kind": "user", "user_id": ..., "revoked_before": <epoch seconds>,
+     "keep_jti": ..., "revoked_at": ..., "expires_at": ...}
+
+A token entry revokes one token (logout). A user entry revokes every token of
+that user issued before revoked_before (logout everywhere, password change,
+deletion), optionally sparing the token that asked for it. Entries are removed
+(a TTL index on MongoDB) once the tokens they cover would have expired anyway,
+so the set stays as small as the number of revocations within one token
+lifetime.
+
+Revocations apply immediately in the worker that made them; other workers pick
+them up on their next refresh, which reads only entries revoked since the
+previous one.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, REVOCATION_REFRESH_SECONDS
+from app.core.metrics import registry
+from app.repositories import get_revocation_repository
+
+logger = logging.getLogger(__name__)
+
+REVOKED_TOKEN = "token"
+REVOKED_USER = "user"
+
+# Entries are re-read this far back on each refresh, covering clock skew
+# between workers and writes that commit while a refresh is running
+SYNC_OVERLAP_SECONDS = 30
+
+
+class RevocationList:
+    """In-memory mirror of the stored revocations"""
+
+    def __init__(self):
+        # jti -> token expiry (epoch seconds)
+        self._tokens: Dict[str, float] = {}
+        # user id -> (tokens issued before this are revoked, token kept, entry expiry)
+        self._users: Dict[str, Tuple[float, Optional[str], float]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, claims: dict) -> bool:
+        """Whether decoded token claims belong to a revoked token; tokens without iat predate every cutoff"""
+        jti = claims.get("jti")
+        if jti is not None and jti in self._tokens:
+            return True
+        user = self._users.get(claims.get("sub"))
+        if user is None:
+            return False
+        revoked_before, keep_jti, _ = user
+        return claims.get("iat", 0) < revoked_before and (jti is None or jti != keep_jti)
+
+    def _apply(self, doc: dict):
+        expires = doc['expires_at'].timestamp()
+        if doc['kind'] == REVOKED_TOKEN:
+            self._tokens[doc['jti']] = expires
+            return
+        current = self._users.get(doc['user_id'])
+        if current is None or doc['revoked_before'] >= current[0]:
+            self._users[doc['user_id']] = (doc['revoked_before'], doc.get('keep_jti'), expires)
+
+    def _prune(self):
+        now = time.time()
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        self._users = {user_id: entry for user_id, entry in self._users.items() if entry[2] > now}
+
+    async def revoke_token(self, claims: dict):
+        """Revoke a single token by its jti until it expires"""
+        doc = {
+            "kind": REVOKED_TOKEN,
+            "jti": claims['jti'],
+            "user_id": claims.get('sub'),
+            "revoked_at": datetime.now(timezone.utc),
+            "expires_at": datetime.fromtimestamp(claims['exp'], timezone.utc),
+        }
+        await get_revocation_repository().save(f"token:{claims['jti']}", doc)
+        self._apply(doc)
+
+    async def revoke_user(self, user_id: str, keep_jti: Optional[str] = None):
+        """
+        Revoke every token issued to a user so far
+
+        Args:
+            user_id: User whose sessions end
+            keep_jti: Token to leave valid, e.g. the one that changed the password
+        """
+        now = datetime.now(timezone.utc)
+        doc = {
+            "kind": REVOKED_USER,
+            "user_id": user_id,
+            "revoked_before": now.timestamp(),
+            "keep_jti": keep_jti,
+            "revoked_at": now,
+            "expires_at": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        }
+        await get_revocation_repository().save(f"user:{user_id}", doc)
+        self._apply(doc)
+
+    async def refresh(self) -> int:
+        """
+        Load revocations made since the last refresh (all live ones on the first call)
+
+        Returns:
+            Number of entries read
+        """
+        revocations = get_revocation_repository()
+        now = datetime.now(timezone.utc)
+        if self._synced_at is None:
+            docs = await revocations.find_live(now)
+        else:
+            docs = await revocations.find_revoked_since(self._synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS))
+
+        for doc in docs:
+            self._apply(doc)
+        self._synced_at = now
+        self._prune()
+        return len(docs)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Refreshing token revocations failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "revoked_tokens": len(self._tokens),
+            "revoked_users": len(self._users),
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+        }
+
+    # ============ Lifecycle ============
+
+    async def start(self):
+        """Load live revocations, then keep refreshing in the background"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Loading token revocations failed, retrying in the background: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="token_revocations")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+revocation_list = RevocationList()
+
+registry.callback(
+    "revoked_tokens", "Token revocations held in memory by this process", "gauge", ("kind",),
+    lambda: {(REVOKED_TOKEN,): len(revocation_list._tokens), (REVOKED_USER,): len(revocation_list._users)}
+)
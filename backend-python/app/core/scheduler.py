@@ -0,0 +1,138 @@
+"""Background Job Scheduler"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.locks import INSTANCE_ID, Lease
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[object]]
+
+SCHEDULER_LOCK = "scheduler"
+
+
+def seconds_until_next_utc_midnight(now: Optional[datetime] = None) -> float:
+    """Seconds from now until the next UTC midnight"""
+    now = now or datetime.now(timezone.utc)
+    next_midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (next_midnight - now).total_seconds()
+
+
+class Scheduler:
+    """
+    Runs registered jobs as asyncio tasks inside the application lifespan
+
+    Every worker runs a scheduler, but only the one holding the scheduler lease
+    runs jobs, so each job runs once cluster-wide. The other workers keep trying
+    to take the lease and one of them starts the jobs within LOCK_TTL_SECONDS if
+    the leader dies. A new leader runs daily jobs once straight away, catching up
+    on a midnight that passed while no leader was running.
+    """
+
+    def __init__(self, owner: str = INSTANCE_ID):
+        self.owner = owner
+        self._daily_jobs: Dict[str, Job] = {}
+        self._interval_jobs: Dict[str, Tuple[Job, float]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._leader_task: Optional[asyncio.Task] = None
+        self.is_leader = False
+
+    def add_daily_job(self, name: str, func: Job):
+        """Run a job every day at UTC midnight, replacing any job with the same name"""
+        self._daily_jobs[name] = func
+
+    def add_interval_job(self, name: str, func: Job, seconds: float):
+        """Run a job on start and then every `seconds`, replacing any job with the same name"""
+        self._interval_jobs[name] = (func, seconds)
+
+    async def _run_job(self, name: str, func: Job):
+        """Run a job once, logging instead of propagating failures"""
+        try:
+            result = await func()
+            logger.info(f"Scheduled job '{name}' finished: {result}")
+        except Exception as e:
+            logger.error(f"Scheduled job '{name}' failed: {e}")
+
+    async def _daily_loop(self, name: str, func: Job):
+        await self._run_job(name, func)
+        while True:
+            await asyncio.sleep(seconds_until_next_utc_midnight())
+            await self._run_job(name, func)
+
+    async def _interval_loop(self, name: str, func: Job, seconds: float):
+        while True:
+            await self._run_job(name, func)
+            await asyncio.sleep(seconds)
+
+    def _start_jobs(self):
+        for name, func in self._daily_jobs.items():
+            self._tasks.append(asyncio.create_task(self._daily_loop(name, func), name=name))
+        for name, (func, seconds) in self._interval_jobs.items():
+            self._tasks.append(asyncio.create_task(self._interval_loop(name, func, seconds), name=name))
+
+    async def _stop_jobs(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _lead(self):
+        """Compete for the scheduler lease and run the jobs while holding it"""
+        lease = Lease(SCHEDULER_LOCK, owner=self.owner)
+        try:
+            while True:
+                try:
+                    acquired = await lease.acquire()
+                except Exception as e:
+                    logger.error(f"Scheduler leader election failed: {e}")
+                    acquired = False
+                if not acquired:
+                    await asyncio.sleep(lease.ttl / 3)
+                    continue
+
+                logger.info(f"Elected scheduler leader ({lease.owner})")
+                self.is_leader = True
+                self._start_jobs()
+                lease.start_heartbeat()
+                await lease.lost.wait()
+
+                logger.warning("Lost scheduler leadership, stopping jobs")
+                self.is_leader = False
+                await self._stop_jobs()
+        finally:
+            self.is_leader = False
+            await self._stop_jobs()
+            if lease.lost.is_set():
+                lease.stop_heartbeat()
+            else:
+                await asyncio.shield(lease.release())
+
+    def stats(self) -> dict:
+        return {
+            "leader": self.is_leader,
+            "jobs": sorted([*self._daily_jobs, *self._interval_jobs]),
+        }
+
+    def start(self):
+        """Start competing for leadership; jobs run while this worker is the leader"""
+        if self._leader_task is None:
+            self._leader_task = asyncio.create_task(self._lead(), name="scheduler_leader")
+
+    async def stop(self):
+        """Cancel all running jobs and hand leadership over"""
+        if self._leader_task is not None:
+            self._leader_task.cancel()
+            await asyncio.gather(self._leader_task, return_exceptions=True)
+            self._leader_task = None
+
+
+scheduler = Scheduler()
+
+registry.callback(
+    "scheduler_leader", "1 if this process is the scheduler leader", "gauge", (),
+    lambda: {(): int(scheduler.is_leader)}
+)
@@ -1,19 +1,35 @@
 """Security and Authentication"""
 
+import asyncio
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import partial
+from typing import Callable, Optional, TypeVar
 import jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+)
 from app.schemas.user import User
-from app.core.database import get_users_collection
+from app.repositories import get_user_repository
+from app.core.storage import user_from_document
+from app.core.cache import user_cache
+from app.core.revocation import revocation_list
+from app.core.metrics import password_hash_duration, password_hash_rejected, validation_duration
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def hash_password(password: str) -> str:
@@ -26,29 +42,135 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+T = TypeVar("T")
+
+# Bcrypt runs off the event loop in a bounded pool, created on first use
+_password_executor: Optional[Executor] = None
+_pending_password_jobs = 0
+
+
+def _get_password_executor() -> Executor:
+    """Get the password hashing pool"""
+    global _password_executor
+    if _password_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+    return _password_executor
+
+
+async def _run_password_job(operation: str, func: Callable[..., T], *args) -> T:
+    """
+    Run a bcrypt call in the password hashing pool
+    
+    The time is recorded per operation, including any wait for a pool worker.
+    
+    Raises:
+        HTTPException: 503 when PASSWORD_HASH_MAX_PENDING jobs are already queued or running
+    """
+    global _pending_password_jobs
+    if _pending_password_jobs >= PASSWORD_HASH_MAX_PENDING:
+        password_hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+    
+    _pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with password_hash_duration.time(operation):
+            return await loop.run_in_executor(_get_password_executor(), partial(func, *args))
+    finally:
+        _pending_password_jobs -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash password using bcrypt without blocking the event loop"""
+    return await _run_password_job("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash without blocking the event loop"""
+    return await _run_password_job("verify", verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_executor():
+    """Shut down the password hashing pool"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token"""
+    """
+    Create JWT access token
+    
+    Each token gets a unique jti and a sub-second iat so it can be revoked on
+    its own or together with every token issued to its user before a cutoff.
+    """
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def get_current_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get the verified claims of the bearer token, e.g. its jti for logout"""
+    return decode_access_token(credentials.credentials)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Get current authenticated user from JWT token"""
-    token = credentials.credentials
+    return await authenticate_token(credentials.credentials)
+
+
+async def get_current_user_or_query_token(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> User:
+    """
+    Get current user from the Authorization header or a token query parameter
+    
+    For EventSource clients, which cannot set request headers.
+    """
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return await authenticate_token(token)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a JWT access token and return its claims
+    
+    Revocation is checked against the in-memory revocation list, without a
+    database round-trip.
     
+    Raises:
+        HTTPException: 401 if the token is invalid, expired or revoked
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
         
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials"
@@ -58,14 +180,29 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
     
-    users_collection = await get_users_collection()
-    user_doc = await users_collection.find_one({"id": user_id}, {"_id": 0})
+    if revocation_list.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return payload
+
+
+async def authenticate_token(token: str) -> User:
+    """Resolve a JWT access token to its user"""
+    user_id: str = decode_access_token(token)["sub"]
+    
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    user_doc = await get_user_repository().find_by_id(user_id)
     
     if user_doc is None:
         raise HTTPException(
@@ -73,10 +210,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="User not found"
         )
     
-    if isinstance(user_doc.get('created_at'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
-    
-    return User(**user_doc)
+    with validation_duration.time("User"):
+        user = User(**user_from_document(user_doc))
+    user_cache.set(user_id, user)
+    return user
 
 
 async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
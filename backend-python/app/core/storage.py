@@ -0,0 +1,144 @@
+"""Storage Layer - Conversion Between API and Database Representations
+
+Calendar dates (paid_date, renewal_date) are exposed by the API as YYYY-MM-DD
+strings and timestamps (created_at, updated_at) as datetimes. In MongoDB all of
+them are stored as native BSON dates so range queries and date arithmetic can
+run server-side. Documents written before the switch may still hold strings;
+the read helpers accept both until the background migration has converted them.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any
+
+from app.utils.helpers import parse_datetime_string
+
+DATE_FORMAT = "%Y-%m-%d"
+SUBSCRIPTION_DATE_FIELDS = ("paid_date", "renewal_date")
+SUBSCRIPTION_TIMESTAMP_FIELDS = ("created_at", "updated_at")
+USER_TIMESTAMP_FIELDS = ("created_at",)
+
+
+def date_to_storage(value: Any) -> Any:
+    """
+    Convert a calendar date to the stored BSON date (UTC midnight)
+
+    Args:
+        value: YYYY-MM-DD string, date or datetime
+
+    Returns:
+        Timezone-aware datetime, or the value unchanged if it cannot be converted
+    """
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, DATE_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            return value
+    return value
+
+
+def date_from_storage(value: Any) -> Any:
+    """
+    Convert a stored calendar date to its YYYY-MM-DD API representation
+
+    Args:
+        value: Stored BSON date, or a legacy YYYY-MM-DD string
+
+    Returns:
+        YYYY-MM-DD string
+    """
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def timestamp_to_storage(value: Any) -> Any:
+    """
+    Convert a timestamp to the stored BSON date
+
+    Args:
+        value: Datetime or ISO format string
+
+    Returns:
+        Timezone-aware datetime, or the value unchanged if it cannot be converted
+    """
+    if isinstance(value, str):
+        try:
+            value = parse_datetime_string(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def timestamp_from_storage(value: Any) -> Any:
+    """
+    Convert a stored timestamp to a datetime
+
+    Only legacy ISO strings need parsing; BSON dates are returned as-is.
+    """
+    if isinstance(value, str):
+        return timestamp_to_storage(value)
+    return value
+
+
+def subscription_to_document(data: dict) -> dict:
+    """
+    Prepare subscription fields for writing to the database
+
+    Args:
+        data: Full subscription or partial update in API representation
+
+    Returns:
+        New dict with dates and timestamps as BSON dates
+    """
+    doc = dict(data)
+    for field in SUBSCRIPTION_DATE_FIELDS:
+        if field in doc:
+            doc[field] = date_to_storage(doc[field])
+    for field in SUBSCRIPTION_TIMESTAMP_FIELDS:
+        if field in doc:
+            doc[field] = timestamp_to_storage(doc[field])
+    return doc
+
+
+def subscription_from_document(doc: dict) -> dict:
+    """
+    Convert a stored subscription document to its API representation in place
+
+    The stored status is trusted; it is kept current by the daily status job.
+
+    Args:
+        doc: Subscription document read from the database
+
+    Returns:
+        The same dict, ready for Subscription(**doc) or direct serialization
+    """
+    for field in SUBSCRIPTION_DATE_FIELDS:
+        if field in doc:
+            doc[field] = date_from_storage(doc[field])
+    for field in SUBSCRIPTION_TIMESTAMP_FIELDS:
+        if field in doc:
+            doc[field] = timestamp_from_storage(doc[field])
+    return doc
+
+
+def user_to_document(data: dict) -> dict:
+    """Prepare user fields for writing to the database"""
+    doc = dict(data)
+    for field in USER_TIMESTAMP_FIELDS:
+        if field in doc:
+            doc[field] = timestamp_to_storage(doc[field])
+    return doc
+
+
+def user_from_document(doc: dict) -> dict:
+    """Convert a stored user document to its API representation in place"""
+    for field in USER_TIMESTAMP_FIELDS:
+        if field in doc:
+            doc[field] = timestamp_from_storage(doc[field])
+    return doc
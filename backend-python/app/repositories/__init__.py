@@ -0,0 +1,142 @@
+"""Repositories Package
+
+The storage backend for users, subscriptions, token revocations and lease
+locks is chosen by REPOSITORY_BACKEND: "mongo" (default), "memory" or
+"sqlite". Call open_repositories() at startup and close_repositories() at
+shutdown; callers get the current instances from the get_*_repository()
+functions.
+
+Configuration is read when the repositories are opened rather than on import,
+so this package can be imported without loading app.core (whose modules
+import it in turn).
+"""
+
+from typing import NamedTuple, Optional
+
+from .base import (
+    DuplicateEntryError,
+    InsertManyResult,
+    UpdateResult,
+    UserRepository,
+    SubscriptionRepository,
+    RevocationRepository,
+    LockRepository,
+)
+
+REPOSITORY_BACKENDS = ("mongo", "memory", "sqlite")
+
+
+class Repositories(NamedTuple):
+    users: UserRepository
+    subscriptions: SubscriptionRepository
+    revocations: RevocationRepository
+    locks: LockRepository
+
+
+_repositories: Optional[Repositories] = None
+_backend: Optional[str] = None
+
+
+def create_repositories(backend: str, sqlite_path: Optional[str] = None) -> Repositories:
+    """
+    Build the repositories of a backend
+
+    Args:
+        backend: One of REPOSITORY_BACKENDS
+        sqlite_path: Database file of the sqlite backend (defaults to SQLITE_PATH)
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "mongo":
+        from .mongo import MongoUserRepository, MongoSubscriptionRepository, MongoRevocationRepository, MongoLockRepository
+        return Repositories(MongoUserRepository(), MongoSubscriptionRepository(), MongoRevocationRepository(), MongoLockRepository())
+    if backend == "memory":
+        from .memory import MemoryUserRepository, MemorySubscriptionRepository, MemoryRevocationRepository, MemoryLockRepository
+        return Repositories(MemoryUserRepository(), MemorySubscriptionRepository(), MemoryRevocationRepository(), MemoryLockRepository())
+    if backend == "sqlite":
+        from app.core.config import SQLITE_PATH
+        from .memory import MemoryLockRepository
+        from .sqlite import SQLiteDatabase, SQLiteUserRepository, SQLiteSubscriptionRepository, SQLiteRevocationRepository
+        database = SQLiteDatabase(sqlite_path or SQLITE_PATH)
+        # The file is held by a single process, so in-process locks are enough
+        return Repositories(
+            SQLiteUserRepository(database),
+            SQLiteSubscriptionRepository(database),
+            SQLiteRevocationRepository(database),
+            MemoryLockRepository()
+        )
+    raise ValueError(f"Unknown repository backend: {backend} (expected one of {', '.join(REPOSITORY_BACKENDS)})")
+
+
+async def open_repositories(backend: Optional[str] = None, sqlite_path: Optional[str] = None):
+    """Create and open the repositories of a backend (defaults to REPOSITORY_BACKEND), replacing any open ones"""
+    global _repositories, _backend
+    if backend is None:
+        from app.core.config import REPOSITORY_BACKEND
+        backend = REPOSITORY_BACKEND
+    await close_repositories()
+    repositories = create_repositories(backend, sqlite_path)
+    for repository in repositories:
+        await repository.open()
+    _repositories, _backend = repositories, backend
+
+
+async def close_repositories():
+    global _repositories, _backend
+    if _repositories is not None:
+        for repository in _repositories:
+            await repository.close()
+    _repositories, _backend = None, None
+
+
+def _current() -> Repositories:
+    if _repositories is None:
+        raise RuntimeError("Repositories not initialized. Call open_repositories() first.")
+    return _repositories
+
+
+def get_user_repository() -> UserRepository:
+    """Get the user repository"""
+    return _current().users
+
+
+def get_subscription_repository() -> SubscriptionRepository:
+    """Get the subscription repository"""
+    return _current().subscriptions
+
+
+def get_revocation_repository() -> RevocationRepository:
+    """Get the token revocation repository"""
+    return _current().revocations
+
+
+def get_lock_repository() -> LockRepository:
+    """Get the lease lock repository"""
+    return _current().locks
+
+
+def repository_backend() -> Optional[str]:
+    """Name of the open backend"""
+    return _backend
+
+
+__all__ = [
+    "DuplicateEntryError",
+    "InsertManyResult",
+    "UpdateResult",
+    "UserRepository",
+    "SubscriptionRepository",
+    "RevocationRepository",
+    "LockRepository",
+    "Repositories",
+    "REPOSITORY_BACKENDS",
+    "create_repositories",
+    "open_repositories",
+    "close_repositories",
+    "get_user_repository",
+    "get_subscription_repository",
+    "get_revocation_repository",
+    "get_lock_repository",
+    "repository_backend",
+]
@@ -0,0 +1,353 @@
+"""Repository Interfaces
+
+Services read and write users and subscriptions, and the core modules keep
+token revocations and lease locks, through these interfaces instead of Motor
+collections, so the storage backend can be swapped via REPOSITORY_BACKEND.
+Documents cross the interface in their stored representation (see
+app.core.storage): calendar dates and timestamps are timezone-aware
+datetimes, and subscriptions carry their search_terms.
+
+Implementations:
+- mongo: MongoDB through Motor, the production backend
+- memory: indexed dicts in the process, for tests and throwaway instances
+- sqlite: a single SQLite file, for small single-node installs
+"""
+
+import calendar
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.schemas.subscription import BulkSelection, DashboardStats, SubscriptionFilters
+
+# Equality filters of SubscriptionFilters, in the order of the compound indexes
+FILTER_FIELDS = ("status", "category", "type", "duration", "created_by")
+
+# Fields to read, None for the whole document
+Fields = Optional[Sequence[str]]
+
+# Name of the subscription write counter in the counters collection/table
+GENERATION_COUNTER = "subscriptions"
+
+
+class DuplicateEntryError(Exception):
+    """A write would break a unique constraint (user id or email, subscription id)"""
+
+
+class InsertManyResult(NamedTuple):
+    inserted: int
+    errors: List[Tuple[int, str]]  # (index in the batch, message) per rejected document
+
+
+class UpdateResult(NamedTuple):
+    matched: int
+    modified: int
+
+
+def filter_values(filters: Optional[SubscriptionFilters]) -> Dict[str, str]:
+    """Equality filters that are set"""
+    if filters is None:
+        return {}
+    return {field: getattr(filters, field) for field in FILTER_FIELDS if getattr(filters, field) is not None}
+
+
+def renewal_range(filters: Optional[SubscriptionFilters]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Inclusive renewal date bounds of the filters as stored datetimes"""
+    if filters is None:
+        return None, None
+
+    def bound(value: Optional[date]) -> Optional[datetime]:
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc) if value is not None else None
+
+    return bound(filters.renewal_from), bound(filters.renewal_to)
+
+
+def has_filters(filters: Optional[SubscriptionFilters]) -> bool:
+    return bool(filter_values(filters)) or renewal_range(filters) != (None, None)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Move a date forward by whole months, clamping to the month end like MongoDB's $dateAdd"""
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(value.day, calendar.monthrange(year, month + 1)[1])
+    return value.replace(year=year, month=month + 1, day=day)
+
+
+def project(doc: dict, fields: Fields) -> dict:
+    """Copy of a document restricted to the given fields"""
+    if fields is None:
+        return dict(doc)
+    return {field: doc[field] for field in fields if field in doc}
+
+
+class UserRepository(ABC):
+    """Storage of user documents, keyed by id and unique by email"""
+
+    async def open(self):
+        """Prepare the backend (create tables, load state); called once at startup"""
+
+    async def close(self):
+        """Release the backend's resources"""
+
+    @abstractmethod
+    async def insert(self, doc: dict):
+        """
+        Store a new user
+
+        Raises:
+            DuplicateEntryError: If the id or email is taken
+        """
+
+    @abstractmethod
+    async def find_by_id(self, user_id: str) -> Optional[dict]:
+        """User document including password_hash, or None"""
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        """User document including password_hash, or None"""
+
+    @abstractmethod
+    async def find_by_role(self, role: str, limit: int) -> List[dict]:
+        """Up to limit users with the given role"""
+
+    @abstractmethod
+    async def update(self, user_id: str, fields: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        """
+        Set fields and increment the version in one atomic write
+
+        Args:
+            user_id: User to update
+            fields: Stored fields to set
+            expected_version: Only update if the stored version matches
+
+        Returns:
+            The updated document, or None if no user matched
+
+        Raises:
+            DuplicateEntryError: If the new email is taken
+        """
+
+    @abstractmethod
+    async def delete(self, user_id: str) -> bool:
+        """Delete a user; False if it did not exist"""
+
+
+class SubscriptionRepository(ABC):
+    """Storage of subscription documents, keyed by id and ordered by (renewal_date, id)"""
+
+    async def open(self):
+        """Prepare the backend (create tables, load state); called once at startup"""
+
+    async def close(self):
+        """Release the backend's resources"""
+
+    @abstractmethod
+    async def insert(self, doc: dict):
+        """
+        Store a new subscription
+
+        Raises:
+            DuplicateEntryError: If the id is taken
+        """
+
+    @abstractmethod
+    async def insert_many(self, docs: List[dict]) -> InsertManyResult:
+        """Store new subscriptions, continuing past rejected ones"""
+
+    @abstractmethod
+    async def find_by_id(self, subscription_id: str, fields: Fields = None) -> Optional[dict]:
+        """Subscription document, or None"""
+
+    @abstractmethod
+    async def find_page(
+        self,
+        filters: Optional[SubscriptionFilters],
+        after: Optional[Tuple[datetime, str]],
+        limit: int,
+        fields: Fields = None
+    ) -> List[dict]:
+        """
+        Up to limit subscriptions matching filters in (renewal_date, id) order
+
+        Args:
+            filters: List filters
+            after: Keyset position; only subscriptions strictly after it are returned
+            limit: Maximum number of documents
+            fields: Fields to read
+        """
+
+    @abstractmethod
+    def stream(
+        self,
+        filters: Optional[SubscriptionFilters],
+        fields: Fields = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        """Every subscription matching filters in (renewal_date, id) order, read batch_size at a time"""
+
+    @abstractmethod
+    async def search_prefix(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        """Subscriptions where every term is a prefix of one of their search_terms"""
+
+    @abstractmethod
+    async def search_text(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        """
+        Full-text search over SUBSCRIPTION_TEXT_INDEX_WEIGHTS fields
+
+        Documents matching any term, best match first.
+        """
+
+    @abstractmethod
+    async def update(
+        self,
+        subscription_id: str,
+        fields: dict,
+        expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        """
+        Set fields and increment the version in one atomic write
+
+        Returns:
+            The updated document, or None if no subscription matched
+        """
+
+    @abstractmethod
+    async def delete(self, subscription_id: str) -> bool:
+        """Delete a subscription; False if it did not exist"""
+
+    @abstractmethod
+    async def update_selection(self, selection: BulkSelection, fields: dict) -> UpdateResult:
+        """Set the same fields on every selected subscription and increment their versions"""
+
+    @abstractmethod
+    async def update_selection_each(
+        self,
+        selection: BulkSelection,
+        read_fields: Sequence[str],
+        build: Callable[[dict], dict]
+    ) -> UpdateResult:
+        """
+        Set per-document fields on every selected subscription
+
+        Args:
+            selection: Subscriptions to update
+            read_fields: Fields build needs to see
+            build: Returns the fields to set for a document holding read_fields
+        """
+
+    @abstractmethod
+    async def renew_selection(
+        self,
+        selection: BulkSelection,
+        months_by_duration: Dict[str, int],
+        paid_date: datetime,
+        now: datetime
+    ) -> UpdateResult:
+        """
+        Move renewal_date of every selected subscription forward by its duration
+
+        paid_date and updated_at are set, the status is recomputed from the new
+        renewal date and the version incremented. Subscriptions whose duration
+        is not in months_by_duration are not matched.
+        """
+
+    @abstractmethod
+    async def delete_selection(self, selection: BulkSelection) -> int:
+        """Delete every selected subscription; returns the number deleted"""
+
+    @abstractmethod
+    async def set_status(self, status: str, start: Optional[datetime], end: Optional[datetime]) -> int:
+        """
+        Set status on subscriptions renewing within [start, end] that have another status
+
+        Returns:
+            Number of subscriptions changed
+        """
+
+    @abstractmethod
+    async def find_updated_since(self, after: datetime, limit: int) -> List[dict]:
+        """Up to limit subscriptions whose updated_at is after the given time, oldest change first"""
+
+    @abstractmethod
+    async def last_updated_at(self) -> Optional[datetime]:
+        """Latest updated_at of any subscription, or None if there are none"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of subscriptions; may be an estimate"""
+
+    @abstractmethod
+    async def generation(self) -> int:
+        """Current value of the write counter versioning cached responses (see app.core.cache)"""
+
+    @abstractmethod
+    async def bump_generation(self):
+        """Increment the write counter, visible to every worker sharing the backend"""
+
+    @abstractmethod
+    async def dashboard_stats(self, today: date) -> DashboardStats:
+        """Totals, breakdowns and monthly revenue for the dashboard"""
+
+    @abstractmethod
+    async def renewal_groups(self, start: datetime, end: datetime) -> List[dict]:
+        """
+        Subscriptions renewing in [start, end) grouped for the revenue forecast
+
+        Returns:
+            Rows with month (year * 12 + month - 1), duration, category, type,
+            price (sum) and count
+        """
+
+
+class RevocationRepository(ABC):
+    """
+    Storage of access token revocations (see app.core.revocation)
+
+    Entries are keyed by "token:<jti>" or "user:<user_id>" and carry
+    revoked_at and expires_at; expired entries may be removed at any time.
+    """
+
+    async def open(self):
+        """Prepare the backend; called once at startup"""
+
+    async def close(self):
+        """Release the backend's resources"""
+
+    @abstractmethod
+    async def save(self, key: str, doc: dict):
+        """Insert or replace an entry"""
+
+    @abstractmethod
+    async def find_live(self, now: datetime) -> List[dict]:
+        """Entries that expire after now"""
+
+    @abstractmethod
+    async def find_revoked_since(self, since: datetime) -> List[dict]:
+        """Entries revoked at or after since"""
+
+
+class LockRepository(ABC):
+    """Storage of lease locks, one per name (see app.core.locks)"""
+
+    async def open(self):
+        """Prepare the backend; called once at startup"""
+
+    async def close(self):
+        """Release the backend's resources"""
+
+    @abstractmethod
+    async def acquire(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        """
+        Take the lock until expires_at
+
+        Succeeds if the lock is free, expired at now or already held by owner.
+        """
+
+    @abstractmethod
+    async def renew(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        """Extend the lock to expires_at; False if owner no longer holds it"""
+
+    @abstractmethod
+    async def release(self, name: str, owner: str):
+        """Remove the lock if owner holds it"""
@@ -0,0 +1,490 @@
+"""In-Memory Repositories
+
+Documents live in dicts in the process and are lost on restart; meant for
+tests and throwaway instances. Each worker process has its own copy, so run a
+single worker.
+
+The indexes mirror the MongoDB ones: subscriptions are kept in a sorted
+(renewal_date, id) list for pages and range scans, equality filters have a set
+of ids per value, prefix search bisects a sorted (term, id) list and text
+search looks terms up in a weighted inverted index. Every operation runs
+without awaiting in between, so each one is atomic for the event loop.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from app.repositories.base import (
+    FILTER_FIELDS,
+    DuplicateEntryError,
+    Fields,
+    InsertManyResult,
+    UpdateResult,
+    UserRepository,
+    SubscriptionRepository,
+    RevocationRepository,
+    LockRepository,
+    add_months,
+    filter_values,
+    project,
+    renewal_range,
+)
+from app.schemas.subscription import BulkSelection, DashboardStats, MonthlyRevenue, SubscriptionFilters
+from app.utils.constants import SUBSCRIPTION_TEXT_INDEX_WEIGHTS
+from app.utils.helpers import calculate_subscription_status, tokenize_search_text
+
+# Sorts after every id, for range bounds on renewal_date alone
+ID_MAX = "\U0010ffff"
+
+
+class MemoryUserRepository(UserRepository):
+    """Users by id, with email and role indexes"""
+
+    def __init__(self):
+        self._users: Dict[str, dict] = {}
+        self._by_email: Dict[str, str] = {}
+        self._by_role: Dict[str, Dict[str, None]] = defaultdict(dict)  # Insertion-ordered id sets
+
+    def _index(self, doc: dict):
+        self._by_email[doc['email']] = doc['id']
+        self._by_role[doc['role']][doc['id']] = None
+
+    def _unindex(self, doc: dict):
+        del self._by_email[doc['email']]
+        del self._by_role[doc['role']][doc['id']]
+
+    async def insert(self, doc: dict):
+        if doc['id'] in self._users or doc['email'] in self._by_email:
+            raise DuplicateEntryError(f"User {doc['id']} or {doc['email']} already exists")
+        self._users[doc['id']] = dict(doc)
+        self._index(doc)
+
+    async def find_by_id(self, user_id: str) -> Optional[dict]:
+        doc = self._users.get(user_id)
+        return dict(doc) if doc is not None else None
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        user_id = self._by_email.get(email)
+        return dict(self._users[user_id]) if user_id is not None else None
+
+    async def find_by_role(self, role: str, limit: int) -> List[dict]:
+        return [dict(self._users[user_id]) for user_id in list(self._by_role.get(role, ()))[:limit]]
+
+    async def update(self, user_id: str, fields: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        doc = self._users.get(user_id)
+        if doc is None or (expected_version is not None and doc.get('version', 1) != expected_version):
+            return None
+        email = fields.get('email', doc['email'])
+        if self._by_email.get(email, user_id) != user_id:
+            raise DuplicateEntryError(f"Email {email} already registered")
+
+        self._unindex(doc)
+        doc.update(fields)
+        doc['version'] = doc.get('version', 1) + 1
+        self._index(doc)
+        return dict(doc)
+
+    async def delete(self, user_id: str) -> bool:
+        doc = self._users.pop(user_id, None)
+        if doc is None:
+            return False
+        self._unindex(doc)
+        return True
+
+
+class MemorySubscriptionRepository(SubscriptionRepository):
+    """Subscriptions by id, with page order, filter, prefix and text indexes"""
+
+    def __init__(self):
+        self._docs: Dict[str, dict] = {}
+        self._order: List[Tuple[datetime, str]] = []
+        self._by_field: Dict[str, Dict[str, Set[str]]] = {field: defaultdict(set) for field in FILTER_FIELDS}
+        self._terms: List[Tuple[str, str]] = []
+        self._text: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._generation = 0
+
+    # ============ Indexes ============
+
+    @staticmethod
+    def _text_weights(doc: dict) -> Dict[str, float]:
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in SUBSCRIPTION_TEXT_INDEX_WEIGHTS.items():
+            for term in set(tokenize_search_text(doc.get(field))):
+                weights[term] += weight
+        return weights
+
+    def _index(self, doc: dict):
+        sub_id = doc['id']
+        self._docs[sub_id] = doc
+        insort(self._order, (doc['renewal_date'], sub_id))
+        for field in FILTER_FIELDS:
+            self._by_field[field][doc.get(field)].add(sub_id)
+        for term in doc.get('search_terms', ()):
+            insort(self._terms, (term, sub_id))
+        for term, weight in self._text_weights(doc).items():
+            self._text[term][sub_id] = weight
+
+    def _unindex(self, doc: dict):
+        sub_id = doc['id']
+        del self._docs[sub_id]
+        del self._order[bisect_left(self._order, (doc['renewal_date'], sub_id))]
+        for field in FILTER_FIELDS:
+            ids = self._by_field[field][doc.get(field)]
+            ids.discard(sub_id)
+            if not ids:
+                del self._by_field[field][doc.get(field)]
+        for term in doc.get('search_terms', ()):
+            del self._terms[bisect_left(self._terms, (term, sub_id))]
+        for term in self._text_weights(doc):
+            postings = self._text[term]
+            postings.pop(sub_id, None)
+            if not postings:
+                del self._text[term]
+
+    def _replace(self, doc: dict, fields: dict) -> dict:
+        """Merge fields into a stored document, bump its version and reindex it"""
+        self._unindex(doc)
+        updated = {**doc, **fields, "version": doc.get('version', 1) + 1}
+        self._index(updated)
+        return updated
+
+    # ============ Selection ============
+
+    def _walk(self, start: Optional[datetime] = None) -> Iterator[Tuple[datetime, str]]:
+        """(renewal_date, id) keys in order, from the first renewing on or after start"""
+        position = bisect_left(self._order, (start, "")) if start is not None else 0
+        for index in range(position, len(self._order)):
+            yield self._order[index]
+
+    def _keys(
+        self,
+        filters: Optional[SubscriptionFilters],
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> Iterator[Tuple[datetime, str]]:
+        """(renewal_date, id) keys matching filters, in order"""
+        values = filter_values(filters)
+        start, end = renewal_range(filters)
+
+        if values:
+            # Smallest equality index first, then walk the candidates in order
+            id_sets = sorted((self._by_field[field].get(value, set()) for field, value in values.items()), key=len)
+            candidates = set.intersection(*id_sets)
+            keys: Iterable[Tuple[datetime, str]] = sorted((self._docs[sub_id]['renewal_date'], sub_id) for sub_id in candidates)
+            if start is not None:
+                keys = (key for key in keys if key[0] >= start)
+            if after is not None:
+                keys = (key for key in keys if key > after)
+        elif after is not None and (start is None or after >= (start, "")):
+            keys = (self._order[index] for index in range(bisect_right(self._order, after), len(self._order)))
+        else:
+            keys = self._walk(start)
+
+        for key in keys:
+            if end is not None and key[0] > end:
+                return
+            yield key
+
+    def _matches(self, doc: dict, filters: Optional[SubscriptionFilters]) -> bool:
+        start, end = renewal_range(filters)
+        return all(doc.get(field) == value for field, value in filter_values(filters).items()) \
+            and (start is None or doc['renewal_date'] >= start) \
+            and (end is None or doc['renewal_date'] <= end)
+
+    def _selected(self, selection: BulkSelection) -> List[dict]:
+        if selection.ids is None:
+            return [self._docs[sub_id] for _, sub_id in self._keys(selection.filters)]
+        docs = (self._docs.get(sub_id) for sub_id in dict.fromkeys(selection.ids))
+        return [doc for doc in docs if doc is not None and self._matches(doc, selection.filters)]
+
+    # ============ Reads ============
+
+    async def find_by_id(self, subscription_id: str, fields: Fields = None) -> Optional[dict]:
+        doc = self._docs.get(subscription_id)
+        return project(doc, fields) if doc is not None else None
+
+    async def find_page(
+        self,
+        filters: Optional[SubscriptionFilters],
+        after: Optional[Tuple[datetime, str]],
+        limit: int,
+        fields: Fields = None
+    ) -> List[dict]:
+        page = []
+        for _, sub_id in self._keys(filters, after):
+            if len(page) >= limit:
+                break
+            page.append(project(self._docs[sub_id], fields))
+        return page
+
+    async def stream(
+        self,
+        filters: Optional[SubscriptionFilters],
+        fields: Fields = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        # Keys are listed up front, so writes while streaming do not disturb the walk
+        for _, sub_id in list(self._keys(filters)):
+            doc = self._docs.get(sub_id)
+            if doc is not None:
+                yield project(doc, fields)
+
+    async def search_prefix(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        matches: Optional[Set[str]] = None
+        # Longest term first, as it usually narrows the candidates most
+        for term in sorted(terms, key=len, reverse=True):
+            start = bisect_left(self._terms, (term, ""))
+            end = bisect_left(self._terms, (term + ID_MAX, ""))
+            ids = {sub_id for _, sub_id in self._terms[start:end]}
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        # Most terms matched exactly first, then the closest completion of each term in turn
+        def rank(sub_id: str) -> Tuple[int, List[str], str]:
+            search_terms = self._docs[sub_id]['search_terms']
+            completions = [min(found for found in search_terms if found.startswith(term)) for term in terms]
+            exact = sum(completion == term for completion, term in zip(completions, terms))
+            return -exact, completions, sub_id
+
+        ordered = sorted(matches, key=rank)
+        return [project(self._docs[sub_id], fields) for sub_id in ordered[offset:offset + limit]]
+
+    async def search_text(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(terms):
+            for sub_id, weight in self._text.get(term, {}).items():
+                scores[sub_id] += weight
+        ordered = sorted(scores, key=lambda sub_id: (-scores[sub_id], sub_id))
+        return [project(self._docs[sub_id], fields) for sub_id in ordered[offset:offset + limit]]
+
+    async def find_updated_since(self, after: datetime, limit: int) -> List[dict]:
+        changed = [doc for doc in self._docs.values() if isinstance(doc.get('updated_at'), datetime) and doc['updated_at'] > after]
+        changed.sort(key=lambda doc: doc['updated_at'])
+        return [dict(doc) for doc in changed[:limit]]
+
+    async def last_updated_at(self) -> Optional[datetime]:
+        return max(
+            (doc['updated_at'] for doc in self._docs.values() if isinstance(doc.get('updated_at'), datetime)),
+            default=None
+        )
+
+    async def count(self) -> int:
+        return len(self._docs)
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def bump_generation(self):
+        self._generation += 1
+
+    async def dashboard_stats(self, today: date) -> DashboardStats:
+        today_start = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+        tomorrow_start = today_start + timedelta(days=1)
+        days_31_later = today_start + timedelta(days=31)
+
+        counts: Dict[str, Dict[str, int]] = {"category": defaultdict(int), "type": defaultdict(int), "status": defaultdict(int)}
+        paid_months: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        renewal_months: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        revenue = 0.0
+        expired = due_today = upcoming = 0
+
+        for doc in self._docs.values():
+            price = doc.get('price') or 0
+            revenue += price
+            for field, field_counts in counts.items():
+                if doc.get(field) is not None:
+                    field_counts[doc[field]] += 1
+            if isinstance(doc.get('paid_date'), datetime):
+                month = paid_months[doc['paid_date'].strftime("%Y-%m")]
+                month[0] += price
+                month[1] += 1
+            renewal_date = doc.get('renewal_date')
+            if not isinstance(renewal_date, datetime):
+                continue
+            if renewal_date < today_start:
+                expired += 1
+                continue
+            if renewal_date < tomorrow_start:
+                due_today += 1
+            elif renewal_date < days_31_later:
+                upcoming += 1
+            month = renewal_months[renewal_date.strftime("%Y-%m")]
+            month[0] += price
+            month[1] += 1
+
+        def months(by_month: Dict[str, List[float]]) -> List[MonthlyRevenue]:
+            return [
+                MonthlyRevenue(month=month, revenue=totals[0], subscriptions=totals[1])
+                for month, totals in sorted(by_month.items())
+            ]
+
+        return DashboardStats(
+            total_subscriptions=len(self._docs),
+            upcoming_renewals=upcoming,
+            renewals_due_today=due_today,
+            expired_subscriptions=expired,
+            by_category=dict(counts['category']),
+            by_type=dict(counts['type']),
+            by_status=dict(counts['status']),
+            total_revenue=revenue,
+            revenue_by_month=months(paid_months),
+            renewal_revenue_by_month=months(renewal_months)
+        )
+
+    async def renewal_groups(self, start: datetime, end: datetime) -> List[dict]:
+        groups: Dict[tuple, List[float]] = defaultdict(lambda: [0.0, 0])
+        for renewal_date, sub_id in self._walk(start):
+            if renewal_date >= end:
+                break
+            doc = self._docs[sub_id]
+            key = (renewal_date.year * 12 + renewal_date.month - 1, doc.get('duration'), doc.get('category'), doc.get('type'))
+            groups[key][0] += doc.get('price') or 0
+            groups[key][1] += 1
+        return [
+            {"month": month, "duration": duration, "category": category, "type": sub_type, "price": price, "count": count}
+            for (month, duration, category, sub_type), (price, count) in groups.items()
+        ]
+
+    # ============ Writes ============
+
+    async def insert(self, doc: dict):
+        if doc['id'] in self._docs:
+            raise DuplicateEntryError(f"Subscription {doc['id']} already exists")
+        self._index(dict(doc))
+
+    async def insert_many(self, docs: List[dict]) -> InsertManyResult:
+        inserted = 0
+        errors = []
+        for index, doc in enumerate(docs):
+            if doc['id'] in self._docs:
+                errors.append((index, f"Duplicate subscription id {doc['id']}"))
+                continue
+            self._index(dict(doc))
+            inserted += 1
+        return InsertManyResult(inserted, errors)
+
+    async def update(
+        self,
+        subscription_id: str,
+        fields: dict,
+        expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        doc = self._docs.get(subscription_id)
+        if doc is None or (expected_version is not None and doc.get('version', 1) != expected_version):
+            return None
+        return dict(self._replace(doc, fields))
+
+    async def delete(self, subscription_id: str) -> bool:
+        doc = self._docs.get(subscription_id)
+        if doc is None:
+            return False
+        self._unindex(doc)
+        return True
+
+    async def update_selection(self, selection: BulkSelection, fields: dict) -> UpdateResult:
+        docs = self._selected(selection)
+        for doc in docs:
+            self._replace(doc, fields)
+        return UpdateResult(len(docs), len(docs))
+
+    async def update_selection_each(
+        self,
+        selection: BulkSelection,
+        read_fields: Sequence[str],
+        build: Callable[[dict], dict]
+    ) -> UpdateResult:
+        docs = self._selected(selection)
+        for doc in docs:
+            self._replace(doc, build(project(doc, read_fields)))
+        return UpdateResult(len(docs), len(docs))
+
+    async def renew_selection(
+        self,
+        selection: BulkSelection,
+        months_by_duration: Dict[str, int],
+        paid_date: datetime,
+        now: datetime
+    ) -> UpdateResult:
+        docs = [doc for doc in self._selected(selection) if doc.get('duration') in months_by_duration]
+        for doc in docs:
+            renewal_date = add_months(doc['renewal_date'], months_by_duration[doc['duration']])
+            self._replace(doc, {
+                "renewal_date": renewal_date,
+                "paid_date": paid_date,
+                "updated_at": now,
+                "status": calculate_subscription_status(renewal_date),
+            })
+        return UpdateResult(len(docs), len(docs))
+
+    async def delete_selection(self, selection: BulkSelection) -> int:
+        docs = self._selected(selection)
+        for doc in docs:
+            self._unindex(doc)
+        return len(docs)
+
+    async def set_status(self, status: str, start: Optional[datetime], end: Optional[datetime]) -> int:
+        stale = []
+        for renewal_date, sub_id in self._walk(start):
+            if end is not None and renewal_date > end:
+                break
+            if self._docs[sub_id].get('status') != status:
+                stale.append(self._docs[sub_id])
+        for doc in stale:
+            # Only the status index changes
+            self._by_field['status'][doc.get('status')].discard(doc['id'])
+            if not self._by_field['status'][doc.get('status')]:
+                del self._by_field['status'][doc.get('status')]
+            doc['status'] = status
+            self._by_field['status'][status].add(doc['id'])
+        return len(stale)
+
+
+class MemoryRevocationRepository(RevocationRepository):
+    """Revocation entries by key, dropping expired ones as new ones arrive"""
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+
+    async def save(self, key: str, doc: dict):
+        now = datetime.now(timezone.utc)
+        self._entries = {key: entry for key, entry in self._entries.items() if entry['expires_at'] > now}
+        self._entries[key] = dict(doc)
+
+    async def find_live(self, now: datetime) -> List[dict]:
+        return [dict(entry) for entry in self._entries.values() if entry['expires_at'] > now]
+
+    async def find_revoked_since(self, since: datetime) -> List[dict]:
+        return [dict(entry) for entry in self._entries.values() if entry['revoked_at'] >= since]
+
+
+class MemoryLockRepository(LockRepository):
+    """
+    Locks held in this process
+
+    Only coordinates tasks within one process, which is all the memory and
+    sqlite backends run.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[str, datetime]] = {}  # name -> (owner, expires_at)
+
+    async def acquire(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        current = self._locks.get(name)
+        if current is not None and current[0] != owner and current[1] > now:
+            return False
+        self._locks[name] = (owner, expires_at)
+        return True
+
+    async def renew(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        current = self._locks.get(name)
+        if current is None or current[0] != owner:
+            return False
+        self._locks[name] = (owner, expires_at)
+        return True
+
+    async def release(self, name: str, owner: str):
+        current = self._locks.get(name)
+        if current is not None and current[0] == owner:
+            del self._locks[name]
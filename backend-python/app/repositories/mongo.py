@@ -0,0 +1,519 @@
+"""MongoDB Repositories
+
+The production backend: users, subscriptions, counters, revoked_tokens and
+locks collections through Motor, using the indexes created by app.core.migrations. List, search, export,
+dashboard and forecast reads go through the read-heavy collection handle and
+may be served by a secondary (see MONGO_READ_HEAVY_PREFERENCE).
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.core.database import (
+    get_users_collection,
+    get_subscriptions_collection,
+    get_subscriptions_read_collection,
+    get_counters_collection,
+    get_locks_collection,
+    get_revoked_tokens_collection,
+)
+from app.core.storage import date_to_storage
+from app.repositories.base import (
+    GENERATION_COUNTER,
+    DuplicateEntryError,
+    Fields,
+    InsertManyResult,
+    UpdateResult,
+    UserRepository,
+    SubscriptionRepository,
+    RevocationRepository,
+    LockRepository,
+    filter_values,
+    renewal_range,
+)
+from app.schemas.subscription import BulkSelection, DashboardStats, MonthlyRevenue, SubscriptionFilters
+from app.utils.helpers import build_status_expression
+
+PAGE_SORT = [("renewal_date", 1), ("id", 1)]
+
+
+def projection(fields: Fields) -> dict:
+    if fields is None:
+        return {"_id": 0}
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+def build_filter_query(filters: Optional[SubscriptionFilters] = None) -> dict:
+    """Build a MongoDB query from subscription filters"""
+    query = dict(filter_values(filters))
+    start, end = renewal_range(filters)
+    renewal_dates = {}
+    if start is not None:
+        renewal_dates['$gte'] = start
+    if end is not None:
+        renewal_dates['$lte'] = end
+    if renewal_dates:
+        query['renewal_date'] = renewal_dates
+    return query
+
+
+def build_selection_query(selection: BulkSelection) -> dict:
+    """Build the query for a bulk operation from ids and/or filters"""
+    clauses = []
+    if selection.ids is not None:
+        clauses.append({"id": {"$in": selection.ids}})
+    filter_query = build_filter_query(selection.filters)
+    if filter_query:
+        clauses.append(filter_query)
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class MongoUserRepository(UserRepository):
+    """Users collection"""
+
+    async def insert(self, doc: dict):
+        users_collection = await get_users_collection()
+        try:
+            await users_collection.insert_one(dict(doc))
+        except DuplicateKeyError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def find_by_id(self, user_id: str) -> Optional[dict]:
+        users_collection = await get_users_collection()
+        return await users_collection.find_one({"id": user_id}, {"_id": 0})
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        users_collection = await get_users_collection()
+        return await users_collection.find_one({"email": email}, {"_id": 0})
+
+    async def find_by_role(self, role: str, limit: int) -> List[dict]:
+        users_collection = await get_users_collection()
+        return await users_collection.find({"role": role}, {"_id": 0}).to_list(limit)
+
+    async def update(self, user_id: str, fields: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        users_collection = await get_users_collection()
+        query = {"id": user_id}
+        if expected_version is not None:
+            query['version'] = expected_version
+        try:
+            return await users_collection.find_one_and_update(
+                query,
+                {"$set": fields, "$inc": {"version": 1}},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def delete(self, user_id: str) -> bool:
+        users_collection = await get_users_collection()
+        result = await users_collection.delete_one({"id": user_id})
+        return result.deleted_count > 0
+
+
+class MongoSubscriptionRepository(SubscriptionRepository):
+    """Subscriptions collection"""
+
+    async def insert(self, doc: dict):
+        subs_collection = await get_subscriptions_collection()
+        try:
+            await subs_collection.insert_one(dict(doc))
+        except DuplicateKeyError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def insert_many(self, docs: List[dict]) -> InsertManyResult:
+        subs_collection = await get_subscriptions_collection()
+        try:
+            result = await subs_collection.insert_many([dict(doc) for doc in docs], ordered=False)
+            return InsertManyResult(len(result.inserted_ids), [])
+        except BulkWriteError as e:
+            return InsertManyResult(e.details.get('nInserted', 0), [
+                (write_error['index'], write_error.get('errmsg', 'Write failed'))
+                for write_error in e.details.get('writeErrors', [])
+            ])
+
+    async def find_by_id(self, subscription_id: str, fields: Fields = None) -> Optional[dict]:
+        subs_collection = await get_subscriptions_collection()
+        return await subs_collection.find_one({"id": subscription_id}, projection(fields))
+
+    async def find_page(
+        self,
+        filters: Optional[SubscriptionFilters],
+        after: Optional[Tuple[datetime, str]],
+        limit: int,
+        fields: Fields = None
+    ) -> List[dict]:
+        subs_collection = await get_subscriptions_read_collection()
+        query = build_filter_query(filters)
+
+        # Keyset pagination: continue strictly after the last (renewal_date, id) seen
+        if after is not None:
+            last_renewal_date, last_id = after
+            after_cursor = {"$or": [
+                {"renewal_date": {"$gt": last_renewal_date}},
+                {"renewal_date": last_renewal_date, "id": {"$gt": last_id}},
+            ]}
+            query = {"$and": [query, after_cursor]} if query else after_cursor
+
+        return await subs_collection.find(query, projection(fields)) \
+            .sort(PAGE_SORT) \
+            .limit(limit) \
+            .to_list(limit)
+
+    async def stream(
+        self,
+        filters: Optional[SubscriptionFilters],
+        fields: Fields = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        subs_collection = await get_subscriptions_read_collection()
+        cursor = subs_collection.find(build_filter_query(filters), projection(fields)) \
+            .sort(PAGE_SORT) \
+            .batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def search_prefix(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        subs_collection = await get_subscriptions_read_collection()
+        prefix_query = {"$and": [
+            {"search_terms": {"$regex": f"^{re.escape(term)}"}} for term in terms
+        ]}
+        # Most terms matched exactly first, then the closest completion of each term
+        # in turn, then id, like the other backends; the sort is bounded to offset + limit documents
+        completions = {
+            f"_completion{i}": {"$min": {"$filter": {
+                "input": "$search_terms",
+                "as": "term",
+                "cond": {"$eq": [{"$indexOfCP": ["$$term", term]}, 0]}
+            }}}
+            for i, term in enumerate(terms)
+        }
+        # A term is its own closest completion exactly when it matched a whole search term
+        exact = {"$add": [{"$cond": [{"$eq": [f"$_completion{i}", term]}, 1, 0]} for i, term in enumerate(terms)]}
+        ranks = {"_exact": 0, **{name: 0 for name in completions}}
+        pipeline = [
+            {"$match": prefix_query},
+            {"$addFields": completions},
+            {"$addFields": {"_exact": exact}},
+            {"$sort": {"_exact": -1, **{name: 1 for name in completions}, "id": 1, "_id": 1}},
+            {"$skip": offset},
+            {"$limit": limit},
+            {"$project": projection(fields) if fields is not None else {"_id": 0, **ranks}},
+        ]
+        return await subs_collection.aggregate(pipeline, hint="search_terms", allowDiskUse=True).to_list(limit)
+
+    async def search_text(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        subs_collection = await get_subscriptions_read_collection()
+        docs = await subs_collection.find(
+            {"$text": {"$search": " ".join(terms)}},
+            {**projection(fields), "score": {"$meta": "textScore"}}
+        ) \
+            .sort([("score", {"$meta": "textScore"})]) \
+            .skip(offset) \
+            .limit(limit) \
+            .to_list(limit)
+        for doc in docs:
+            doc.pop('score', None)
+        return docs
+
+    async def find_updated_since(self, after: datetime, limit: int) -> List[dict]:
+        subs_collection = await get_subscriptions_collection()
+        return await subs_collection.find({"updated_at": {"$gt": after}}, {"_id": 0}) \
+            .sort("updated_at", 1) \
+            .limit(limit) \
+            .to_list(limit)
+
+    async def last_updated_at(self) -> Optional[datetime]:
+        subs_collection = await get_subscriptions_collection()
+        latest = await subs_collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        return latest.get('updated_at') if latest else None
+
+    async def count(self) -> int:
+        subs_collection = await get_subscriptions_collection()
+        return await subs_collection.estimated_document_count()
+
+    async def generation(self) -> int:
+        counters_collection = await get_counters_collection()
+        counter = await counters_collection.find_one({"_id": GENERATION_COUNTER})
+        return counter['value'] if counter else 0
+
+    async def bump_generation(self):
+        counters_collection = await get_counters_collection()
+        await counters_collection.update_one({"_id": GENERATION_COUNTER}, {"$inc": {"value": 1}}, upsert=True)
+
+    async def update(
+        self,
+        subscription_id: str,
+        fields: dict,
+        expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        subs_collection = await get_subscriptions_collection()
+        query = {"id": subscription_id}
+        if expected_version is not None:
+            query['version'] = expected_version
+        return await subs_collection.find_one_and_update(
+            query,
+            {"$set": fields, "$inc": {"version": 1}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def delete(self, subscription_id: str) -> bool:
+        subs_collection = await get_subscriptions_collection()
+        result = await subs_collection.delete_one({"id": subscription_id})
+        return result.deleted_count > 0
+
+    async def update_selection(self, selection: BulkSelection, fields: dict) -> UpdateResult:
+        subs_collection = await get_subscriptions_collection()
+        result = await subs_collection.update_many(
+            build_selection_query(selection),
+            {"$set": fields, "$inc": {"version": 1}}
+        )
+        return UpdateResult(result.matched_count, result.modified_count)
+
+    async def update_selection_each(
+        self,
+        selection: BulkSelection,
+        read_fields: Sequence[str],
+        build: Callable[[dict], dict],
+        batch_size: int = 1000
+    ) -> UpdateResult:
+        """Written with unordered bulk_write batches of per-document updates"""
+        subs_collection = await get_subscriptions_collection()
+        matched = 0
+        modified = 0
+
+        async def flush(operations: List[UpdateOne]):
+            nonlocal matched, modified
+            if operations:
+                result = await subs_collection.bulk_write(operations, ordered=False)
+                matched += result.matched_count
+                modified += result.modified_count
+
+        operations: List[UpdateOne] = []
+        cursor = subs_collection.find(build_selection_query(selection), {"_id": 1, **{field: 1 for field in read_fields}})
+        async for doc in cursor.batch_size(batch_size):
+            operations.append(UpdateOne({"_id": doc['_id']}, {"$set": build(doc), "$inc": {"version": 1}}))
+            if len(operations) >= batch_size:
+                await flush(operations)
+                operations = []
+        await flush(operations)
+        return UpdateResult(matched, modified)
+
+    async def renew_selection(
+        self,
+        selection: BulkSelection,
+        months_by_duration: Dict[str, int],
+        paid_date: datetime,
+        now: datetime
+    ) -> UpdateResult:
+        """Renews in one server-side update_many"""
+        subs_collection = await get_subscriptions_collection()
+        query = {"$and": [build_selection_query(selection), {"duration": {"$in": list(months_by_duration)}}]}
+        months = {"$switch": {
+            "branches": [
+                {"case": {"$eq": ["$duration", duration]}, "then": count}
+                for duration, count in months_by_duration.items()
+            ],
+            "default": 0,
+        }}
+        pipeline = [
+            {"$set": {
+                "renewal_date": {"$dateAdd": {"startDate": "$renewal_date", "unit": "month", "amount": months}},
+                "paid_date": paid_date,
+                "updated_at": now,
+                "version": {"$add": [{"$ifNull": ["$version", 1]}, 1]},
+            }},
+            {"$set": {"status": build_status_expression("$renewal_date", now.date())}},
+        ]
+        result = await subs_collection.update_many(query, pipeline)
+        return UpdateResult(result.matched_count, result.modified_count)
+
+    async def delete_selection(self, selection: BulkSelection) -> int:
+        subs_collection = await get_subscriptions_collection()
+        result = await subs_collection.delete_many(build_selection_query(selection))
+        return result.deleted_count
+
+    async def set_status(self, status: str, start: Optional[datetime], end: Optional[datetime]) -> int:
+        subs_collection = await get_subscriptions_collection()
+        renewal_dates = {}
+        if start is not None:
+            renewal_dates['$gte'] = start
+        if end is not None:
+            renewal_dates['$lte'] = end
+        result = await subs_collection.update_many(
+            {"renewal_date": renewal_dates, "status": {"$ne": status}},
+            {"$set": {"status": status}}
+        )
+        return result.modified_count
+
+    async def dashboard_stats(self, today: date) -> DashboardStats:
+        """Computed in a single aggregation"""
+        subs_collection = await get_subscriptions_read_collection()
+
+        today_start = date_to_storage(today)
+        tomorrow_start = today_start + timedelta(days=1)
+        days_31_later = today_start + timedelta(days=31)
+        renewal_date = "$renewal_date"
+
+        def as_date(field: str) -> dict:
+            # Tolerates documents not yet converted by the date migration
+            return {"$convert": {"input": field, "to": "date", "onError": None, "onNull": None}}
+
+        def count_if(condition: dict) -> dict:
+            return {"$sum": {"$cond": [condition, 1, 0]}}
+
+        def by_month(field: str) -> list:
+            return [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m", "date": field}},
+                    "revenue": {"$sum": "$price"},
+                    "subscriptions": {"$sum": 1},
+                }},
+                {"$sort": {"_id": 1}},
+            ]
+
+        pipeline = [
+            {"$project": {
+                "_id": 0,
+                "price": 1,
+                "category": 1,
+                "type": 1,
+                "status": 1,
+                "paid_date": as_date("$paid_date"),
+                "renewal_date": as_date(renewal_date),
+            }},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "revenue": {"$sum": "$price"},
+                    "expired": count_if({"$and": [
+                        {"$ne": [renewal_date, None]},
+                        {"$lt": [renewal_date, today_start]},
+                    ]}),
+                    "due_today": count_if({"$and": [
+                        {"$gte": [renewal_date, today_start]},
+                        {"$lt": [renewal_date, tomorrow_start]},
+                    ]}),
+                    "upcoming": count_if({"$and": [
+                        {"$gte": [renewal_date, tomorrow_start]},
+                        {"$lt": [renewal_date, days_31_later]},
+                    ]}),
+                }}],
+                "by_category": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}],
+                "by_type": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+                "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+                "revenue_by_month": by_month("$paid_date"),
+                "renewal_revenue_by_month": [
+                    {"$match": {"renewal_date": {"$gte": today_start}}},
+                    *by_month(renewal_date),
+                ],
+            }}
+        ]
+
+        result = (await subs_collection.aggregate(pipeline).to_list(1))[0]
+        totals = result['totals'][0] if result['totals'] else {}
+
+        def counts(facet: str) -> dict:
+            return {row['_id']: row['count'] for row in result[facet] if row['_id'] is not None}
+
+        def months(facet: str) -> List[MonthlyRevenue]:
+            return [
+                MonthlyRevenue(month=row['_id'], revenue=row['revenue'], subscriptions=row['subscriptions'])
+                for row in result[facet] if row['_id']
+            ]
+
+        return DashboardStats(
+            total_subscriptions=totals.get('total', 0),
+            upcoming_renewals=totals.get('upcoming', 0),
+            renewals_due_today=totals.get('due_today', 0),
+            expired_subscriptions=totals.get('expired', 0),
+            by_category=counts('by_category'),
+            by_type=counts('by_type'),
+            by_status=counts('by_status'),
+            total_revenue=totals.get('revenue', 0.0),
+            revenue_by_month=months('revenue_by_month'),
+            renewal_revenue_by_month=months('renewal_revenue_by_month')
+        )
+
+    async def renewal_groups(self, start: datetime, end: datetime) -> List[dict]:
+        """Grouped by the database, so only a few thousand rows cross the wire"""
+        subs_collection = await get_subscriptions_read_collection()
+        pipeline = [
+            {"$match": {"renewal_date": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {
+                    "month": {"$add": [
+                        {"$multiply": [{"$year": "$renewal_date"}, 12]},
+                        {"$subtract": [{"$month": "$renewal_date"}, 1]},
+                    ]},
+                    "duration": "$duration",
+                    "category": "$category",
+                    "type": "$type",
+                },
+                "price": {"$sum": "$price"},
+                "count": {"$sum": 1},
+            }},
+        ]
+        groups = await subs_collection.aggregate(pipeline).to_list(None)
+        return [{**group['_id'], "price": group['price'], "count": group['count']} for group in groups]
+
+
+class MongoRevocationRepository(RevocationRepository):
+    """revoked_tokens collection; a TTL index on expires_at removes expired entries"""
+
+    async def save(self, key: str, doc: dict):
+        revoked_tokens = await get_revoked_tokens_collection()
+        await revoked_tokens.update_one({"_id": key}, {"$set": doc}, upsert=True)
+
+    async def find_live(self, now: datetime) -> List[dict]:
+        revoked_tokens = await get_revoked_tokens_collection()
+        return await revoked_tokens.find({"expires_at": {"$gt": now}}, {"_id": 0}).to_list(None)
+
+    async def find_revoked_since(self, since: datetime) -> List[dict]:
+        revoked_tokens = await get_revoked_tokens_collection()
+        return await revoked_tokens.find({"revoked_at": {"$gte": since}}, {"_id": 0}).to_list(None)
+
+
+class MongoLockRepository(LockRepository):
+    """
+    locks collection, shared by every worker
+
+    Acquiring is a single upsert that only matches an expired lock or one
+    already owned by the caller, so when several workers race, the losers hit
+    the _id unique index and back off.
+    """
+
+    async def acquire(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        locks_collection = await get_locks_collection()
+        try:
+            await locks_collection.update_one(
+                {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {
+                    "owner": owner,
+                    "acquired_at": now,
+                    "heartbeat_at": now,
+                    "expires_at": expires_at,
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def renew(self, name: str, owner: str, now: datetime, expires_at: datetime) -> bool:
+        locks_collection = await get_locks_collection()
+        result = await locks_collection.update_one(
+            {"_id": name, "owner": owner},
+            {"$set": {"heartbeat_at": now, "expires_at": expires_at}}
+        )
+        return result.matched_count == 1
+
+    async def release(self, name: str, owner: str):
+        locks_collection = await get_locks_collection()
+        await locks_collection.delete_one({"_id": name, "owner": owner})
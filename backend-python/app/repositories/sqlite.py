@@ -0,0 +1,708 @@
+"""SQLite Repositories
+
+Stores users, subscriptions and token revocations in a single SQLite file
+(SQLITE_PATH), for small single-node installs. Uses the standard library
+sqlite3 module on one dedicated thread, so calls never block the event loop
+and every operation runs in its own transaction, one at a time. The file is
+opened in exclusive locking mode, so a second process opening it fails: run a
+single worker process per file.
+
+Each row holds the full document as JSON plus the fields that are filtered,
+sorted or aggregated on as indexed columns. Timestamps are stored as
+fixed-width UTC text, so text order is time order. Prefix search uses a
+(term, subscription) table; text search uses an FTS5 table with the
+SUBSCRIPTION_TEXT_INDEX_WEIGHTS weights for bm25 ranking.
+"""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.core.storage import SUBSCRIPTION_DATE_FIELDS, SUBSCRIPTION_TIMESTAMP_FIELDS, USER_TIMESTAMP_FIELDS
+from app.repositories.base import (
+    FILTER_FIELDS,
+    GENERATION_COUNTER,
+    DuplicateEntryError,
+    Fields,
+    InsertManyResult,
+    UpdateResult,
+    UserRepository,
+    SubscriptionRepository,
+    RevocationRepository,
+    add_months,
+    filter_values,
+    project,
+    renewal_range,
+)
+from app.schemas.subscription import BulkSelection, DashboardStats, MonthlyRevenue, SubscriptionFilters
+from app.utils.constants import SUBSCRIPTION_TEXT_INDEX_WEIGHTS
+from app.utils.helpers import calculate_subscription_status
+
+TEXT_FIELDS = list(SUBSCRIPTION_TEXT_INDEX_WEIGHTS)
+TERM_MAX = "\U0010ffff"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    role TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_role ON users (role);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id TEXT PRIMARY KEY,
+    renewal_date TEXT NOT NULL,
+    paid_date TEXT,
+    status TEXT,
+    category TEXT,
+    type TEXT,
+    duration TEXT,
+    created_by TEXT,
+    price REAL,
+    version INTEGER NOT NULL,
+    updated_at TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS subscriptions_renewal_date_id ON subscriptions (renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_status_renewal_date_id ON subscriptions (status, renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_category_renewal_date_id ON subscriptions (category, renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_created_by_renewal_date_id ON subscriptions (created_by, renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_type_renewal_date_id ON subscriptions (type, renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_duration_renewal_date_id ON subscriptions (duration, renewal_date, id);
+CREATE INDEX IF NOT EXISTS subscriptions_updated_at ON subscriptions (updated_at);
+
+CREATE TABLE IF NOT EXISTS subscription_terms (
+    term TEXT NOT NULL,
+    subscription_id TEXT NOT NULL,
+    PRIMARY KEY (term, subscription_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS subscription_terms_subscription_id ON subscription_terms (subscription_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS subscriptions_fts USING fts5(
+    {", ".join(TEXT_FIELDS)},
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    key TEXT PRIMARY KEY,
+    revoked_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revoked_tokens_revoked_at ON revoked_tokens (revoked_at);
+CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at ON revoked_tokens (expires_at);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+SUBSCRIPTION_COLUMNS = ("renewal_date", "paid_date", *FILTER_FIELDS, "price", "version", "updated_at")
+QUOTED_COLUMNS = [f'"{column}"' for column in SUBSCRIPTION_COLUMNS]
+
+
+def to_text(value: Any) -> Any:
+    """Stored datetime as fixed-width UTC text"""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return value
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return to_text(value)
+    raise TypeError
+
+
+def dump_document(doc: dict) -> str:
+    return orjson.dumps({key: value for key, value in doc.items() if key != "_id"}, default=_default).decode()
+
+
+def load_document(data: str, datetime_fields: Sequence[str]) -> dict:
+    doc = orjson.loads(data)
+    for field in datetime_fields:
+        if isinstance(doc.get(field), str):
+            try:
+                doc[field] = datetime.fromisoformat(doc[field])
+            except ValueError:
+                pass
+    return doc
+
+
+SUBSCRIPTION_DATETIME_FIELDS = (*SUBSCRIPTION_DATE_FIELDS, *SUBSCRIPTION_TIMESTAMP_FIELDS)
+
+
+def load_subscription(data: str) -> dict:
+    return load_document(data, SUBSCRIPTION_DATETIME_FIELDS)
+
+
+def load_user(data: str) -> dict:
+    return load_document(data, USER_TIMESTAMP_FIELDS)
+
+
+def load_revocation(data: str) -> dict:
+    return load_document(data, ("revoked_at", "expires_at"))
+
+
+class SQLiteDatabase:
+    """One SQLite connection, used from a single dedicated thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            # Held until the connection closes, so other processes cannot open the file
+            connection.execute("PRAGMA locking_mode=EXCLUSIVE")
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            connection.close()
+            raise RuntimeError(
+                f"Cannot open SQLite database {self.path} ({e}); "
+                "it may be in use by another process, and the sqlite backend runs a single worker"
+            ) from e
+        self._connection = connection
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+            await self.run(lambda connection: None, transaction=False)
+
+    async def close(self):
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+            self._executor.shutdown()
+            self._executor = None
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _call(self, func: Callable[[sqlite3.Connection], Any], transaction: bool) -> Any:
+        if self._connection is None:
+            self._connect()
+        if not transaction:
+            return func(self._connection)
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(self._connection)
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        return result
+
+    async def run(self, func: Callable[[sqlite3.Connection], Any], transaction: bool = True) -> Any:
+        """Run func(connection) on the database thread, in a transaction unless told otherwise"""
+        if self._executor is None:
+            raise RuntimeError("SQLite database not opened. Call open_repositories() first.")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, func, transaction)
+
+
+# ============ Users ============
+
+class SQLiteUserRepository(UserRepository):
+    """users table"""
+
+    def __init__(self, database: SQLiteDatabase):
+        self._db = database
+
+    async def open(self):
+        await self._db.open()
+
+    async def close(self):
+        await self._db.close()
+
+    async def insert(self, doc: dict):
+        def insert(connection: sqlite3.Connection):
+            connection.execute(
+                "INSERT INTO users (id, email, role, doc) VALUES (?, ?, ?, ?)",
+                (doc['id'], doc['email'], doc['role'], dump_document(doc))
+            )
+        try:
+            await self._db.run(insert)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def _find_one(self, column: str, value: str) -> Optional[dict]:
+        row = await self._db.run(
+            lambda connection: connection.execute(f"SELECT doc FROM users WHERE {column} = ?", (value,)).fetchone(),
+            transaction=False
+        )
+        return load_user(row[0]) if row else None
+
+    async def find_by_id(self, user_id: str) -> Optional[dict]:
+        return await self._find_one("id", user_id)
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return await self._find_one("email", email)
+
+    async def find_by_role(self, role: str, limit: int) -> List[dict]:
+        rows = await self._db.run(
+            lambda connection: connection.execute(
+                "SELECT doc FROM users WHERE role = ? ORDER BY rowid LIMIT ?", (role, limit)
+            ).fetchall(),
+            transaction=False
+        )
+        return [load_user(row[0]) for row in rows]
+
+    async def update(self, user_id: str, fields: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        def update(connection: sqlite3.Connection) -> Optional[dict]:
+            row = connection.execute("SELECT doc FROM users WHERE id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            doc = load_user(row[0])
+            if expected_version is not None and doc.get('version', 1) != expected_version:
+                return None
+            doc.update(fields)
+            doc['version'] = doc.get('version', 1) + 1
+            connection.execute(
+                "UPDATE users SET email = ?, role = ?, doc = ? WHERE id = ?",
+                (doc['email'], doc['role'], dump_document(doc), user_id)
+            )
+            return doc
+        try:
+            return await self._db.run(update)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def delete(self, user_id: str) -> bool:
+        deleted = await self._db.run(
+            lambda connection: connection.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount
+        )
+        return deleted > 0
+
+
+# ============ Subscriptions ============
+
+def _where(
+    filters: Optional[SubscriptionFilters],
+    ids: Optional[List[str]] = None,
+    after: Optional[Tuple[datetime, str]] = None
+) -> Tuple[str, list]:
+    """WHERE clause (possibly empty) and parameters for filters, an id list and a keyset position"""
+    clauses = []
+    params: list = []
+    for field, value in filter_values(filters).items():
+        clauses.append(f'"{field}" = ?')
+        params.append(value)
+    start, end = renewal_range(filters)
+    if start is not None:
+        clauses.append("renewal_date >= ?")
+        params.append(to_text(start))
+    if end is not None:
+        clauses.append("renewal_date <= ?")
+        params.append(to_text(end))
+    if ids is not None:
+        clauses.append("id IN (SELECT value FROM json_each(?))")
+        params.append(orjson.dumps(ids).decode())
+    if after is not None:
+        clauses.append("(renewal_date, id) > (?, ?)")
+        params.extend((to_text(after[0]), after[1]))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _selection_where(selection: BulkSelection) -> Tuple[str, list]:
+    return _where(selection.filters, selection.ids)
+
+
+def _row_values(doc: dict) -> tuple:
+    return tuple(to_text(doc.get(column)) for column in SUBSCRIPTION_COLUMNS)
+
+
+def _index_search(connection: sqlite3.Connection, rowid: int, doc: dict):
+    connection.executemany(
+        "INSERT OR IGNORE INTO subscription_terms (term, subscription_id) VALUES (?, ?)",
+        [(term, doc['id']) for term in doc.get('search_terms', ())]
+    )
+    connection.execute(
+        f"INSERT INTO subscriptions_fts (rowid, {', '.join(TEXT_FIELDS)}) VALUES (?{', ?' * len(TEXT_FIELDS)})",
+        (rowid, *(doc.get(field) for field in TEXT_FIELDS))
+    )
+
+
+def _unindex_search(connection: sqlite3.Connection, rowid: int, subscription_id: str):
+    connection.execute("DELETE FROM subscription_terms WHERE subscription_id = ?", (subscription_id,))
+    connection.execute("DELETE FROM subscriptions_fts WHERE rowid = ?", (rowid,))
+
+
+def _insert_subscription(connection: sqlite3.Connection, doc: dict):
+    cursor = connection.execute(
+        f"INSERT INTO subscriptions (id, {', '.join(QUOTED_COLUMNS)}, doc) "
+        f"VALUES (?{', ?' * len(SUBSCRIPTION_COLUMNS)}, ?)",
+        (doc['id'], *_row_values(doc), dump_document(doc))
+    )
+    _index_search(connection, cursor.lastrowid, doc)
+
+
+def _rewrite_subscription(connection: sqlite3.Connection, rowid: int, doc: dict, fields: dict) -> dict:
+    """Merge fields into a stored document, bump its version and write it back"""
+    updated = {**doc, **fields, "version": doc.get('version', 1) + 1}
+    connection.execute(
+        f"UPDATE subscriptions SET {', '.join(f'{column} = ?' for column in QUOTED_COLUMNS)}, doc = ? "
+        "WHERE rowid = ?",
+        (*_row_values(updated), dump_document(updated), rowid)
+    )
+    if any(updated.get(field) != doc.get(field) for field in ("search_terms", *TEXT_FIELDS)):
+        _unindex_search(connection, rowid, doc['id'])
+        _index_search(connection, rowid, updated)
+    return updated
+
+
+def _select_rows(connection: sqlite3.Connection, where: str, params: list) -> List[Tuple[int, dict]]:
+    rows = connection.execute(f"SELECT rowid, doc FROM subscriptions{where}", params).fetchall()
+    return [(rowid, load_subscription(data)) for rowid, data in rows]
+
+
+class SQLiteSubscriptionRepository(SubscriptionRepository):
+    """subscriptions table with its search tables"""
+
+    def __init__(self, database: SQLiteDatabase):
+        self._db = database
+
+    async def open(self):
+        await self._db.open()
+
+    async def close(self):
+        await self._db.close()
+
+    async def _read(self, sql: str, params: Sequence[Any], fields: Fields) -> List[dict]:
+        rows = await self._db.run(lambda connection: connection.execute(sql, params).fetchall(), transaction=False)
+        return [project(load_subscription(row[0]), fields) for row in rows]
+
+    # ============ Reads ============
+
+    async def find_by_id(self, subscription_id: str, fields: Fields = None) -> Optional[dict]:
+        docs = await self._read("SELECT doc FROM subscriptions WHERE id = ?", (subscription_id,), fields)
+        return docs[0] if docs else None
+
+    async def find_page(
+        self,
+        filters: Optional[SubscriptionFilters],
+        after: Optional[Tuple[datetime, str]],
+        limit: int,
+        fields: Fields = None
+    ) -> List[dict]:
+        where, params = _where(filters, after=after)
+        return await self._read(
+            f"SELECT doc FROM subscriptions{where} ORDER BY renewal_date, id LIMIT ?", (*params, limit), fields
+        )
+
+    async def stream(
+        self,
+        filters: Optional[SubscriptionFilters],
+        fields: Fields = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[dict]:
+        # Keyset batches, so no read transaction stays open between them
+        after = None
+        while True:
+            where, params = _where(filters, after=after)
+            rows = await self._db.run(
+                lambda connection: connection.execute(
+                    f"SELECT renewal_date, id, doc FROM subscriptions{where} ORDER BY renewal_date, id LIMIT ?",
+                    (*params, batch_size)
+                ).fetchall(),
+                transaction=False
+            )
+            for _, _, data in rows:
+                yield project(load_subscription(data), fields)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0], rows[-1][1]
+
+    async def search_prefix(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        # Most terms matched exactly first (a term is its own closest completion),
+        # then the closest completion of each term in turn, then id
+        matched = "".join(
+            " JOIN (SELECT subscription_id, MIN(term) AS completion FROM subscription_terms "
+            f"WHERE term >= ? AND term < ? GROUP BY subscription_id) m{i} ON m{i}.subscription_id = s.id"
+            for i in range(len(terms))
+        )
+        exact = " + ".join(f"(m{i}.completion = ?)" for i in range(len(terms)))
+        completions = ", ".join(f"m{i}.completion" for i in range(len(terms)))
+        params = []
+        for term in terms:
+            params.extend((term, term + TERM_MAX))
+        return await self._read(
+            f"SELECT s.doc FROM subscriptions s{matched} "
+            f"ORDER BY {exact} DESC, {completions}, s.id LIMIT ? OFFSET ?",
+            (*params, *terms, limit, offset),
+            fields
+        )
+
+    async def search_text(self, terms: List[str], offset: int, limit: int, fields: Fields = None) -> List[dict]:
+        # Terms are letters and digits only, so quoting each one is enough
+        match = " OR ".join(f'"{term}"' for term in terms)
+        weights = ", ".join(str(weight) for weight in SUBSCRIPTION_TEXT_INDEX_WEIGHTS.values())
+        return await self._read(
+            "SELECT s.doc FROM subscriptions_fts f JOIN subscriptions s ON s.rowid = f.rowid "
+            f"WHERE subscriptions_fts MATCH ? ORDER BY bm25(subscriptions_fts, {weights}), s.id LIMIT ? OFFSET ?",
+            (match, limit, offset),
+            fields
+        )
+
+    async def find_updated_since(self, after: datetime, limit: int) -> List[dict]:
+        return await self._read(
+            "SELECT doc FROM subscriptions WHERE updated_at > ? ORDER BY updated_at LIMIT ?",
+            (to_text(after), limit),
+            None
+        )
+
+    async def last_updated_at(self) -> Optional[datetime]:
+        row = await self._db.run(
+            lambda connection: connection.execute("SELECT MAX(updated_at) FROM subscriptions").fetchone(),
+            transaction=False
+        )
+        return datetime.fromisoformat(row[0]) if row[0] else None
+
+    async def count(self) -> int:
+        row = await self._db.run(
+            lambda connection: connection.execute("SELECT COUNT(*) FROM subscriptions").fetchone(),
+            transaction=False
+        )
+        return row[0]
+
+    async def generation(self) -> int:
+        row = await self._db.run(
+            lambda connection: connection.execute(
+                "SELECT value FROM counters WHERE name = ?", (GENERATION_COUNTER,)
+            ).fetchone(),
+            transaction=False
+        )
+        return row[0] if row else 0
+
+    async def bump_generation(self):
+        await self._db.run(lambda connection: connection.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1",
+            (GENERATION_COUNTER,)
+        ))
+
+    async def dashboard_stats(self, today: date) -> DashboardStats:
+        today_start = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+        bounds = (
+            to_text(today_start),
+            to_text(today_start),
+            to_text(today_start + timedelta(days=1)),
+            to_text(today_start + timedelta(days=1)),
+            to_text(today_start + timedelta(days=31)),
+        )
+
+        def stats(connection: sqlite3.Connection) -> dict:
+            totals = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(price), 0), "
+                "COALESCE(SUM(renewal_date < ?), 0), "
+                "COALESCE(SUM(renewal_date >= ? AND renewal_date < ?), 0), "
+                "COALESCE(SUM(renewal_date >= ? AND renewal_date < ?), 0) "
+                "FROM subscriptions",
+                bounds
+            ).fetchone()
+            counts = {
+                field: dict(connection.execute(
+                    f'SELECT "{field}", COUNT(*) FROM subscriptions WHERE "{field}" IS NOT NULL GROUP BY "{field}"'
+                ).fetchall())
+                for field in ("category", "type", "status")
+            }
+            paid = connection.execute(
+                "SELECT substr(paid_date, 1, 7) AS month, SUM(price), COUNT(*) FROM subscriptions "
+                "WHERE paid_date IS NOT NULL GROUP BY month ORDER BY month"
+            ).fetchall()
+            renewals = connection.execute(
+                "SELECT substr(renewal_date, 1, 7) AS month, SUM(price), COUNT(*) FROM subscriptions "
+                "WHERE renewal_date >= ? GROUP BY month ORDER BY month",
+                (to_text(today_start),)
+            ).fetchall()
+            return {"totals": totals, "counts": counts, "paid": paid, "renewals": renewals}
+
+        result = await self._db.run(stats, transaction=False)
+        total, revenue, expired, due_today, upcoming = result['totals']
+
+        def months(rows: list) -> List[MonthlyRevenue]:
+            return [MonthlyRevenue(month=month, revenue=price or 0, subscriptions=count) for month, price, count in rows]
+
+        return DashboardStats(
+            total_subscriptions=total,
+            upcoming_renewals=upcoming,
+            renewals_due_today=due_today,
+            expired_subscriptions=expired,
+            by_category=result['counts']['category'],
+            by_type=result['counts']['type'],
+            by_status=result['counts']['status'],
+            total_revenue=revenue,
+            revenue_by_month=months(result['paid']),
+            renewal_revenue_by_month=months(result['renewals'])
+        )
+
+    async def renewal_groups(self, start: datetime, end: datetime) -> List[dict]:
+        rows = await self._db.run(
+            lambda connection: connection.execute(
+                "SELECT CAST(substr(renewal_date, 1, 4) AS INTEGER) * 12 + CAST(substr(renewal_date, 6, 2) AS INTEGER) - 1 "
+                "AS month, duration, category, type, SUM(price), COUNT(*) FROM subscriptions "
+                "WHERE renewal_date >= ? AND renewal_date < ? GROUP BY month, duration, category, type",
+                (to_text(start), to_text(end))
+            ).fetchall(),
+            transaction=False
+        )
+        return [
+            {"month": month, "duration": duration, "category": category, "type": sub_type, "price": price, "count": count}
+            for month, duration, category, sub_type, price, count in rows
+        ]
+
+    # ============ Writes ============
+
+    async def insert(self, doc: dict):
+        try:
+            await self._db.run(lambda connection: _insert_subscription(connection, doc))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateEntryError(str(e)) from e
+
+    async def insert_many(self, docs: List[dict]) -> InsertManyResult:
+        def insert_many(connection: sqlite3.Connection) -> InsertManyResult:
+            inserted = 0
+            errors = []
+            for index, doc in enumerate(docs):
+                try:
+                    _insert_subscription(connection, doc)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    errors.append((index, str(e)))
+            return InsertManyResult(inserted, errors)
+        return await self._db.run(insert_many)
+
+    async def update(
+        self,
+        subscription_id: str,
+        fields: dict,
+        expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        def update(connection: sqlite3.Connection) -> Optional[dict]:
+            rows = _select_rows(connection, " WHERE id = ?", [subscription_id])
+            if not rows:
+                return None
+            rowid, doc = rows[0]
+            if expected_version is not None and doc.get('version', 1) != expected_version:
+                return None
+            return _rewrite_subscription(connection, rowid, doc, fields)
+        return await self._db.run(update)
+
+    async def delete(self, subscription_id: str) -> bool:
+        return await self.delete_selection(BulkSelection(ids=[subscription_id])) > 0
+
+    async def update_selection(self, selection: BulkSelection, fields: dict) -> UpdateResult:
+        return await self.update_selection_each(selection, (), lambda doc: fields)
+
+    async def update_selection_each(
+        self,
+        selection: BulkSelection,
+        read_fields: Sequence[str],
+        build: Callable[[dict], dict]
+    ) -> UpdateResult:
+        where, params = _selection_where(selection)
+
+        def update(connection: sqlite3.Connection) -> UpdateResult:
+            rows = _select_rows(connection, where, params)
+            for rowid, doc in rows:
+                _rewrite_subscription(connection, rowid, doc, build(project(doc, read_fields)))
+            return UpdateResult(len(rows), len(rows))
+        return await self._db.run(update)
+
+    async def renew_selection(
+        self,
+        selection: BulkSelection,
+        months_by_duration: Dict[str, int],
+        paid_date: datetime,
+        now: datetime
+    ) -> UpdateResult:
+        where, params = _selection_where(selection)
+        where += (" AND " if where else " WHERE ") + "duration IN (SELECT value FROM json_each(?))"
+        params.append(orjson.dumps(list(months_by_duration)).decode())
+
+        def renew(connection: sqlite3.Connection) -> UpdateResult:
+            rows = _select_rows(connection, where, params)
+            for rowid, doc in rows:
+                renewal_date = add_months(doc['renewal_date'], months_by_duration[doc['duration']])
+                _rewrite_subscription(connection, rowid, doc, {
+                    "renewal_date": renewal_date,
+                    "paid_date": paid_date,
+                    "updated_at": now,
+                    "status": calculate_subscription_status(renewal_date),
+                })
+            return UpdateResult(len(rows), len(rows))
+        return await self._db.run(renew)
+
+    async def delete_selection(self, selection: BulkSelection) -> int:
+        where, params = _selection_where(selection)
+
+        def delete(connection: sqlite3.Connection) -> int:
+            rows = connection.execute(f"SELECT rowid, id FROM subscriptions{where}", params).fetchall()
+            for rowid, subscription_id in rows:
+                _unindex_search(connection, rowid, subscription_id)
+                connection.execute("DELETE FROM subscriptions WHERE rowid = ?", (rowid,))
+            return len(rows)
+        return await self._db.run(delete)
+
+    async def set_status(self, status: str, start: Optional[datetime], end: Optional[datetime]) -> int:
+        clauses = ["status IS NOT ?"]
+        params: list = [status]
+        if start is not None:
+            clauses.append("renewal_date >= ?")
+            params.append(to_text(start))
+        if end is not None:
+            clauses.append("renewal_date <= ?")
+            params.append(to_text(end))
+        # Status is not searchable, so the row and its JSON are updated in place
+        return await self._db.run(lambda connection: connection.execute(
+            f"UPDATE subscriptions SET status = ?, doc = json_set(doc, '$.status', ?) WHERE {' AND '.join(clauses)}",
+            (status, status, *params)
+        ).rowcount)
+
+
+# ============ Revocations ============
+
+class SQLiteRevocationRepository(RevocationRepository):
+    """revoked_tokens table; expired entries are deleted as new ones are saved"""
+
+    def __init__(self, database: SQLiteDatabase):
+        self._db = database
+
+    async def open(self):
+        await self._db.open()
+
+    async def close(self):
+        await self._db.close()
+
+    async def save(self, key: str, doc: dict):
+        def save(connection: sqlite3.Connection):
+            connection.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (to_text(datetime.now(timezone.utc)),))
+            connection.execute(
+                "INSERT OR REPLACE INTO revoked_tokens (key, revoked_at, expires_at, doc) VALUES (?, ?, ?, ?)",
+                (key, to_text(doc['revoked_at']), to_text(doc['expires_at']), dump_document(doc))
+            )
+        await self._db.run(save)
+
+    async def _find(self, where: str, value: datetime) -> List[dict]:
+        rows = await self._db.run(
+            lambda connection: connection.execute(f"SELECT doc FROM revoked_tokens WHERE {where}", (to_text(value),)).fetchall(),
+            transaction=False
+        )
+        return [load_revocation(row[0]) for row in rows]
+
+    async def find_live(self, now: datetime) -> List[dict]:
+        return await self._find("expires_at > ?", now)
+
+    async def find_revoked_since(self, since: datetime) -> List[dict]:
+        return await self._find("revoked_at >= ?", since)
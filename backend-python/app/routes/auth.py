@@ -1,9 +1,11 @@
 """Authentication Routes"""
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from app.schemas.user import User, UserCreate, UserUpdate, LoginRequest, LoginResponse
 from app.services.user_service import UserService
-from app.core.security import create_access_token, get_current_user, get_admin_user
+from app.core.security import create_access_token, get_current_user, get_current_token_claims, get_admin_user
+from app.core.revocation import revocation_list
+from app.core.rate_limit import login_throttle, client_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -21,18 +23,44 @@ async def register(user_data: UserCreate, current_user: User = Depends(get_admin
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest):
+async def login(login_data: LoginRequest, request: Request):
     """
     Login endpoint - Authenticate user with email and password
     
     - **login_data**: Email and password credentials
+    
+    Attempts are limited per email and per client IP; over the limit the
+    request is rejected with 429 and Retry-After before the password is checked.
     """
+    await login_throttle.check(login_data.email, client_ip(request))
     user = await UserService.authenticate_user(login_data.email, login_data.password)
     access_token = create_access_token(data={"sub": user.id})
     
     return LoginResponse(access_token=access_token, user=user)
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(claims: dict = Depends(get_current_token_claims)):
+    """
+    Logout - Revoke the access token used for this request
+    
+    Tokens issued before revocation support carry no jti; for those all of
+    the user's sessions are revoked instead.
+    """
+    if claims.get("jti"):
+        await revocation_list.revoke_token(claims)
+    else:
+        await revocation_list.revoke_user(claims["sub"])
+    return None
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(current_user: User = Depends(get_current_user)):
+    """Logout everywhere - Revoke every access token issued to the current user, including this one"""
+    await UserService.revoke_sessions(current_user.id)
+    return None
+
+
 @router.get("/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user)):
     """Get current authenticated user information"""
@@ -40,11 +68,18 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.put("/me", response_model=User)
-async def update_me(update_data: UserUpdate, current_user: User = Depends(get_current_user)):
+async def update_me(
+    update_data: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    claims: dict = Depends(get_current_token_claims)
+):
     """
     Update current user information
     
     - **update_data**: Fields to update (name, phone, password)
+    
+    Changing the password signs out every other session; the token used for
+    this request stays valid.
     """
-    user = await UserService.update_user(current_user.id, update_data)
+    user = await UserService.update_user(current_user.id, update_data, keep_token=claims.get("jti"))
     return user
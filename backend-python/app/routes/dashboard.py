@@ -1,16 +1,19 @@
 """Dashboard Routes"""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from app.schemas.user import User
-from app.schemas.subscription import DashboardStats
+from app.schemas.subscription import DashboardStats, RenewalForecast
 from app.services.subscription_service import SubscriptionService
+from app.services.analytics_service import AnalyticsService
 from app.core.security import get_admin_user
+from app.core.cache import cached_json_response, subscriptions_generation
+from app.utils.constants import FORECAST_MONTHS, MAX_FORECAST_MONTHS
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(current_user: User = Depends(get_admin_user)):
+async def get_dashboard_stats(request: Request, current_user: User = Depends(get_admin_user)):
     """
     Get dashboard statistics (Admin only)
     
@@ -19,6 +22,38 @@ async def get_dashboard_stats(current_user: User = Depends(get_admin_user)):
     - upcoming_renewals: Renewals in next 30 days
     - renewals_due_today: Renewals due today
     - expired_subscriptions: Expired subscriptions
+    - by_category, by_type, by_status: Subscription counts per group
+    - total_revenue: Sum of all subscription prices
+    - revenue_by_month: Revenue grouped by paid month
+    - renewal_revenue_by_month: Expected renewal revenue grouped by renewal month
+    
+    Responses carry an ETag; send it back in If-None-Match to get 304 while nothing changed.
+    """
+    return await cached_json_response(request, subscriptions_generation, SubscriptionService.get_dashboard_stats)
+
+
+@router.get("/forecast", response_model=RenewalForecast)
+async def get_renewal_forecast(
+    request: Request,
+    months: int = Query(FORECAST_MONTHS, ge=1, le=MAX_FORECAST_MONTHS),
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Get projected renewal revenue per month (Admin only)
+    
+    Recurring subscriptions are projected forward by their duration, starting
+    from the current month.
+    
+    - **months**: Number of months to forecast
+    
+    Returns:
+    - months: Revenue and renewal count per month, with revenue by category and type
+    - total_revenue: Projected revenue over the whole horizon
+    
+    Responses carry an ETag; send it back in If-None-Match to get 304 while nothing changed.
     """
-    stats = await SubscriptionService.get_dashboard_stats()
-    return stats
+    return await cached_json_response(
+        request,
+        subscriptions_generation,
+        lambda: AnalyticsService.get_renewal_forecast(months)
+    )
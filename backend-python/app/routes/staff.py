@@ -1,10 +1,11 @@
 """Staff Management Routes"""
 
-from typing import List
-from fastapi import APIRouter, Depends, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Response, status
 from app.schemas.user import User, UserUpdate
 from app.services.user_service import UserService
 from app.core.security import get_current_user, get_admin_user
+from app.utils.helpers import format_etag
 
 router = APIRouter(prefix="/staff", tags=["Staff Management"])
 
@@ -19,10 +20,12 @@ async def get_staff(current_user: User = Depends(get_admin_user)):
 
 
 @router.get("/{staff_id}", response_model=User)
-async def get_staff_by_id(staff_id: str, current_user: User = Depends(get_admin_user)):
+async def get_staff_by_id(staff_id: str, response: Response, current_user: User = Depends(get_admin_user)):
     """
     Get specific staff member by ID (Admin only)
     
+    The ETag header carries the user version for use with If-Match on update.
+    
     - **staff_id**: Staff member ID
     """
     staff = await UserService.get_user_by_id(staff_id)
@@ -30,21 +33,41 @@ async def get_staff_by_id(staff_id: str, current_user: User = Depends(get_admin_
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Staff not found")
     
+    response.headers["ETag"] = format_etag(staff.version)
     return staff
 
 
 @router.put("/{staff_id}", response_model=User)
-async def update_staff(staff_id: str, update_data: UserUpdate, current_user: User = Depends(get_admin_user)):
+async def update_staff(
+    staff_id: str,
+    update_data: UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_admin_user)
+):
     """
     Update staff member information (Admin only)
     
     - **staff_id**: Staff member ID
     - **update_data**: Fields to update
+    - **If-Match**: Optional ETag from a previous read; returns 412 if the user changed since
     """
-    staff = await UserService.update_user(staff_id, update_data)
+    staff = await UserService.update_user(staff_id, update_data, if_match)
+    response.headers["ETag"] = format_etag(staff.version)
     return staff
 
 
+@router.post("/{staff_id}/revoke-sessions", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_staff_sessions(staff_id: str, current_user: User = Depends(get_admin_user)):
+    """
+    Sign a staff member out everywhere by revoking all their access tokens (Admin only)
+    
+    - **staff_id**: Staff member ID
+    """
+    await UserService.revoke_sessions(staff_id)
+    return None
+
+
 @router.delete("/{staff_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_staff(staff_id: str, current_user: User = Depends(get_admin_user)):
     """
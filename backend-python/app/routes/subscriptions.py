@@ -1,15 +1,61 @@
 """Subscription Routes"""
 
-from typing import List
-from fastapi import APIRouter, Depends, status
+from datetime import date
+from typing import Literal, Optional
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from app.schemas.user import User
-from app.schemas.subscription import Subscription, SubscriptionCreate, SubscriptionUpdate
+from app.schemas.subscription import (
+    Subscription,
+    SubscriptionCreate,
+    SubscriptionUpdate,
+    SubscriptionFilters,
+    SubscriptionPage,
+    SubscriptionSearchPage,
+    BulkSelection,
+    BulkUpdateRequest,
+    BulkUpdateResult,
+    BulkDeleteResult,
+    BulkImportResult,
+)
 from app.services.subscription_service import SubscriptionService
-from app.core.security import get_current_user, get_admin_user
+from app.core.security import get_current_user, get_admin_user, get_current_user_or_query_token
+from app.core.events import subscription_events
+from app.core.cache import cached_json_response, subscriptions_generation
+from app.utils.constants import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    DEFAULT_SEARCH_PAGE_SIZE,
+    MAX_SEARCH_PAGE_SIZE,
+)
+from app.utils.helpers import format_etag
+from app.utils.streams import iter_json_array_rows, iter_ndjson_rows, iter_csv_rows
 
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
 
 
+def get_subscription_filters(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    category: Optional[str] = None,
+    type_filter: Optional[str] = Query(None, alias="type"),
+    duration: Optional[str] = None,
+    created_by: Optional[str] = None,
+    renewal_from: Optional[date] = None,
+    renewal_to: Optional[date] = None,
+) -> SubscriptionFilters:
+    """Collect subscription filters from query parameters"""
+    return SubscriptionFilters(
+        status=status_filter,
+        category=category,
+        type=type_filter,
+        duration=duration,
+        created_by=created_by,
+        renewal_from=renewal_from,
+        renewal_to=renewal_to
+    )
+
+
 @router.post("", response_model=Subscription, status_code=status.HTTP_201_CREATED)
 async def create_subscription(sub_data: SubscriptionCreate, current_user: User = Depends(get_admin_user)):
     """
@@ -21,23 +67,182 @@ async def create_subscription(sub_data: SubscriptionCreate, current_user: User =
     return subscription
 
 
-@router.get("", response_model=List[Subscription])
-async def get_subscriptions(current_user: User = Depends(get_current_user)):
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_subscriptions(request: Request, current_user: User = Depends(get_admin_user)):
+    """
+    Import many subscriptions in one request (Admin only)
+    
+    The body format is chosen by Content-Type:
+    - **application/json**: JSON array of subscription objects
+    - **application/x-ndjson**: One subscription object per line, streamed
+    - **text/csv**: Header line with field names, one subscription per line, streamed
+    
+    Valid rows are inserted even when others fail; per-row errors are returned.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    
+    if content_type == "text/csv":
+        rows = iter_csv_rows(request.stream())
+    elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        rows = iter_ndjson_rows(request.stream())
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array")
+        rows = iter_json_array_rows(items)
+    
+    result = await SubscriptionService.bulk_import(rows, current_user.id)
+    return result
+
+
+@router.post("/bulk/update", response_model=BulkUpdateResult)
+async def bulk_update_subscriptions(request: BulkUpdateRequest, current_user: User = Depends(get_admin_user)):
+    """
+    Apply the same patch to many subscriptions (Admin only)
+    
+    - **ids**: Subscription IDs to update
+    - **filters**: List filters selecting subscriptions to update
+    - **patch**: Fields to update
+    """
+    result = await SubscriptionService.bulk_update(request, request.patch)
+    return result
+
+
+@router.post("/bulk/renew", response_model=BulkUpdateResult)
+async def bulk_renew_subscriptions(selection: BulkSelection, current_user: User = Depends(get_admin_user)):
     """
-    Get all subscriptions (Admin and Staff)
+    Renew many subscriptions (Admin only)
+    
+    Moves each renewal date forward by the subscription's duration, sets the paid
+    date to today and recomputes status.
+    
+    - **ids**: Subscription IDs to renew
+    - **filters**: List filters selecting subscriptions to renew
     """
-    subscriptions = await SubscriptionService.get_subscriptions()
-    return subscriptions
+    result = await SubscriptionService.bulk_renew(selection)
+    return result
+
+
+@router.post("/bulk/delete", response_model=BulkDeleteResult)
+async def bulk_delete_subscriptions(selection: BulkSelection, current_user: User = Depends(get_admin_user)):
+    """
+    Delete many subscriptions (Admin only)
+    
+    - **ids**: Subscription IDs to delete
+    - **filters**: List filters selecting subscriptions to delete
+    """
+    result = await SubscriptionService.bulk_delete(selection)
+    return result
+
+
+@router.get("", response_model=SubscriptionPage)
+async def get_subscriptions(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filters: SubscriptionFilters = Depends(get_subscription_filters),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a page of subscriptions ordered by renewal date (Admin and Staff)
+    
+    - **cursor**: `next_cursor` from the previous page
+    - **limit**: Page size
+    - **status, category, type, duration, created_by**: Exact-match filters
+    - **renewal_from, renewal_to**: Inclusive renewal date range (YYYY-MM-DD)
+    
+    Responses carry an ETag; send it back in If-None-Match to get 304 while nothing changed.
+    """
+    return await cached_json_response(
+        request,
+        subscriptions_generation,
+        lambda: SubscriptionService.get_subscriptions_json(filters, cursor, limit)
+    )
+
+
+@router.get("/search", response_model=SubscriptionSearchPage)
+async def search_subscriptions(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["auto", "prefix", "text"] = "auto",
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search subscriptions by client name, business name, email and notes (Admin and Staff)
+    
+    - **q**: Search text; case and accents are ignored
+    - **mode**: `prefix` matches the start of name and email words (typeahead),
+      `text` runs a ranked full-text search that also covers notes, `auto` tries
+      prefix first and falls back to text when nothing matches
+    - **limit**: Page size
+    - **offset**: `next_offset` from the previous page
+    """
+    return await SubscriptionService.search_subscriptions(q, mode, limit, offset)
+
+
+@router.get("/export")
+async def export_subscriptions(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    filters: SubscriptionFilters = Depends(get_subscription_filters),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream subscriptions as NDJSON or CSV (Admin and Staff)
+    
+    - **format**: `ndjson` (default) or `csv`
+    - Accepts the same filters as the list endpoint
+    """
+    chunks = await SubscriptionService.export_subscriptions(filters, export_format)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=subscriptions.{export_format}"}
+    )
+
+
+@router.get("/events")
+async def stream_subscription_events(
+    request: Request,
+    current_user: User = Depends(get_current_user_or_query_token)
+):
+    """
+    Live subscription changes as Server-Sent Events (Admin and Staff)
+    
+    - **token**: Access token, for EventSource clients that cannot send an Authorization header
+    
+    Events:
+    - upsert: A subscription was created or changed; data is the subscription
+    - delete: A subscription was deleted; data is `{"id": ...}`
+    - invalidate: Changes could not be sent as deltas; reload the list
+    - dropped: The client fell behind and the stream is closing; reload and reconnect
+    """
+    return StreamingResponse(
+        subscription_events.event_stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{subscription_id}", response_model=Subscription)
-async def get_subscription(subscription_id: str, current_user: User = Depends(get_current_user)):
+async def get_subscription(
+    subscription_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
     """
     Get specific subscription by ID
     
+    The ETag header carries the subscription version for use with If-Match on update.
+    
     - **subscription_id**: Subscription ID
     """
     subscription = await SubscriptionService.get_subscription_by_id(subscription_id)
+    response.headers["ETag"] = format_etag(subscription.version)
     return subscription
 
 
@@ -45,6 +250,8 @@ async def get_subscription(subscription_id: str, current_user: User = Depends(ge
 async def update_subscription(
     subscription_id: str,
     update_data: SubscriptionUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_admin_user)
 ):
     """
@@ -52,8 +259,10 @@ async def update_subscription(
     
     - **subscription_id**: Subscription ID to update
     - **update_data**: Fields to update
+    - **If-Match**: Optional ETag from a previous read; returns 412 if the subscription changed since
     """
-    subscription = await SubscriptionService.update_subscription(subscription_id, update_data)
+    subscription = await SubscriptionService.update_subscription(subscription_id, update_data, if_match)
+    response.headers["ETag"] = format_etag(subscription.version)
     return subscription
 
 
@@ -1,7 +1,24 @@
 """Schemas Package"""
 
 from .user import User, UserCreate, UserUpdate, LoginRequest, LoginResponse
-from .subscription import Subscription, SubscriptionCreate, SubscriptionUpdate, DashboardStats
+from .subscription import (
+    Subscription,
+    SubscriptionCreate,
+    SubscriptionUpdate,
+    SubscriptionFilters,
+    SubscriptionPage,
+    SubscriptionSearchPage,
+    BulkSelection,
+    BulkUpdateRequest,
+    BulkUpdateResult,
+    BulkDeleteResult,
+    BulkRowError,
+    BulkImportResult,
+    MonthlyRevenue,
+    DashboardStats,
+    ForecastMonth,
+    RenewalForecast,
+)
 
 __all__ = [
     "User",
@@ -12,5 +29,17 @@ __all__ = [
     "Subscription",
     "SubscriptionCreate",
     "SubscriptionUpdate",
+    "SubscriptionFilters",
+    "SubscriptionPage",
+    "SubscriptionSearchPage",
+    "BulkSelection",
+    "BulkUpdateRequest",
+    "BulkUpdateResult",
+    "BulkDeleteResult",
+    "BulkRowError",
+    "BulkImportResult",
+    "MonthlyRevenue",
     "DashboardStats",
+    "ForecastMonth",
+    "RenewalForecast",
 ]
@@ -1,8 +1,8 @@
 """Subscription Schemas and Models"""
 
-from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime, timezone
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from datetime import datetime, timezone, date
+from typing import Optional, List, Dict, Literal
 import uuid
 
 
@@ -26,6 +26,14 @@ class Subscription(BaseModel):
     created_by: str  # user id
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1  # incremented on every write, exposed as the ETag
+
+
+def validate_date_string(value: Optional[str]) -> Optional[str]:
+    """Ensure a date string is in YYYY-MM-DD format"""
+    if value is not None:
+        datetime.strptime(value, "%Y-%m-%d")
+    return value
 
 
 class SubscriptionCreate(BaseModel):
@@ -42,6 +50,8 @@ class SubscriptionCreate(BaseModel):
     category: str
     notes: Optional[str] = None
 
+    _validate_dates = field_validator("paid_date", "renewal_date")(validate_date_string)
+
 
 class SubscriptionUpdate(BaseModel):
     """Subscription update schema"""
@@ -57,6 +67,76 @@ class SubscriptionUpdate(BaseModel):
     category: Optional[str] = None
     notes: Optional[str] = None
 
+    _validate_dates = field_validator("paid_date", "renewal_date")(validate_date_string)
+
+
+class SubscriptionFilters(BaseModel):
+    """Subscription list filters"""
+    status: Optional[str] = None
+    category: Optional[str] = None
+    type: Optional[str] = None
+    duration: Optional[str] = None
+    created_by: Optional[str] = None
+    renewal_from: Optional[date] = None  # Inclusive
+    renewal_to: Optional[date] = None  # Inclusive
+
+
+class SubscriptionPage(BaseModel):
+    """Paginated subscription list"""
+    items: List[Subscription]
+    next_cursor: Optional[str] = None  # None when there are no more pages
+    limit: int
+
+
+class SubscriptionSearchPage(BaseModel):
+    """A page of ranked search results"""
+    items: List[Subscription]
+    next_offset: Optional[int] = None  # Offset of the next page, None when there is no next page
+    limit: int
+    mode: Literal["prefix", "text"]  # Pass back as mode when requesting further pages
+
+
+class BulkSelection(BaseModel):
+    """Subscriptions targeted by a bulk operation, by id list and/or filters"""
+    ids: Optional[List[str]] = None
+    filters: Optional[SubscriptionFilters] = None
+
+
+class BulkUpdateRequest(BulkSelection):
+    """Bulk update request"""
+    patch: SubscriptionUpdate
+
+
+class BulkUpdateResult(BaseModel):
+    """Bulk update outcome"""
+    matched: int
+    modified: int
+
+
+class BulkDeleteResult(BaseModel):
+    """Bulk delete outcome"""
+    deleted: int
+
+
+class BulkRowError(BaseModel):
+    """Error for a single row of a bulk operation"""
+    row: int  # 1-based position in the request
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    """Bulk import outcome"""
+    inserted: int
+    failed: int
+    errors: List[BulkRowError] = Field(default_factory=list)  # Capped at BULK_IMPORT_MAX_ERRORS
+
+
+class MonthlyRevenue(BaseModel):
+    """Revenue for a calendar month"""
+    month: str  # YYYY-MM format
+    revenue: float
+    subscriptions: int
+
 
 class DashboardStats(BaseModel):
     """Dashboard statistics model"""
@@ -64,3 +144,24 @@ class DashboardStats(BaseModel):
     upcoming_renewals: int  # Next 30 days
     renewals_due_today: int
     expired_subscriptions: int
+    by_category: Dict[str, int] = Field(default_factory=dict)
+    by_type: Dict[str, int] = Field(default_factory=dict)
+    by_status: Dict[str, int] = Field(default_factory=dict)
+    total_revenue: float = 0.0
+    revenue_by_month: List[MonthlyRevenue] = Field(default_factory=list)  # By paid month
+    renewal_revenue_by_month: List[MonthlyRevenue] = Field(default_factory=list)  # Expected, from today on
+
+
+class ForecastMonth(BaseModel):
+    """Projected renewal revenue for a calendar month"""
+    month: str  # YYYY-MM format
+    revenue: float
+    renewals: int
+    by_category: Dict[str, float] = Field(default_factory=dict)
+    by_type: Dict[str, float] = Field(default_factory=dict)
+
+
+class RenewalForecast(BaseModel):
+    """Renewal revenue forecast, one entry per month of the horizon"""
+    months: List[ForecastMonth]
+    total_revenue: float
@@ -17,6 +17,7 @@ class User(BaseModel):
     role: str  # "admin" or "staff"
     access_level: Literal["full", "view_only"] = "full"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1  # incremented on every write, exposed as the ETag
 
 
 class UserCreate(BaseModel):
@@ -2,5 +2,7 @@
 
 from .user_service import UserService
 from .subscription_service import SubscriptionService
+from .analytics_service import AnalyticsService
+from .notification_service import NotificationService
 
-__all__ = ["UserService", "SubscriptionService"]
+__all__ = ["UserService", "SubscriptionService", "AnalyticsService", "NotificationService"]
@@ -0,0 +1,139 @@
+"""Analytics Service - Vectorized Renewal Revenue Forecasting"""
+
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.schemas.subscription import ForecastMonth, RenewalForecast
+from app.repositories import get_subscription_repository
+from app.core.storage import date_to_storage
+from app.utils.constants import FORECAST_MONTHS, SUBSCRIPTION_DURATION_MONTHS
+
+FORECAST_COLUMNS = ["month", "duration", "category", "type", "price", "count"]
+GROUP_COLUMNS = ["month", "duration", "category", "type"]
+
+
+def month_index(year, month):
+    """Absolute month number (year * 12 + month - 1); works on scalars and arrays"""
+    return year * 12 + month - 1
+
+
+def month_label(index: int) -> str:
+    """Format an absolute month number as YYYY-MM"""
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def project_renewals(frame: pd.DataFrame, start_month: int, horizon: int) -> pd.DataFrame:
+    """
+    Expand subscriptions into every renewal that falls inside the forecast window
+
+    Rows are first collapsed per (month, duration, category, type), so the
+    expansion is bounded by the number of distinct groups rather than the number
+    of subscriptions. Renewals then repeat every duration from the renewal month
+    using array arithmetic only. Unknown durations renew once; missing
+    categories and types are reported as "Unknown".
+
+    Args:
+        frame: FORECAST_COLUMNS, where month is the renewal month as a month_index
+            and count the number of subscriptions the row stands for
+        start_month: month_index of the first forecast month
+        horizon: Number of months to forecast
+
+    Returns:
+        One row per (group, renewal) with columns offset (months from start_month),
+        category, type, revenue and renewals
+    """
+    missing = [column for column in ("duration", "category", "type") if frame[column].isna().any()]
+    if missing:
+        frame = frame.astype({column: object for column in missing}).fillna({column: "Unknown" for column in missing})
+    grouped = frame.groupby(GROUP_COLUMNS, sort=False, observed=True)[["price", "count"]].sum().reset_index()
+
+    offset = grouped["month"].to_numpy(dtype=np.int64) - start_month
+    period = grouped["duration"].map(SUBSCRIPTION_DURATION_MONTHS).fillna(horizon).to_numpy(dtype=np.int64)
+
+    in_window = (offset >= 0) & (offset < horizon)
+    occurrences = np.where(in_window, (horizon - 1 - offset) // period + 1, 0)
+
+    # Source row of every renewal, and its position (0, 1, 2, ...) within that row
+    rows = np.repeat(np.arange(len(grouped)), occurrences)
+    first = np.cumsum(occurrences) - occurrences
+    step = np.arange(len(rows)) - np.repeat(first, occurrences)
+
+    return pd.DataFrame({
+        "offset": offset[rows] + period[rows] * step,
+        "category": grouped["category"].to_numpy()[rows],
+        "type": grouped["type"].to_numpy()[rows],
+        "revenue": grouped["price"].to_numpy(dtype=float)[rows],
+        "renewals": grouped["count"].to_numpy(dtype=np.int64)[rows],
+    })
+
+
+def summarize_forecast(projected: pd.DataFrame, start_month: int, horizon: int) -> RenewalForecast:
+    """
+    Total projected renewals per month, with revenue broken down by category and type
+
+    Args:
+        projected: Output of project_renewals
+        start_month: month_index of the first forecast month
+        horizon: Number of months to forecast
+
+    Returns:
+        Forecast with one entry per month of the horizon, including empty months
+    """
+    offsets = projected["offset"].to_numpy(dtype=np.int64)
+    revenue = np.bincount(offsets, weights=projected["revenue"].to_numpy(dtype=float), minlength=horizon)
+    renewals = np.bincount(offsets, weights=projected["renewals"].to_numpy(dtype=float), minlength=horizon)
+
+    def breakdown(column: str) -> List[dict]:
+        per_month: List[dict] = [{} for _ in range(horizon)]
+        sums = projected.groupby(["offset", column], sort=True)["revenue"].sum()
+        for (offset, key), value in sums.items():
+            per_month[offset][key] = float(value)
+        return per_month
+
+    by_category = breakdown("category")
+    by_type = breakdown("type")
+
+    months = [
+        ForecastMonth(
+            month=month_label(start_month + offset),
+            revenue=float(revenue[offset]),
+            renewals=int(renewals[offset]),
+            by_category=by_category[offset],
+            by_type=by_type[offset]
+        )
+        for offset in range(horizon)
+    ]
+    return RenewalForecast(months=months, total_revenue=float(revenue.sum()))
+
+
+class AnalyticsService:
+    """Analytics service for revenue forecasting"""
+
+    @staticmethod
+    async def get_renewal_forecast(months: int = FORECAST_MONTHS) -> RenewalForecast:
+        """
+        Forecast renewal revenue for the current month and the following months
+
+        The repository groups subscriptions by renewal month, duration, category and
+        type, so only a few thousand rows cross the wire regardless of collection
+        size; recurring renewals are then projected with numpy. Subscriptions whose
+        renewal date is before the current month are treated as lapsed.
+        """
+        today = datetime.now(timezone.utc).date()
+        start_month = month_index(today.year, today.month)
+        end_month = start_month + months
+
+        groups = await get_subscription_repository().renewal_groups(
+            date_to_storage(today.replace(day=1)),
+            datetime(end_month // 12, end_month % 12 + 1, 1, tzinfo=timezone.utc)
+        )
+
+        frame = pd.DataFrame(
+            groups,
+            columns=FORECAST_COLUMNS
+        )
+        projected = project_renewals(frame, start_month, months)
+        return summarize_forecast(projected, start_month, months)
@@ -0,0 +1,237 @@
+"""Notification Service - Renewal Reminder Queue
+
+Reminders are queued in the notifications collection, which is both the
+dedupe record and the work queue. Every document has a unique key built from
+the subscription, its renewal date, the reminder offset and the channel, so
+enqueueing is an upsert that any number of app workers can run at once without
+creating duplicates. Workers claim batches atomically under a lease; a claim
+whose worker dies is picked up again once the lease expires, which makes
+delivery at-least-once.
+"""
+
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional, Sequence
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.database import get_notifications_collection
+from app.core.storage import date_to_storage, date_from_storage
+from app.repositories import get_subscription_repository
+from app.schemas.subscription import SubscriptionFilters
+from app.core.config import (
+    REMINDER_OFFSETS_DAYS,
+    NOTIFICATION_LEASE_SECONDS,
+    NOTIFICATION_MAX_ATTEMPTS,
+    NOTIFICATION_RETRY_BASE_SECONDS,
+)
+from app.utils.constants import (
+    BULK_IMPORT_CHUNK_SIZE,
+    NOTIFICATION_STATUS_PENDING,
+    NOTIFICATION_STATUS_SENDING,
+    NOTIFICATION_STATUS_SENT,
+    NOTIFICATION_STATUS_FAILED,
+)
+from app.utils.helpers import due_reminder_offset
+
+# Server error code for a duplicate key, raised when two workers insert the same reminder
+DUPLICATE_KEY = 11000
+
+REMINDER_SUBSCRIPTION_FIELDS = [
+    "id",
+    "client_name",
+    "business_name",
+    "client_email",
+    "price",
+    "renewal_date",
+    "duration",
+    "type",
+    "category",
+]
+
+
+def notification_key(subscription_id: str, renewal_date: str, offset_days: int, channel: str) -> str:
+    """Dedupe key of a reminder: one per subscription, renewal, offset and channel"""
+    return f"{subscription_id}:{renewal_date}:{offset_days}:{channel}"
+
+
+def claimable_query(now: datetime) -> dict:
+    """Notifications that are due, or whose claim has expired"""
+    return {"$or": [
+        {"status": NOTIFICATION_STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+        {"status": NOTIFICATION_STATUS_SENDING, "locked_until": {"$lte": now}},
+    ]}
+
+
+class NotificationService:
+    """Notification service for the renewal reminder queue"""
+
+    @staticmethod
+    async def enqueue_due_reminders(
+        channels: Sequence[str],
+        offsets: Sequence[int] = REMINDER_OFFSETS_DAYS,
+        today=None
+    ) -> int:
+        """
+        Queue the renewal reminders that are due today
+
+        One range query on renewal_date finds every subscription renewing within
+        the largest offset. Each gets the reminder for the last threshold its
+        renewal date has crossed, so reminders missed while the app was down are
+        caught up once instead of all being sent.
+
+        Args:
+            channels: Channels to queue a notification for per reminder
+            offsets: Reminder offsets in days before renewal
+            today: Reference date (defaults to current UTC date)
+
+        Returns:
+            Number of notifications newly queued
+        """
+        if not channels or not offsets:
+            return 0
+
+        notifications_collection = await get_notifications_collection()
+        today = today or datetime.now(timezone.utc).date()
+        now = datetime.now(timezone.utc)
+
+        cursor = get_subscription_repository().stream(
+            SubscriptionFilters(renewal_from=today, renewal_to=today + timedelta(days=max(offsets))),
+            REMINDER_SUBSCRIPTION_FIELDS,
+            BULK_IMPORT_CHUNK_SIZE
+        )
+
+        queued = 0
+        operations: List[UpdateOne] = []
+
+        async def flush():
+            nonlocal queued
+            if not operations:
+                return
+            try:
+                result = await notifications_collection.bulk_write(operations, ordered=False)
+                queued += result.upserted_count
+            except BulkWriteError as e:
+                # Another worker queued the same reminders first
+                if any(error['code'] != DUPLICATE_KEY for error in e.details.get('writeErrors', [])):
+                    raise
+                queued += e.details.get('nUpserted', 0)
+            operations.clear()
+
+        async for sub in cursor:
+            renewal_date = date_to_storage(sub['renewal_date'])
+            days_left = (renewal_date.date() - today).days
+            offset_days = due_reminder_offset(days_left, offsets)
+            if offset_days is None:
+                continue
+
+            subscription = {**sub, "renewal_date": date_from_storage(renewal_date)}
+            for channel in channels:
+                key = notification_key(sub['id'], subscription['renewal_date'], offset_days, channel)
+                operations.append(UpdateOne(
+                    {"key": key},
+                    {"$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "key": key,
+                        "channel": channel,
+                        "subscription_id": sub['id'],
+                        "offset_days": offset_days,
+                        "days_left": days_left,
+                        "subscription": subscription,
+                        "status": NOTIFICATION_STATUS_PENDING,
+                        "attempts": 0,
+                        "next_attempt_at": now,
+                        "created_at": now,
+                    }},
+                    upsert=True
+                ))
+            if len(operations) >= BULK_IMPORT_CHUNK_SIZE:
+                await flush()
+        await flush()
+
+        return queued
+
+    @staticmethod
+    async def claim_batch(limit: int) -> List[dict]:
+        """
+        Claim up to limit due notifications for this worker
+
+        Candidates are read first and then claimed with a single update_many
+        that re-checks they are still claimable, so each notification is claimed
+        by exactly one worker even when several race for the same batch.
+
+        Returns:
+            Claimed notifications, each carrying the claim_id needed to complete it
+        """
+        notifications_collection = await get_notifications_collection()
+        now = datetime.now(timezone.utc)
+
+        candidates = await notifications_collection.find(claimable_query(now), {"_id": 1}) \
+            .sort("next_attempt_at", 1) \
+            .limit(limit) \
+            .to_list(limit)
+        if not candidates:
+            return []
+
+        claim_id = uuid.uuid4().hex
+        await notifications_collection.update_many(
+            {"_id": {"$in": [doc['_id'] for doc in candidates]}, **claimable_query(now)},
+            {
+                "$set": {
+                    "status": NOTIFICATION_STATUS_SENDING,
+                    "claim_id": claim_id,
+                    "locked_until": now + timedelta(seconds=NOTIFICATION_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1}
+            }
+        )
+        return await notifications_collection.find({"claim_id": claim_id}).to_list(limit)
+
+    @staticmethod
+    async def mark_sent(notification: dict) -> bool:
+        """
+        Record a successful delivery
+
+        Returns:
+            False if the claim had expired and another worker took the notification over
+        """
+        notifications_collection = await get_notifications_collection()
+        now = datetime.now(timezone.utc)
+        result = await notifications_collection.update_one(
+            {"_id": notification['_id'], "claim_id": notification['claim_id']},
+            {"$set": {
+                "status": NOTIFICATION_STATUS_SENT,
+                "sent_at": now,
+                "locked_until": None,
+                "last_error": None,
+            }}
+        )
+        return result.modified_count == 1
+
+    @staticmethod
+    async def mark_failed(notification: dict, error: str) -> Optional[datetime]:
+        """
+        Record a failed delivery, scheduling a retry with exponential backoff
+
+        Returns:
+            When the notification will be retried, or None if it has run out of attempts
+        """
+        notifications_collection = await get_notifications_collection()
+        now = datetime.now(timezone.utc)
+        attempts = notification.get('attempts', 1)
+
+        update = {"locked_until": None, "last_error": error[:500]}
+        retry_at = None
+        if attempts >= NOTIFICATION_MAX_ATTEMPTS:
+            update['status'] = NOTIFICATION_STATUS_FAILED
+        else:
+            retry_at = now + timedelta(seconds=NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+            update['status'] = NOTIFICATION_STATUS_PENDING
+            update['next_attempt_at'] = retry_at
+
+        await notifications_collection.update_one(
+            {"_id": notification['_id'], "claim_id": notification['claim_id']},
+            {"$set": update}
+        )
+        return retry_at
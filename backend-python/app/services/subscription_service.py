@@ -1,11 +1,93 @@
 """Subscription Service - Business Logic for Subscription Management"""
 
-from typing import List, Optional
-from datetime import datetime, timezone, timedelta
+import csv
+import io
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime, timezone
+import orjson
 from fastapi import HTTPException, status
-from app.schemas.subscription import Subscription, SubscriptionCreate, SubscriptionUpdate, DashboardStats
-from app.core.database import get_subscriptions_collection
-from app.utils.helpers import calculate_subscription_status, parse_datetime_string
+from pydantic import TypeAdapter, ValidationError
+from app.schemas.subscription import (
+    Subscription,
+    SubscriptionCreate,
+    SubscriptionUpdate,
+    SubscriptionFilters,
+    SubscriptionPage,
+    SubscriptionSearchPage,
+    BulkSelection,
+    BulkUpdateResult,
+    BulkDeleteResult,
+    BulkRowError,
+    BulkImportResult,
+    DashboardStats,
+)
+from app.core.metrics import validation_duration
+from app.core.cache import subscriptions_generation
+from app.core.storage import (
+    date_to_storage,
+    subscription_to_document,
+    subscription_from_document,
+)
+from app.repositories import SubscriptionRepository, get_subscription_repository
+from app.repositories.base import has_filters
+from app.utils.constants import (
+    DEFAULT_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
+    EXPORT_FIELDS,
+    SUBSCRIPTION_STATUSES,
+    SUBSCRIPTION_DURATION_MONTHS,
+    BULK_IMPORT_CHUNK_SIZE,
+    BULK_IMPORT_MAX_ERRORS,
+    SUBSCRIPTION_SEARCH_FIELDS,
+    DEFAULT_SEARCH_PAGE_SIZE,
+)
+from app.utils.helpers import (
+    calculate_subscription_status,
+    get_status_date_range,
+    encode_cursor,
+    parse_if_match,
+    decode_cursor,
+    convert_datetime_to_string,
+    tokenize_search_text,
+    subscription_search_terms,
+)
+from app.utils.streams import ParsedRow
+
+# Validates whole lists in one pydantic-core call instead of per model
+subscription_list_adapter = TypeAdapter(List[Subscription])
+
+# Fields of the Subscription model, and the defaults of optional ones, so raw
+# documents can be serialized in the model's shape without building models
+SUBSCRIPTION_FIELDS = list(Subscription.model_fields)
+SUBSCRIPTION_DEFAULTS = {
+    name: field.default
+    for name, field in Subscription.model_fields.items()
+    if not field.is_required() and field.default_factory is None
+}
+
+
+def encode_subscription_page(docs: List[dict], next_cursor: Optional[str], limit: int) -> bytes:
+    """
+    Serialize a page of subscriptions to the SubscriptionPage JSON body
+
+    Documents are encoded directly with orjson. They were validated when written,
+    so only defaults for optional fields missing from older documents are filled in,
+    keys are put in model field order and the price is made a float as the model would.
+
+    Args:
+        docs: Documents read with SUBSCRIPTION_FIELDS, in API representation
+        next_cursor: Cursor for the next page, if any
+        limit: Page size
+
+    Returns:
+        UTF-8 JSON bytes matching SubscriptionPage.model_dump_json()
+    """
+    items = []
+    for doc in docs:
+        item = {field: doc.get(field, SUBSCRIPTION_DEFAULTS.get(field)) for field in SUBSCRIPTION_FIELDS}
+        item['price'] = float(item['price'])
+        items.append(item)
+    return orjson.dumps({"items": items, "next_cursor": next_cursor, "limit": limit}, option=orjson.OPT_UTC_Z)
 
 
 class SubscriptionService:
@@ -14,143 +96,462 @@ class SubscriptionService:
     @staticmethod
     async def create_subscription(sub_data: SubscriptionCreate, user_id: str) -> Subscription:
         """Create a new subscription"""
-        subs_collection = await get_subscriptions_collection()
-        
-        # Calculate status
-        status = calculate_subscription_status(sub_data.renewal_date)
+        doc = SubscriptionService._build_subscription_document(sub_data, user_id)
+        subscription = Subscription(**subscription_from_document(dict(doc)))
         
-        # Create subscription object
+        # Insert into database
+        await get_subscription_repository().insert(doc)
+        await subscriptions_generation.bump()
+        return subscription
+    
+    @staticmethod
+    def _build_subscription_document(sub_data: SubscriptionCreate, user_id: str) -> dict:
+        """Build the stored document for a new subscription"""
         subscription = Subscription(
             **sub_data.model_dump(),
-            status=status,
+            status=calculate_subscription_status(sub_data.renewal_date),
             created_by=user_id
         )
+        doc = subscription_to_document(subscription.model_dump())
+        doc['search_terms'] = subscription_search_terms(doc)
+        return doc
+    
+    @staticmethod
+    async def bulk_import(rows: AsyncIterator[ParsedRow], user_id: str) -> BulkImportResult:
+        """
+        Import subscriptions from a stream of parsed rows
         
-        # Prepare document for database
-        doc = subscription.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
+        Rows are validated and written in chunks of BULK_IMPORT_CHUNK_SIZE with
+        unordered insert_many calls, so only one chunk is held in memory and a bad
+        row does not stop the rest of its chunk from being written.
+        """
+        subscriptions = get_subscription_repository()
+        inserted = 0
+        failed = 0
+        errors: List[BulkRowError] = []
         
-        # Insert into database
-        await subs_collection.insert_one(doc)
-        return subscription
+        def record_error(row: int, detail: str):
+            nonlocal failed
+            failed += 1
+            if len(errors) < BULK_IMPORT_MAX_ERRORS:
+                errors.append(BulkRowError(row=row, detail=detail))
+        
+        async def flush(docs: List[dict], row_numbers: List[int]):
+            nonlocal inserted
+            if not docs:
+                return
+            try:
+                result = await subscriptions.insert_many(docs)
+                inserted += result.inserted
+                for index, message in result.errors:
+                    record_error(row_numbers[index], message)
+            finally:
+                await subscriptions_generation.bump()
+        
+        docs: List[dict] = []
+        row_numbers: List[int] = []
+        row = 0
+        async for data, parse_error in rows:
+            row += 1
+            if parse_error:
+                record_error(row, parse_error)
+                continue
+            try:
+                with validation_duration.time("SubscriptionCreate"):
+                    sub_data = SubscriptionCreate.model_validate(data)
+            except ValidationError as e:
+                record_error(row, "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            
+            docs.append(SubscriptionService._build_subscription_document(sub_data, user_id))
+            row_numbers.append(row)
+            if len(docs) >= BULK_IMPORT_CHUNK_SIZE:
+                await flush(docs, row_numbers)
+                docs, row_numbers = [], []
+        
+        await flush(docs, row_numbers)
+        return BulkImportResult(inserted=inserted, failed=failed, errors=errors)
+    
+    @staticmethod
+    def validate_filters(filters: Optional[SubscriptionFilters] = None):
+        """Reject filters on a status that does not exist"""
+        if filters is not None and filters.status is not None and filters.status not in SUBSCRIPTION_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown subscription status: {filters.status}"
+            )
     
     @staticmethod
-    async def get_subscriptions() -> List[Subscription]:
-        """Get all subscriptions"""
-        subs_collection = await get_subscriptions_collection()
-        subscriptions = await subs_collection.find({}, {"_id": 0}).to_list(10000)
+    async def _fetch_page(
+        filters: Optional[SubscriptionFilters],
+        cursor: Optional[str],
+        limit: int
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Fetch a page of subscription documents in API representation and the next cursor"""
+        SubscriptionService.validate_filters(filters)
+        
+        # Keyset pagination: continue strictly after the last (renewal_date, id) seen
+        after = None
+        if cursor:
+            try:
+                last_renewal_date, last_id = decode_cursor(cursor)
+                last_renewal_date = datetime.strptime(last_renewal_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            after = (last_renewal_date, last_id)
+        
+        # Fetch one extra row to find out whether another page exists
+        subscriptions = await get_subscription_repository().find_page(filters, after, limit + 1, SUBSCRIPTION_FIELDS)
+        
+        has_more = len(subscriptions) > limit
+        subscriptions = subscriptions[:limit]
         
         for sub in subscriptions:
-            if isinstance(sub.get('created_at'), str):
-                sub['created_at'] = parse_datetime_string(sub['created_at'])
-            if isinstance(sub.get('updated_at'), str):
-                sub['updated_at'] = parse_datetime_string(sub['updated_at'])
-            
-            # Recalculate status
-            sub['status'] = calculate_subscription_status(sub['renewal_date'])
+            subscription_from_document(sub)
+        
+        next_cursor = None
+        if has_more:
+            last = subscriptions[-1]
+            next_cursor = encode_cursor(last['renewal_date'], last['id'])
         
-        return [Subscription(**sub) for sub in subscriptions]
+        return subscriptions, next_cursor
     
     @staticmethod
-    async def get_subscription_by_id(subscription_id: str) -> Subscription:
-        """Get subscription by ID"""
-        subs_collection = await get_subscriptions_collection()
-        sub = await subs_collection.find_one({"id": subscription_id}, {"_id": 0})
+    async def get_subscriptions(
+        filters: Optional[SubscriptionFilters] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> SubscriptionPage:
+        """Get a page of subscriptions ordered by renewal date"""
+        subscriptions, next_cursor = await SubscriptionService._fetch_page(filters, cursor, limit)
+        with validation_duration.time("SubscriptionList"):
+            items = subscription_list_adapter.validate_python(subscriptions)
+        return SubscriptionPage(
+            items=items,
+            next_cursor=next_cursor,
+            limit=limit
+        )
+    
+    @staticmethod
+    async def get_subscriptions_json(
+        filters: Optional[SubscriptionFilters] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> bytes:
+        """
+        Get a page of subscriptions as a serialized SubscriptionPage
         
-        if not sub:
+        Fast path for the list endpoint: projected documents are encoded with
+        orjson without building models, and the route returns the bytes as-is
+        instead of validating them again through response_model.
+        """
+        subscriptions, next_cursor = await SubscriptionService._fetch_page(filters, cursor, limit)
+        return encode_subscription_page(subscriptions, next_cursor, limit)
+    
+    @staticmethod
+    async def search_subscriptions(
+        q: str,
+        mode: str = "auto",
+        limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+        offset: int = 0
+    ) -> SubscriptionSearchPage:
+        """
+        Search subscriptions by client name, business name, email and notes
+        
+        Modes:
+        - prefix: every query term must be a prefix of a client name, business name
+          or email term (typeahead). Served from the search_terms index and ranked
+          by the matching terms: most whole-term matches first, then the closest
+          completions.
+        - text: full-text search over the same fields plus notes, ranked
+          by text score with names weighted highest.
+        - auto: prefix, falling back to text on the first page when nothing matches.
+        """
+        terms = tokenize_search_text(q)
+        if not terms:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Subscription not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search query must contain letters or digits"
             )
         
-        if isinstance(sub.get('created_at'), str):
-            sub['created_at'] = parse_datetime_string(sub['created_at'])
-        if isinstance(sub.get('updated_at'), str):
-            sub['updated_at'] = parse_datetime_string(sub['updated_at'])
+        subscriptions = get_subscription_repository()
+        used_mode = "text" if mode == "text" else "prefix"
+        
+        if used_mode == "prefix":
+            docs = await subscriptions.search_prefix(terms, offset, limit + 1, SUBSCRIPTION_FIELDS)
+            if not docs and mode == "auto" and offset == 0:
+                used_mode = "text"
         
-        sub['status'] = calculate_subscription_status(sub['renewal_date'])
+        if used_mode == "text":
+            docs = await subscriptions.search_text(terms, offset, limit + 1, SUBSCRIPTION_FIELDS)
         
-        return Subscription(**sub)
+        has_more = len(docs) > limit
+        with validation_duration.time("SubscriptionList"):
+            items = subscription_list_adapter.validate_python(
+                [subscription_from_document(doc) for doc in docs[:limit]]
+            )
+        return SubscriptionSearchPage(
+            items=items,
+            next_offset=offset + limit if has_more else None,
+            limit=limit,
+            mode=used_mode
+        )
     
     @staticmethod
-    async def update_subscription(subscription_id: str, update_data: SubscriptionUpdate) -> Subscription:
-        """Update subscription"""
-        subs_collection = await get_subscriptions_collection()
+    async def export_subscriptions(
+        filters: Optional[SubscriptionFilters] = None,
+        export_format: str = "ndjson"
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream subscriptions as NDJSON or CSV
+        
+        Rows are read from the repository in batches of EXPORT_BATCH_SIZE and
+        written out as raw documents, without building Subscription models.
+        """
+        SubscriptionService.validate_filters(filters)
+        cursor = get_subscription_repository().stream(filters, EXPORT_FIELDS, EXPORT_BATCH_SIZE)
+        
+        if export_format == "csv":
+            return SubscriptionService._stream_csv(cursor)
+        return SubscriptionService._stream_ndjson(cursor)
+    
+    @staticmethod
+    def _prepare_export_row(sub: dict) -> dict:
+        """Convert a stored document to an exported row with string timestamps"""
+        subscription_from_document(sub)
+        for field in ('created_at', 'updated_at'):
+            sub[field] = convert_datetime_to_string(sub.get(field))
+        return sub
+    
+    @staticmethod
+    async def _stream_ndjson(cursor) -> AsyncIterator[bytes]:
+        """Yield NDJSON chunks of EXPORT_BATCH_SIZE rows"""
+        lines = []
+        async for sub in cursor:
+            lines.append(orjson.dumps(SubscriptionService._prepare_export_row(sub)))
+            lines.append(b"\n")
+            if len(lines) >= 2 * EXPORT_BATCH_SIZE:
+                yield b"".join(lines)
+                lines = []
+        if lines:
+            yield b"".join(lines)
+    
+    @staticmethod
+    async def _stream_csv(cursor) -> AsyncIterator[bytes]:
+        """Yield CSV chunks of EXPORT_BATCH_SIZE rows, header first"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        rows = 0
+        async for sub in cursor:
+            writer.writerow(SubscriptionService._prepare_export_row(sub))
+            rows += 1
+            if rows >= EXPORT_BATCH_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+                rows = 0
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    
+    @staticmethod
+    async def get_subscription_by_id(subscription_id: str) -> Subscription:
+        """Get subscription by ID"""
+        sub = await get_subscription_repository().find_by_id(subscription_id)
         
-        # Check if subscription exists
-        sub = await subs_collection.find_one({"id": subscription_id})
         if not sub:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Subscription not found"
             )
         
+        with validation_duration.time("Subscription"):
+            return Subscription(**subscription_from_document(sub))
+    
+    @staticmethod
+    async def update_subscription(
+        subscription_id: str,
+        update_data: SubscriptionUpdate,
+        if_match: Optional[str] = None
+    ) -> Subscription:
+        """
+        Update subscription in a single atomic write
+        
+        When if_match carries the version ETag, the update only applies if the
+        stored version still matches; otherwise 412 is raised so concurrent
+        edits are rejected instead of overwriting each other.
+        """
+        subscriptions = get_subscription_repository()
+        
+        try:
+            expected_version = parse_if_match(if_match)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+        
         # Prepare update data
         update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
         
         if update_dict:
-            update_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
+            update_dict['updated_at'] = datetime.now(timezone.utc)
             
             # Recalculate status if renewal_date changed
             if 'renewal_date' in update_dict:
                 update_dict['status'] = calculate_subscription_status(update_dict['renewal_date'])
             
-            await subs_collection.update_one({"id": subscription_id}, {"$set": update_dict})
+            # Search terms span several fields, so unchanged ones must be read first
+            if any(field in update_dict for field in SUBSCRIPTION_SEARCH_FIELDS):
+                current = await subscriptions.find_by_id(subscription_id, SUBSCRIPTION_SEARCH_FIELDS)
+                if current is not None:
+                    update_dict['search_terms'] = subscription_search_terms({**current, **update_dict})
+            
+            updated_sub = await subscriptions.update(
+                subscription_id,
+                subscription_to_document(update_dict),
+                expected_version
+            )
+            if updated_sub:
+                await subscriptions_generation.bump()
+        else:
+            updated_sub = await subscriptions.find_by_id(subscription_id)
+            if updated_sub and expected_version is not None and updated_sub.get('version', 1) != expected_version:
+                updated_sub = None
         
-        # Return updated subscription
-        updated_sub = await subs_collection.find_one({"id": subscription_id}, {"_id": 0})
-        if isinstance(updated_sub.get('created_at'), str):
-            updated_sub['created_at'] = parse_datetime_string(updated_sub['created_at'])
-        if isinstance(updated_sub.get('updated_at'), str):
-            updated_sub['updated_at'] = parse_datetime_string(updated_sub['updated_at'])
+        if not updated_sub:
+            # Only a failed conditional write needs the extra lookup to tell 404 from 412
+            if expected_version is not None and await subscriptions.find_by_id(subscription_id, ["id"]):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Subscription was modified by another request"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Subscription not found"
+            )
         
-        return Subscription(**updated_sub)
+        with validation_duration.time("Subscription"):
+            return Subscription(**subscription_from_document(updated_sub))
     
     @staticmethod
     async def delete_subscription(subscription_id: str) -> bool:
         """Delete subscription"""
-        subs_collection = await get_subscriptions_collection()
-        result = await subs_collection.delete_one({"id": subscription_id})
+        deleted = await get_subscription_repository().delete(subscription_id)
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Subscription not found"
             )
         
+        await subscriptions_generation.bump()
         return True
     
+    @staticmethod
+    def _check_selection(selection: BulkSelection):
+        """Validate a bulk operation's selection, refusing to target every subscription"""
+        SubscriptionService.validate_filters(selection.filters)
+        if selection.ids is None and not has_filters(selection.filters):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide ids or at least one filter"
+            )
+    
+    @staticmethod
+    async def bulk_update(selection: BulkSelection, update_data: SubscriptionUpdate) -> BulkUpdateResult:
+        """Apply the same patch to every selected subscription in one bulk write"""
+        SubscriptionService._check_selection(selection)
+        
+        update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
+        if not update_dict:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Patch has no fields to update"
+            )
+        
+        update_dict['updated_at'] = datetime.now(timezone.utc)
+        if 'renewal_date' in update_dict:
+            update_dict['status'] = calculate_subscription_status(update_dict['renewal_date'])
+        update_doc = subscription_to_document(update_dict)
+        
+        subscriptions = get_subscription_repository()
+        if any(field in update_dict for field in SUBSCRIPTION_SEARCH_FIELDS):
+            # search_terms then differ per subscription, so each one is written separately
+            result = await subscriptions.update_selection_each(
+                selection,
+                SUBSCRIPTION_SEARCH_FIELDS,
+                lambda doc: {**update_doc, "search_terms": subscription_search_terms({**doc, **update_doc})}
+            )
+        else:
+            result = await subscriptions.update_selection(selection, update_doc)
+        if result.modified:
+            await subscriptions_generation.bump()
+        return BulkUpdateResult(matched=result.matched, modified=result.modified)
+    
+    @staticmethod
+    async def bulk_renew(selection: BulkSelection) -> BulkUpdateResult:
+        """
+        Renew every selected subscription in one bulk write
+        
+        renewal_date moves forward by the subscription's duration, paid_date is set
+        to today and status is recomputed from the new renewal date. Subscriptions
+        with an unknown duration are not matched.
+        """
+        SubscriptionService._check_selection(selection)
+        now = datetime.now(timezone.utc)
+        result = await get_subscription_repository().renew_selection(
+            selection,
+            SUBSCRIPTION_DURATION_MONTHS,
+            date_to_storage(now.date()),
+            now
+        )
+        if result.modified:
+            await subscriptions_generation.bump()
+        return BulkUpdateResult(matched=result.matched, modified=result.modified)
+    
+    @staticmethod
+    async def bulk_delete(selection: BulkSelection) -> BulkDeleteResult:
+        """Delete every selected subscription in one bulk delete"""
+        SubscriptionService._check_selection(selection)
+        deleted = await get_subscription_repository().delete_selection(selection)
+        if deleted:
+            await subscriptions_generation.bump()
+        return BulkDeleteResult(deleted=deleted)
+    
     @staticmethod
     async def get_dashboard_stats() -> DashboardStats:
-        """Get dashboard statistics"""
-        subs_collection = await get_subscriptions_collection()
+        """Get dashboard statistics, computed by the repository in one pass"""
+        return await get_subscription_repository().dashboard_stats(datetime.now(timezone.utc).date())
+    
+    @staticmethod
+    async def recompute_statuses(subscriptions: Optional[SubscriptionRepository] = None) -> int:
+        """
+        Move stored statuses to match today's date
         
+        Runs one update per status over its renewal date range, touching only
+        documents whose stored status is out of date.
+        
+        Args:
+            subscriptions: Repository to update (defaults to the configured one)
+        
+        Returns:
+            Number of subscriptions whose status changed
+        """
+        subscriptions = subscriptions or get_subscription_repository()
         today = datetime.now(timezone.utc).date()
-        all_subs = await subs_collection.find({}, {"_id": 0, "renewal_date": 1}).to_list(10000)
         
-        total = len(all_subs)
-        upcoming = 0
-        due_today = 0
-        expired = 0
+        modified = 0
+        for sub_status in SUBSCRIPTION_STATUSES:
+            start, end = get_status_date_range(sub_status, today)
+            modified += await subscriptions.set_status(
+                sub_status,
+                date_to_storage(start) if start is not None else None,
+                date_to_storage(end) if end is not None else None
+            )
         
-        for sub in all_subs:
-            renewal_date_str = sub.get('renewal_date')
-            try:
-                renewal_date = datetime.strptime(renewal_date_str, "%Y-%m-%d").date()
-                
-                if renewal_date < today:
-                    expired += 1
-                elif renewal_date == today:
-                    due_today += 1
-                elif renewal_date <= (today + timedelta(days=30)):
-                    upcoming += 1
-            except (ValueError, TypeError):
-                pass
-        
-        return DashboardStats(
-            total_subscriptions=total,
-            upcoming_renewals=upcoming,
-            renewals_due_today=due_today,
-            expired_subscriptions=expired
-        )
+        if modified:
+            await subscriptions_generation.bump()
+        return modified
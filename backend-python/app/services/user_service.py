@@ -3,9 +3,13 @@
 from typing import List, Optional
 from fastapi import HTTPException, status
 from app.schemas.user import User, UserCreate, UserUpdate
-from app.core.security import hash_password, verify_password, create_access_token
-from app.core.database import get_users_collection
+from app.core.security import hash_password_async, verify_password_async
+from app.repositories import DuplicateEntryError, get_user_repository
+from app.core.storage import user_to_document, user_from_document
+from app.core.cache import user_cache
+from app.core.revocation import revocation_list
 from app.utils.constants import USER_ROLE_ADMIN, USER_ROLE_STAFF
+from app.utils.helpers import parse_if_match
 
 
 class UserService:
@@ -14,10 +18,10 @@ class UserService:
     @staticmethod
     async def create_user(user_data: UserCreate) -> User:
         """Create a new user"""
-        users_collection = await get_users_collection()
+        users = get_user_repository()
         
         # Check if email already exists
-        existing_user = await users_collection.find_one({"email": user_data.email})
+        existing_user = await users.find_by_email(user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,104 +38,139 @@ class UserService:
         )
         
         # Prepare document for database
-        doc = user.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['password_hash'] = hash_password(user_data.password)
+        doc = user_to_document(user.model_dump())
+        doc['password_hash'] = await hash_password_async(user_data.password)
         
-        # Insert into database
-        await users_collection.insert_one(doc)
+        # Insert into database; the unique email index catches concurrent registrations
+        try:
+            await users.insert(doc)
+        except DuplicateEntryError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         return user
     
     @staticmethod
     async def get_user_by_email(email: str) -> Optional[dict]:
         """Get user by email"""
-        users_collection = await get_users_collection()
-        user = await users_collection.find_one({"email": email}, {"_id": 0})
-        return user
+        return await get_user_repository().find_by_email(email)
     
     @staticmethod
     async def get_user_by_id(user_id: str) -> Optional[User]:
         """Get user by ID"""
-        users_collection = await get_users_collection()
-        user_doc = await users_collection.find_one({"id": user_id}, {"_id": 0})
+        user_doc = await get_user_repository().find_by_id(user_id)
         
         if not user_doc:
             return None
         
-        if isinstance(user_doc.get('created_at'), str):
-            from app.utils.helpers import parse_datetime_string
-            user_doc['created_at'] = parse_datetime_string(user_doc['created_at'])
-        
-        return User(**user_doc)
+        return User(**user_from_document(user_doc))
     
     @staticmethod
     async def get_staff_members() -> List[User]:
         """Get all staff members"""
-        users_collection = await get_users_collection()
-        staff_list = await users_collection.find(
-            {"role": USER_ROLE_STAFF},
-            {"_id": 0}
-        ).to_list(1000)
-        
-        for staff in staff_list:
-            if isinstance(staff.get('created_at'), str):
-                from app.utils.helpers import parse_datetime_string
-                staff['created_at'] = parse_datetime_string(staff['created_at'])
-        
-        return [User(**staff) for staff in staff_list]
+        staff_list = await get_user_repository().find_by_role(USER_ROLE_STAFF, 1000)
+        
+        return [User(**user_from_document(staff)) for staff in staff_list]
     
     @staticmethod
-    async def update_user(user_id: str, update_data: UserUpdate) -> User:
-        """Update user information"""
-        users_collection = await get_users_collection()
-        
-        # Check if user exists
-        user = await users_collection.find_one({"id": user_id})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+    async def update_user(
+        user_id: str,
+        update_data: UserUpdate,
+        if_match: Optional[str] = None,
+        keep_token: Optional[str] = None
+    ) -> User:
+        """
+        Update user information in a single atomic write
+        
+        When if_match carries the version ETag, the update only applies if the
+        stored version still matches; otherwise 412 is raised.
+        
+        A password change revokes the user's existing tokens, except the one
+        whose jti is given as keep_token.
+        """
+        users = get_user_repository()
+        
+        try:
+            expected_version = parse_if_match(if_match)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
         
         # Prepare update data
         update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
         
         # Hash password if provided
         if 'password' in update_dict:
-            update_dict['password_hash'] = hash_password(update_dict['password'])
+            update_dict['password_hash'] = await hash_password_async(update_dict['password'])
             del update_dict['password']
         
         # Update in database
         if update_dict:
-            await users_collection.update_one({"id": user_id}, {"$set": update_dict})
-        
-        # Return updated user
-        updated_user_doc = await users_collection.find_one({"id": user_id}, {"_id": 0})
-        if isinstance(updated_user_doc.get('created_at'), str):
-            from app.utils.helpers import parse_datetime_string
-            updated_user_doc['created_at'] = parse_datetime_string(updated_user_doc['created_at'])
+            try:
+                updated_user_doc = await users.update(user_id, update_dict, expected_version)
+            except DuplicateEntryError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
+            user_cache.invalidate(user_id)
+            if updated_user_doc and 'password_hash' in update_dict:
+                await revocation_list.revoke_user(user_id, keep_jti=keep_token)
+        else:
+            updated_user_doc = await users.find_by_id(user_id)
+            if updated_user_doc and expected_version is not None and updated_user_doc.get('version', 1) != expected_version:
+                updated_user_doc = None
+        
+        if not updated_user_doc:
+            # Only a failed conditional write needs the extra lookup to tell 404 from 412
+            if expected_version is not None and await users.find_by_id(user_id):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="User was modified by another request"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         
-        return User(**updated_user_doc)
+        return User(**user_from_document(updated_user_doc))
     
     @staticmethod
     async def delete_user(user_id: str) -> bool:
         """Delete a user"""
-        users_collection = await get_users_collection()
-        result = await users_collection.delete_one({"id": user_id})
+        deleted = await get_user_repository().delete(user_id)
+        user_cache.invalidate(user_id)
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
+        await revocation_list.revoke_user(user_id)
         return True
     
+    @staticmethod
+    async def revoke_sessions(user_id: str, keep_token: Optional[str] = None):
+        """
+        Revoke every access token issued to a user so far
+        
+        Args:
+            user_id: User whose sessions end
+            keep_token: jti of a token to leave valid
+        """
+        if not await get_user_repository().find_by_id(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        await revocation_list.revoke_user(user_id, keep_jti=keep_token)
+    
     @staticmethod
     async def authenticate_user(email: str, password: str) -> User:
         """Authenticate user with email and password"""
-        users_collection = await get_users_collection()
-        user_doc = await users_collection.find_one({"email": email}, {"_id": 0})
+        user_doc = await get_user_repository().find_by_email(email)
         
         if not user_doc:
             raise HTTPException(
@@ -139,14 +178,10 @@ class UserService:
                 detail="Invalid email or password"
             )
         
-        if not verify_password(password, user_doc.get('password_hash', '')):
+        if not await verify_password_async(password, user_doc.get('password_hash', '')):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        if isinstance(user_doc.get('created_at'), str):
-            from app.utils.helpers import parse_datetime_string
-            user_doc['created_at'] = parse_datetime_string(user_doc['created_at'])
-        
-        return User(**user_doc)
+        return User(**user_from_document(user_doc))
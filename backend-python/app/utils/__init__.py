@@ -1,10 +1,34 @@
 """Utilities Package"""
 
 from .constants import *
-from .helpers import calculate_subscription_status, parse_datetime_string, convert_datetime_to_string
+from .helpers import (
+    calculate_subscription_status,
+    parse_datetime_string,
+    convert_datetime_to_string,
+    get_status_date_range,
+    build_status_expression,
+    encode_cursor,
+    decode_cursor,
+    format_etag,
+    parse_if_match,
+    tokenize_search_text,
+    build_search_terms,
+    subscription_search_terms,
+    due_reminder_offset,
+)
 
 __all__ = [
     "calculate_subscription_status",
     "parse_datetime_string",
     "convert_datetime_to_string",
+    "get_status_date_range",
+    "build_status_expression",
+    "encode_cursor",
+    "decode_cursor",
+    "format_etag",
+    "parse_if_match",
+    "tokenize_search_text",
+    "build_search_terms",
+    "subscription_search_terms",
+    "due_reminder_offset",
 ]
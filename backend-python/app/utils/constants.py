@@ -29,14 +29,95 @@ SUBSCRIPTION_DURATIONS = [
     "3 Years"
 ]
 
+# Length of each duration in months, used when renewing
+SUBSCRIPTION_DURATION_MONTHS = {
+    "Monthly": 1,
+    "3 Months": 3,
+    "6 Months": 6,
+    "1 Year": 12,
+    "2 Years": 24,
+    "3 Years": 36
+}
+
 # Subscription statuses
 SUBSCRIPTION_STATUS_UPCOMING = "Upcoming"
 SUBSCRIPTION_STATUS_ACTIVE = "Active"
 SUBSCRIPTION_STATUS_EXPIRING_SOON = "Expiring Soon"
 SUBSCRIPTION_STATUS_EXPIRING_TODAY = "Expiring Today"
 SUBSCRIPTION_STATUS_EXPIRED = "Expired"
+SUBSCRIPTION_STATUSES = [
+    SUBSCRIPTION_STATUS_UPCOMING,
+    SUBSCRIPTION_STATUS_ACTIVE,
+    SUBSCRIPTION_STATUS_EXPIRING_SOON,
+    SUBSCRIPTION_STATUS_EXPIRING_TODAY,
+    SUBSCRIPTION_STATUS_EXPIRED
+]
 
 # Status calculation days
 STATUS_EXPIRING_TODAY_DAYS = 0
 STATUS_EXPIRING_SOON_DAYS = 30
 STATUS_ACTIVE_DAYS = 90
+
+# Pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Export
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = [
+    "id",
+    "client_name",
+    "business_name",
+    "client_email",
+    "client_phone",
+    "price",
+    "paid_date",
+    "renewal_date",
+    "duration",
+    "type",
+    "category",
+    "notes",
+    "status",
+    "created_by",
+    "created_at",
+    "updated_at"
+]
+
+# Migrations
+MIGRATION_BATCH_SIZE = 1000
+
+# Bulk import
+BULK_IMPORT_CHUNK_SIZE = 1000
+BULK_IMPORT_MAX_ERRORS = 1000  # Per-row errors reported; failures beyond this are only counted
+
+# Renewal forecast horizon in months (default and maximum)
+FORECAST_MONTHS = 36
+MAX_FORECAST_MONTHS = 120
+
+# Search
+SUBSCRIPTION_SEARCH_FIELDS = ["client_name", "business_name", "client_email"]  # Prefix typeahead
+SUBSCRIPTION_TEXT_INDEX_WEIGHTS = {  # Full-text search relevance
+    "client_name": 10,
+    "business_name": 10,
+    "client_email": 5,
+    "notes": 1
+}
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Renewal reminders, in days before renewal_date
+DEFAULT_REMINDER_OFFSETS_DAYS = [STATUS_EXPIRING_SOON_DAYS, 7, 1, STATUS_EXPIRING_TODAY_DAYS]
+
+# Notification channels and queue statuses
+NOTIFICATION_CHANNEL_SMTP = "smtp"
+NOTIFICATION_CHANNEL_WEBHOOK = "webhook"
+NOTIFICATION_CHANNEL_FILE = "file"
+NOTIFICATION_CHANNELS = [
+    NOTIFICATION_CHANNEL_SMTP,
+    NOTIFICATION_CHANNEL_WEBHOOK,
+    NOTIFICATION_CHANNEL_FILE
+]
+NOTIFICATION_STATUS_PENDING = "pending"
+NOTIFICATION_STATUS_SENDING = "sending"
+NOTIFICATION_STATUS_SENT = "sent"
+NOTIFICATION_STATUS_FAILED = "failed"
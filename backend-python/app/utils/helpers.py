@@ -1,6 +1,11 @@
 """Helper Functions"""
 
-from datetime import datetime, timezone, timedelta
+import base64
+import json
+import re
+import unicodedata
+from datetime import datetime, timezone, timedelta, date
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 from app.utils.constants import (
     SUBSCRIPTION_STATUS_UPCOMING,
     SUBSCRIPTION_STATUS_ACTIVE,
@@ -9,22 +14,29 @@ from app.utils.constants import (
     SUBSCRIPTION_STATUS_EXPIRED,
     STATUS_EXPIRING_TODAY_DAYS,
     STATUS_EXPIRING_SOON_DAYS,
-    STATUS_ACTIVE_DAYS
+    STATUS_ACTIVE_DAYS,
+    SUBSCRIPTION_SEARCH_FIELDS,
+    DEFAULT_REMINDER_OFFSETS_DAYS
 )
 
 
-def calculate_subscription_status(renewal_date_str: str) -> str:
+def calculate_subscription_status(renewal_date_str: Union[str, date]) -> str:
     """
     Calculate subscription status based on renewal date
     
     Args:
-        renewal_date_str: Renewal date in YYYY-MM-DD format
+        renewal_date_str: Renewal date in YYYY-MM-DD format, or a date/datetime
         
     Returns:
         Status string
     """
     try:
-        renewal_date = datetime.strptime(renewal_date_str, "%Y-%m-%d").date()
+        if isinstance(renewal_date_str, datetime):
+            renewal_date = renewal_date_str.date()
+        elif isinstance(renewal_date_str, date):
+            renewal_date = renewal_date_str
+        else:
+            renewal_date = datetime.strptime(renewal_date_str, "%Y-%m-%d").date()
         today = datetime.now(timezone.utc).date()
         days_diff = (renewal_date - today).days
         
@@ -70,3 +82,203 @@ def convert_datetime_to_string(dt: datetime) -> str:
     if isinstance(dt, datetime):
         return dt.isoformat()
     return dt
+
+
+def get_status_date_range(status: str, today: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Translate a subscription status into the renewal date range it covers
+
+    Mirrors calculate_subscription_status so stored statuses can be
+    recomputed with range queries on renewal_date.
+
+    Args:
+        status: Subscription status
+        today: Reference date (defaults to current UTC date)
+
+    Returns:
+        Tuple of inclusive (start, end) dates, None when unbounded
+
+    Raises:
+        ValueError: If the status is unknown
+    """
+    today = today or datetime.now(timezone.utc).date()
+
+    def offset(days: int) -> date:
+        return today + timedelta(days=days)
+
+    if status == SUBSCRIPTION_STATUS_EXPIRED:
+        return None, offset(STATUS_EXPIRING_TODAY_DAYS - 1)
+    if status == SUBSCRIPTION_STATUS_EXPIRING_TODAY:
+        return offset(STATUS_EXPIRING_TODAY_DAYS), offset(STATUS_EXPIRING_TODAY_DAYS)
+    if status == SUBSCRIPTION_STATUS_EXPIRING_SOON:
+        return offset(STATUS_EXPIRING_TODAY_DAYS + 1), offset(STATUS_EXPIRING_SOON_DAYS)
+    if status == SUBSCRIPTION_STATUS_ACTIVE:
+        return offset(STATUS_EXPIRING_SOON_DAYS + 1), offset(STATUS_ACTIVE_DAYS)
+    if status == SUBSCRIPTION_STATUS_UPCOMING:
+        return offset(STATUS_ACTIVE_DAYS + 1), None
+    raise ValueError(f"Unknown subscription status: {status}")
+
+
+def build_status_expression(field: str, today: Optional[date] = None) -> dict:
+    """
+    Build a MongoDB $switch expression that mirrors calculate_subscription_status
+
+    Args:
+        field: Field path holding the renewal date as a BSON date, e.g. "$renewal_date"
+        today: Reference date (defaults to current UTC date)
+
+    Returns:
+        Aggregation expression evaluating to the status string
+    """
+    today = today or datetime.now(timezone.utc).date()
+    branches = []
+    for status in (
+        SUBSCRIPTION_STATUS_EXPIRED,
+        SUBSCRIPTION_STATUS_EXPIRING_TODAY,
+        SUBSCRIPTION_STATUS_EXPIRING_SOON,
+        SUBSCRIPTION_STATUS_ACTIVE,
+    ):
+        _, end = get_status_date_range(status, today)
+        next_day = end + timedelta(days=1)
+        boundary = datetime(next_day.year, next_day.month, next_day.day, tzinfo=timezone.utc)
+        branches.append({"case": {"$lt": [field, boundary]}, "then": status})
+    return {"$switch": {"branches": branches, "default": SUBSCRIPTION_STATUS_UPCOMING}}
+
+
+def encode_cursor(renewal_date: str, subscription_id: str) -> str:
+    """
+    Encode a pagination cursor
+
+    Args:
+        renewal_date: Renewal date of the last item on the page
+        subscription_id: ID of the last item on the page
+
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    raw = json.dumps([renewal_date, subscription_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a pagination cursor produced by encode_cursor
+
+    Args:
+        cursor: Opaque cursor string
+
+    Returns:
+        Tuple of (renewal_date, subscription_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        renewal_date, subscription_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(renewal_date, str) or not isinstance(subscription_id, str):
+        raise ValueError("Invalid cursor")
+    return renewal_date, subscription_id
+
+
+def format_etag(version: int) -> str:
+    """
+    Format a document version as an HTTP ETag
+
+    Args:
+        version: Document version number
+
+    Returns:
+        Quoted entity tag, e.g. '"3"'
+    """
+    return f'"{version}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """
+    Parse an If-Match header produced from format_etag
+
+    Args:
+        header: Raw If-Match header value
+
+    Returns:
+        Expected document version, or None when the header is absent or "*"
+
+    Raises:
+        ValueError: If the header does not hold a version ETag
+    """
+    if header is None or header.strip() == "*":
+        return None
+
+    tag = header.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError as e:
+        raise ValueError("Invalid If-Match header") from e
+
+
+def tokenize_search_text(text: Optional[str]) -> List[str]:
+    """
+    Split text into normalized search terms
+
+    Terms are lowercased, stripped of accents and split on anything that is not
+    a letter or digit, so "José O'Neil" gives ["jose", "o", "neil"].
+
+    Args:
+        text: Free text
+
+    Returns:
+        Terms in order of appearance
+    """
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.findall(r"[^\W_]+", stripped.casefold())
+
+
+def build_search_terms(values: Iterable[Optional[str]]) -> List[str]:
+    """
+    Build the distinct, sorted search_terms array for a subscription
+
+    Args:
+        values: Values of the searchable fields
+
+    Returns:
+        Distinct normalized terms
+    """
+    terms = set()
+    for value in values:
+        terms.update(tokenize_search_text(value))
+    return sorted(terms)
+
+
+def subscription_search_terms(doc: dict) -> List[str]:
+    """search_terms for a subscription document or dict of its fields"""
+    return build_search_terms(doc.get(field) for field in SUBSCRIPTION_SEARCH_FIELDS)
+
+
+def due_reminder_offset(days_left: int, offsets: Sequence[int] = DEFAULT_REMINDER_OFFSETS_DAYS) -> Optional[int]:
+    """
+    Pick the reminder a subscription is due for
+
+    The due reminder is the nearest offset at or above days_left, i.e. the last
+    threshold the renewal date has crossed. Earlier thresholds are superseded,
+    so a run that was missed for a few days sends one reminder, not several.
+
+    Args:
+        days_left: Days until renewal_date
+        offsets: Reminder offsets in days before renewal
+
+    Returns:
+        Offset in days, or None when no reminder is due
+    """
+    if days_left < 0:
+        return None
+    due = [offset for offset in offsets if offset >= days_left]
+    return min(due) if due else None
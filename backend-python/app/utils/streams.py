@@ -0,0 +1,107 @@
+"""Streaming Row Parsers"""
+
+import codecs
+import csv
+import json
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Iterable, List, Optional, Tuple
+
+# Each parsed row is (data, error): data is a dict on success, otherwise error describes the problem
+ParsedRow = Tuple[Optional[dict], Optional[str]]
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], keep_ends: bool = False) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n" if keep_ends else line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending if keep_ends else pending.rstrip("\r")
+
+
+def _as_row(value: Any) -> ParsedRow:
+    if isinstance(value, dict):
+        return value, None
+    return None, "Row is not a JSON object"
+
+
+async def iter_json_array_rows(items: Iterable[Any]) -> AsyncIterator[ParsedRow]:
+    """Yield rows from an already parsed JSON array"""
+    for item in items:
+        yield _as_row(item)
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """Yield rows from a newline-delimited JSON byte stream, skipping blank lines"""
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield _as_row(json.loads(line))
+        except ValueError as e:
+            yield None, f"Invalid JSON: {e}"
+
+
+class _LineFeed:
+    """Lines queued for a csv.reader, noting when the reader asks for more than were queued"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            self.exhausted = True
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """
+    Yield rows from a CSV byte stream with a header line
+
+    Quoted cells may span lines, as in the /export output for multi-line notes.
+    Empty cells are returned as None so optional fields fall back to their defaults.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header = None
+    record: List[str] = []  # Lines of the record being read
+    # Line ends are kept so line breaks inside quoted cells come through unchanged
+    async for line in _iter_lines(chunks, keep_ends=True):
+        if not record and not line.strip():
+            continue
+        record.append(line)
+        feed.lines.extend(record)
+        feed.exhausted = False
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            feed.lines.clear()
+            record = []
+            yield None, f"Invalid CSV: {e}"
+            continue
+        if feed.exhausted:
+            # A quoted cell is still open; read the record again once its next line arrives
+            if sum(map(len, record)) > csv.field_size_limit():
+                record = []
+                yield None, "Unterminated quoted cell"
+            continue
+        record = []
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield {name: (value if value != "" else None) for name, value in zip(header, values)}, None
+    if record:
+        yield None, "Unterminated quoted cell"
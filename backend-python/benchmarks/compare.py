@@ -0,0 +1,85 @@
+"""
+Benchmark Result Comparison
+
+Compares a benchmark suite result file against a stored baseline. A case
+regresses when its median grows by more than the threshold; medians are used
+because they are far less sensitive to one-off pauses than means or maxima.
+Exits with status 1 if any case regressed.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import sys
+from typing import List, NamedTuple, Optional
+
+DEFAULT_THRESHOLD = 0.2  # 20% slower
+
+
+class Comparison(NamedTuple):
+    case: str
+    baseline_ms: Optional[float]
+    current_ms: Optional[float]
+
+    @property
+    def change(self) -> Optional[float]:
+        """Relative change of the median, e.g. 0.25 for 25% slower"""
+        if not self.baseline_ms or self.current_ms is None:
+            return None
+        return self.current_ms / self.baseline_ms - 1
+
+    def regressed(self, threshold: float) -> bool:
+        return self.change is not None and self.change > threshold
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: dict, current: dict) -> List[Comparison]:
+    """Median per case for every case in either result set, baseline order first"""
+    cases = list(baseline['results']) + [case for case in current['results'] if case not in baseline['results']]
+    return [
+        Comparison(
+            case,
+            baseline['results'].get(case, {}).get('median_ms'),
+            current['results'].get(case, {}).get('median_ms'),
+        )
+        for case in cases
+    ]
+
+
+def report(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> bool:
+    """
+    Print a comparison table
+
+    Returns:
+        True if any case regressed beyond the threshold
+    """
+    for key in ("subscriptions", "seed"):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: baseline {key}={baseline['meta'].get(key)} but current {key}={current['meta'].get(key)}")
+
+    regressed = False
+    print(f"{'case':<44}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row in compare_results(baseline, current):
+        baseline_ms = f"{row.baseline_ms:.2f}ms" if row.baseline_ms is not None else "-"
+        current_ms = f"{row.current_ms:.2f}ms" if row.current_ms is not None else "-"
+        change = f"{row.change:+.1%}" if row.change is not None else "-"
+        flag = ""
+        if row.regressed(threshold):
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{row.case:<44}{baseline_ms:>12}{current_ms:>12}{change:>10}{flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Baseline result file")
+    parser.add_argument("current", help="Result file to check")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed median slowdown")
+    args = parser.parse_args()
+    sys.exit(1 if report(load_results(args.baseline), load_results(args.current), args.threshold) else 0)
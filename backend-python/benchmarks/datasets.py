@@ -0,0 +1,318 @@
+"""
+Synthetic Datasets
+
+Deterministic users and subscriptions for benchmarks and seeding: the same
+size and seed always produce the same ids, names, prices and date offsets.
+Distributions follow what the app sees in practice: domains, SSL and hosting
+dominate the categories, yearly and monthly terms dominate the durations, most
+subscriptions are clients, and live subscriptions renew within one term from
+today while about one in eight has lapsed in the past year. Prices scale with
+the category and the term length.
+
+Documents are in storage representation, ready for insert_many. Each batch is
+generated column-wise with numpy from its own seed, so any batch can be
+produced independently of the others.
+
+One user is generated per thousand subscriptions (at least two); the first is
+an admin. All users share BENCHMARK_PASSWORD.
+"""
+
+import asyncio
+import random
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.security import hash_password
+from app.core.storage import date_to_storage, user_to_document
+from app.utils.constants import (
+    USER_ROLE_ADMIN,
+    USER_ROLE_STAFF,
+    SUBSCRIPTION_TYPE_PERSONAL,
+    SUBSCRIPTION_TYPE_CLIENT,
+    SUBSCRIPTION_TYPE_OFFICIAL,
+    SUBSCRIPTION_CATEGORIES,
+    SUBSCRIPTION_DURATIONS,
+    SUBSCRIPTION_DURATION_MONTHS,
+)
+from app.utils.helpers import calculate_subscription_status, tokenize_search_text
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+SUBSCRIPTION_TYPES = [SUBSCRIPTION_TYPE_CLIENT, SUBSCRIPTION_TYPE_OFFICIAL, SUBSCRIPTION_TYPE_PERSONAL]
+TYPE_WEIGHTS = [0.6, 0.25, 0.15]
+
+# Share of subscriptions and typical monthly price per category
+CATEGORY_WEIGHTS = {
+    "Domain": 0.30,
+    "Hosting Platform": 0.20,
+    "WhatsApp API": 0.08,
+    "SSL": 0.17,
+    "Cloud Service": 0.15,
+    "Others": 0.10,
+}
+CATEGORY_MONTHLY_PRICE = {
+    "Domain": 1.5,
+    "Hosting Platform": 12.0,
+    "WhatsApp API": 25.0,
+    "SSL": 5.0,
+    "Cloud Service": 40.0,
+    "Others": 10.0,
+}
+DURATION_WEIGHTS = {
+    "Monthly": 0.25,
+    "3 Months": 0.08,
+    "6 Months": 0.07,
+    "1 Year": 0.45,
+    "2 Years": 0.10,
+    "3 Years": 0.05,
+}
+LAPSED_SHARE = 0.12
+NOTES_SHARE = 0.3
+
+FIRST_NAMES = [
+    "Aisha", "Ben", "Carlos", "Deepa", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal",
+    "Kofi", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tara",
+]
+LAST_NAMES = [
+    "Ahmed", "Brown", "Chen", "Dubois", "Evans", "Fischer", "Garcia", "Haddad", "Ito", "Jensen",
+    "Khan", "Lopez", "Müller", "Nair", "Okafor", "Patel", "Rossi", "Silva", "Tanaka", "Walker",
+]
+BUSINESS_WORDS = [
+    "Acme", "Blue", "Cedar", "Delta", "Ember", "Falcon", "Granite", "Harbor", "Iris", "Juniper",
+    "Kite", "Lumen", "Maple", "Nova", "Orbit", "Pioneer", "Quartz", "River", "Summit", "Vertex",
+]
+BUSINESS_SUFFIXES = ["Labs", "Studio", "Traders", "Solutions", "Foods", "Logistics", "Media", "Clinic"]
+EMAIL_DOMAINS = ["gmail.com", "outlook.com", "yahoo.com", "company.co", "mail.net"]
+
+assert set(CATEGORY_WEIGHTS) == set(SUBSCRIPTION_CATEGORIES)
+assert set(DURATION_WEIGHTS) == set(SUBSCRIPTION_DURATIONS)
+
+
+def parse_scale(value: str) -> int:
+    """Subscription count from a scale name ("10k") or a plain number"""
+    key = value.strip().lower()
+    if key in SCALES:
+        return SCALES[key]
+    return int(key.replace("_", ""))
+
+
+def user_count(subscriptions: int) -> int:
+    """Users generated alongside a number of subscriptions"""
+    return max(2, subscriptions // 1000)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_users(count: int, seed: int, password_hash: Optional[str] = None) -> List[dict]:
+    """
+    User documents; the first is an admin
+
+    Args:
+        count: Number of users
+        seed: Random seed
+        password_hash: Hash stored for every user (defaults to a hash of BENCHMARK_PASSWORD)
+    """
+    rng = random.Random(f"users:{seed}")
+    password_hash = password_hash or hash_password(BENCHMARK_PASSWORD)
+    created_at = datetime.combine(date.today(), time(), timezone.utc) - timedelta(days=400)
+    users = []
+    for i in range(count):
+        doc = user_to_document({
+            "id": _uuid(rng),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"user{i}@bench.example.com",
+            "phone": f"+1 555 {i:07d}",
+            "role": USER_ROLE_ADMIN if i == 0 else USER_ROLE_STAFF,
+            "access_level": "full",
+            "created_at": created_at,
+            "version": 1,
+        })
+        doc['password_hash'] = password_hash
+        users.append(doc)
+    return users
+
+
+# Names repeat across rows, so their terms are tokenized once
+_cached_terms = lru_cache(maxsize=None)(lambda value: frozenset(tokenize_search_text(value)))
+
+
+def _weights(table: Dict[str, float], keys: List[str]) -> np.ndarray:
+    weights = np.array([table[key] for key in keys])
+    return weights / weights.sum()
+
+
+def generate_subscription_batch(
+    count: int,
+    user_ids: List[str],
+    seed: int,
+    batch_number: int = 0,
+    today: Optional[date] = None
+) -> List[dict]:
+    """
+    One batch of subscription documents
+
+    Args:
+        count: Documents in the batch
+        user_ids: Creators, assigned at random
+        seed: Dataset seed
+        batch_number: Position of the batch; each batch has its own random stream
+        today: Day the dates are laid out around (defaults to today)
+    """
+    rng = np.random.default_rng([seed, batch_number])
+    today = today or date.today()
+    midnight = datetime.combine(today, time(), timezone.utc)
+
+    categories = rng.choice(len(SUBSCRIPTION_CATEGORIES), count, p=_weights(CATEGORY_WEIGHTS, SUBSCRIPTION_CATEGORIES))
+    durations = rng.choice(len(SUBSCRIPTION_DURATIONS), count, p=_weights(DURATION_WEIGHTS, SUBSCRIPTION_DURATIONS))
+    types = rng.choice(len(SUBSCRIPTION_TYPES), count, p=TYPE_WEIGHTS)
+    months = np.array([SUBSCRIPTION_DURATION_MONTHS[d] for d in SUBSCRIPTION_DURATIONS])[durations]
+    term_days = months * 30
+
+    # Live subscriptions renew within one term; lapsed ones expired within the last year
+    lapsed = rng.random(count) < LAPSED_SHARE
+    renewal_offsets = np.where(
+        lapsed,
+        -rng.integers(1, 366, count),
+        (rng.random(count) * term_days).astype(np.int64)
+    )
+    paid_offsets = renewal_offsets - term_days
+    monthly = np.array([CATEGORY_MONTHLY_PRICE[c] for c in SUBSCRIPTION_CATEGORIES])[categories]
+    prices = np.round(monthly * months * months ** -0.1 * rng.lognormal(0, 0.5, count), 2)
+    created_seconds = rng.integers(0, 3 * 365 * 86400, count)
+
+    firsts = rng.integers(0, len(FIRST_NAMES), count)
+    lasts = rng.integers(0, len(LAST_NAMES), count)
+    words = rng.integers(0, len(BUSINESS_WORDS), count)
+    suffixes = rng.integers(0, len(BUSINESS_SUFFIXES), count)
+    email_numbers = rng.integers(1, 1000, count)
+    domains = rng.integers(0, len(EMAIL_DOMAINS), count)
+    phones = rng.integers(0, 10_000_000, count)
+    creators = rng.integers(0, len(user_ids), count)
+    notes = np.where(rng.random(count) < NOTES_SHARE, rng.integers(1000, 10_000, count), 0)
+    # Random UUIDs: version 4, RFC 4122 variant
+    id_bytes = rng.integers(0, 256, (count, 16), dtype=np.uint8)
+    id_bytes[:, 6] = (id_bytes[:, 6] & 0x0F) | 0x40
+    id_bytes[:, 8] = (id_bytes[:, 8] & 0x3F) | 0x80
+    id_hex = id_bytes.tobytes().hex()
+
+    day_cache: Dict[int, tuple] = {}
+
+    def day(offset: int) -> tuple:
+        """Stored date and status for a day offset from today"""
+        if offset not in day_cache:
+            value = today + timedelta(days=offset)
+            day_cache[offset] = (date_to_storage(value), calculate_subscription_status(value))
+        return day_cache[offset]
+
+    batch = []
+    columns = zip(
+        categories.tolist(), durations.tolist(), types.tolist(), renewal_offsets.tolist(), paid_offsets.tolist(),
+        prices.tolist(), created_seconds.tolist(), firsts.tolist(), lasts.tolist(), words.tolist(),
+        suffixes.tolist(), email_numbers.tolist(), domains.tolist(), phones.tolist(), creators.tolist(),
+        notes.tolist()
+    )
+    for i, (category, duration, sub_type, renewal, paid, price, created, first, last, word, suffix,
+            number, domain, phone, creator, note) in enumerate(columns):
+        renewal_date, status = day(renewal)
+        created_at = midnight - timedelta(seconds=created)
+        client_name = f"{FIRST_NAMES[first]} {LAST_NAMES[last]}"
+        business_name = f"{BUSINESS_WORDS[word]} {BUSINESS_SUFFIXES[suffix]}"
+        local_part = FIRST_NAMES[first].lower()
+        client_email = f"{local_part}.{number}@{EMAIL_DOMAINS[domain]}"
+        batch.append({
+            "id": f"{id_hex[32 * i:32 * i + 8]}-{id_hex[32 * i + 8:32 * i + 12]}-{id_hex[32 * i + 12:32 * i + 16]}"
+                  f"-{id_hex[32 * i + 16:32 * i + 20]}-{id_hex[32 * i + 20:32 * i + 32]}",
+            "client_name": client_name,
+            "business_name": business_name,
+            "client_email": client_email,
+            "client_phone": f"+1 555 {phone:07d}",
+            "price": price,
+            "paid_date": day(paid)[0],
+            "renewal_date": renewal_date,
+            "duration": SUBSCRIPTION_DURATIONS[duration],
+            "type": SUBSCRIPTION_TYPES[sub_type],
+            "category": SUBSCRIPTION_CATEGORIES[category],
+            "notes": f"Account {note}" if note else None,
+            "status": status,
+            "created_by": user_ids[creator],
+            "created_at": created_at,
+            "updated_at": created_at,
+            "version": 1,
+            # Same terms as subscription_search_terms; the email's separators split terms anyway
+            "search_terms": sorted(
+                _cached_terms(client_name) | _cached_terms(business_name) | _cached_terms(local_part)
+                | _cached_terms(str(number)) | _cached_terms(EMAIL_DOMAINS[domain])
+            ),
+        })
+    return batch
+
+
+def generate_subscriptions(
+    count: int,
+    user_ids: List[str],
+    seed: int,
+    batch_size: int = 10_000
+) -> Iterator[List[dict]]:
+    """
+    Subscription documents in batches, so a million rows never sit in memory at once
+
+    Args:
+        count: Number of subscriptions
+        user_ids: Creators, assigned at random
+        seed: Random seed
+        batch_size: Documents per yielded batch
+    """
+    today = date.today()
+    for batch_number, start in enumerate(range(0, count, batch_size)):
+        yield generate_subscription_batch(min(batch_size, count - start), user_ids, seed, batch_number, today)
+
+
+async def load_dataset(
+    db: AsyncIOMotorDatabase,
+    subscriptions: int,
+    seed: int,
+    batch_size: int = 10_000,
+    concurrency: int = 4,
+    users: Optional[int] = None
+) -> List[dict]:
+    """
+    Insert a generated dataset into the users and subscriptions collections
+
+    Up to `concurrency` insert_many batches are in flight at once while the
+    next batch is generated.
+
+    Args:
+        users: Number of users (defaults to user_count(subscriptions))
+
+    Returns:
+        The user documents, admin first
+    """
+    users = generate_users(users or user_count(subscriptions), seed)
+    await db.users.insert_many([dict(user) for user in users], ordered=False)
+
+    slots = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def insert(batch: List[dict]):
+        try:
+            await db.subscriptions.insert_many(batch, ordered=False)
+        finally:
+            slots.release()
+
+    user_ids = [user['id'] for user in users]
+    for batch in generate_subscriptions(subscriptions, user_ids, seed, batch_size):
+        await slots.acquire()
+        tasks.append(asyncio.create_task(insert(batch)))
+        # Let the insert start before generating the next batch
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return users
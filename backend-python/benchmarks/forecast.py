@@ -0,0 +1,59 @@
+"""
+Renewal Forecast Benchmark
+
+Times the in-process part of the renewal forecast on synthetic subscriptions:
+collapsing rows per (renewal month, duration, category, type), projecting
+recurring renewals and summarizing per month. In the service the collapse runs
+in MongoDB, so this is an upper bound on the Python-side cost.
+
+    python -m benchmarks.forecast --rows 1000000
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics_service import month_index, project_renewals, summarize_forecast
+from app.utils.constants import FORECAST_MONTHS, SUBSCRIPTION_CATEGORIES, SUBSCRIPTION_DURATIONS
+
+TYPES = ["Personal", "Client", "Official"]
+
+
+def make_frame(rows: int, start_month: int, seed: int) -> pd.DataFrame:
+    """One row per subscription, renewing within the next three years"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "month": start_month + rng.integers(0, 36, rows),
+        "duration": pd.Categorical.from_codes(rng.integers(0, len(SUBSCRIPTION_DURATIONS), rows), SUBSCRIPTION_DURATIONS),
+        "category": pd.Categorical.from_codes(rng.integers(0, len(SUBSCRIPTION_CATEGORIES), rows), SUBSCRIPTION_CATEGORIES),
+        "type": pd.Categorical.from_codes(rng.integers(0, len(TYPES), rows), TYPES),
+        "price": rng.uniform(5, 500, rows).round(2),
+        "count": np.ones(rows, dtype=np.int64),
+    })
+
+
+def main(args):
+    today = datetime.now(timezone.utc).date()
+    start_month = month_index(today.year, today.month)
+    frame = make_frame(args.rows, start_month, args.seed)
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        forecast = summarize_forecast(project_renewals(frame, start_month, args.months), start_month, args.months)
+        timings.append(time.perf_counter() - started)
+
+    print(f"rows={args.rows}  months={args.months}  total_revenue={forecast.total_revenue:,.2f}")
+    print(f"best={min(timings) * 1000:.1f}ms  median={float(np.median(timings)) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic subscriptions")
+    parser.add_argument("--months", type=int, default=FORECAST_MONTHS, help="Forecast horizon")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+"""
+Login Contention Benchmark
+
+Measures latency of concurrent GET /api/subscriptions reads, first on their own
+and then while a storm of logins is in flight. With bcrypt running on the event
+loop the second phase's p99 grows by roughly the hashing time of every queued
+login; with the password hashing pool it should stay close to the baseline.
+
+With login rate limiting enabled (the default) all but the first few storm
+logins are answered with 429 before any hashing, so the storm phase mostly
+measures how cheaply rejections are served; the per-status login counts show
+the split. Set LOGIN_RATE_LIMIT_ENABLED=False on the server to measure the
+hashing pool alone. The limit also applies to the benchmark's own initial
+login, so wait for the window to pass between runs.
+
+Run against a running server:
+
+    python -m benchmarks.login_contention --base-url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+
+from app.core.config import ADMIN_EMAIL, ADMIN_PASSWORD
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> httpx.Response:
+    return await client.post("/api/auth/login", json={"email": email, "password": password})
+
+
+async def reader(client: httpx.AsyncClient, token: str, stop_at: float, latencies: List[float]):
+    """Issue list requests back to back until stop_at, recording latency in ms"""
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.get("/api/subscriptions", params={"limit": 50}, headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def login_storm(client: httpx.AsyncClient, email: str, password: str, stop_at: float, counts: dict):
+    """Log in back to back until stop_at, counting responses by status code"""
+    while time.perf_counter() < stop_at:
+        response = await login(client, email, password)
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+async def run_phase(args, token: str, with_logins: bool) -> dict:
+    latencies: List[float] = []
+    login_counts: dict = {}
+    limits = httpx.Limits(max_connections=args.readers + args.logins)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + args.duration
+        tasks = [reader(client, token, stop_at, latencies) for _ in range(args.readers)]
+        if with_logins:
+            tasks += [
+                login_storm(client, args.email, args.password, stop_at, login_counts)
+                for _ in range(args.logins)
+            ]
+        await asyncio.gather(*tasks)
+
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "logins": login_counts,
+    }
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        response = await login(client, args.email, args.password)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    for name, with_logins in (("reads only", False), ("reads + login storm", True)):
+        result = await run_phase(args, token, with_logins)
+        print(
+            f"{name:>20}: {result['requests']:>6} reads  "
+            f"p50={result['p50_ms']:.1f}ms  p95={result['p95_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms"
+            + (f"  logins={result['logins']}" if with_logins else "")
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default=ADMIN_EMAIL)
+    parser.add_argument("--password", default=ADMIN_PASSWORD)
+    parser.add_argument("--readers", type=int, default=10, help="Concurrent readers")
+    parser.add_argument("--logins", type=int, default=20, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,124 @@
+"""
+Serialization Benchmark
+
+Compares ways of turning a page of subscription documents into a JSON body:
+
+- response_model: build Subscription models one by one and let FastAPI validate
+  and encode them again through response_model (the original list endpoint)
+- model_dump_json: build the page model once and serialize it with pydantic
+- type_adapter: validate and serialize the list in single TypeAdapter calls
+- orjson: encode_subscription_page, the list endpoint's fast path, which
+  encodes the projected documents without building models
+
+and, for the NDJSON export, json.dumps against orjson per row.
+
+    python -m benchmarks.serialization --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas.subscription import Subscription, SubscriptionPage
+from app.services.subscription_service import encode_subscription_page, subscription_list_adapter
+from app.utils.constants import SUBSCRIPTION_CATEGORIES, SUBSCRIPTION_DURATIONS
+
+
+def make_docs(count: int) -> List[dict]:
+    """Subscription documents in API representation, as returned by the database layer"""
+    now = datetime.now(timezone.utc)
+    start = date.today()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "client_name": f"Client {i}",
+            "business_name": f"Business {i}",
+            "client_email": f"client{i}@example.com",
+            "client_phone": "+1 555 0100",
+            "price": 10.0 + i % 500,
+            "paid_date": (start - timedelta(days=i % 365)).isoformat(),
+            "renewal_date": (start + timedelta(days=i % 730)).isoformat(),
+            "duration": SUBSCRIPTION_DURATIONS[i % len(SUBSCRIPTION_DURATIONS)],
+            "type": "Client",
+            "category": SUBSCRIPTION_CATEGORIES[i % len(SUBSCRIPTION_CATEGORIES)],
+            "notes": None,
+            "status": "Active",
+            "created_by": "admin",
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        }
+        for i in range(count)
+    ]
+
+
+async def response_model_path(docs: List[dict]) -> bytes:
+    page = SubscriptionPage(items=[Subscription(**doc) for doc in docs], next_cursor=None, limit=len(docs))
+    field = create_response_field(name="Response", type_=SubscriptionPage)
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def model_dump_json_path(docs: List[dict]) -> bytes:
+    page = SubscriptionPage(items=[Subscription(**doc) for doc in docs], next_cursor=None, limit=len(docs))
+    return page.model_dump_json().encode()
+
+
+async def type_adapter_path(docs: List[dict]) -> bytes:
+    items = subscription_list_adapter.dump_json(subscription_list_adapter.validate_python(docs))
+    return b'{"items":' + items + b',"next_cursor":null,"limit":' + str(len(docs)).encode() + b"}"
+
+
+async def orjson_path(docs: List[dict]) -> bytes:
+    return encode_subscription_page(docs, None, len(docs))
+
+
+async def ndjson_json_dumps(docs: List[dict]) -> bytes:
+    rows = [{**doc, "created_at": doc["created_at"].isoformat(), "updated_at": doc["updated_at"].isoformat()} for doc in docs]
+    return ("\n".join(json.dumps(row, separators=(",", ":")) for row in rows) + "\n").encode()
+
+
+async def ndjson_orjson(docs: List[dict]) -> bytes:
+    rows = [{**doc, "created_at": doc["created_at"].isoformat(), "updated_at": doc["updated_at"].isoformat()} for doc in docs]
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+async def best_of(func: Callable, docs: List[dict], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func(docs)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+async def main(args):
+    paths = [
+        ("list: response_model", response_model_path),
+        ("list: model_dump_json", model_dump_json_path),
+        ("list: type_adapter", type_adapter_path),
+        ("list: orjson", orjson_path),
+        ("ndjson: json.dumps", ndjson_json_dumps),
+        ("ndjson: orjson", ndjson_orjson),
+    ]
+    print(f"{'path':<24}" + "".join(f"{size:>12,}" for size in args.sizes))
+    docs_by_size = {size: make_docs(size) for size in args.sizes}
+    for name, func in paths:
+        timings = [await best_of(func, docs_by_size[size], args.repeat) for size in args.sizes]
+        print(f"{name:<24}" + "".join(f"{ms:>10.1f}ms" for ms in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size; best is reported")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,301 @@
+"""
+Service and Route Benchmark Suite
+
+Loads a deterministic synthetic dataset (benchmarks.datasets) into a dedicated
+database on a local mongod and times the service methods and API routes that
+matter for everyday use: list, get, update, search, dashboard stats and login,
+plus calculate_subscription_status on its own. Routes are called in-process
+through the ASGI app, so middleware, dependencies and serialization are
+included but no network hop is.
+
+    python -m benchmarks.suite --scale 10k --output results-10k.json
+    python -m benchmarks.suite --scale 10k --baseline results-10k.json --threshold 0.2
+
+The dataset is kept between runs and only regenerated when the scale, seed or
+day changes (or with --reload). Results are written as JSON with the median,
+p95, min and mean per case; with --baseline the run is compared against a
+previous result file and exits with status 1 on a regression.
+
+Route list and stats calls clear the response cache before every call so each
+one reaches the database; the "(cached)" cases measure the cache hit path.
+Login is dominated by bcrypt and runs fewer iterations. Update cases only
+change notes, so the dataset stays comparable across runs.
+
+Search routes have a latency target: at SEARCH_TARGET_SCALE subscriptions or
+more, a search case with a median above SEARCH_TARGET_MS fails the run. The
+typeahead cases include a one-letter query, the broadest prefix search there is.
+
+    python -m benchmarks.suite --scale 100k --only search
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+import main
+from app.core import rate_limit
+from app.core.cache import response_cache
+from app.core.config import DB_NAME
+from app.core.database import connect_db, close_db, get_db
+from app.core.migrations import run_migrations, stop_background_migrations
+from app.core.security import create_access_token
+from app.repositories import open_repositories, close_repositories
+from app.schemas.subscription import SubscriptionFilters, SubscriptionUpdate
+from app.services.subscription_service import SubscriptionService
+from app.services.user_service import UserService
+from app.utils.constants import SUBSCRIPTION_STATUS_EXPIRED
+from app.utils.helpers import calculate_subscription_status
+from benchmarks.compare import DEFAULT_THRESHOLD, report
+from benchmarks.datasets import BENCHMARK_PASSWORD, load_dataset, parse_scale
+
+DATASET_META = "_benchmark_dataset"
+SAMPLE_IDS = 1000
+STATUS_DATES = 10_000
+
+# Search latency target, checked from this dataset size up
+SEARCH_TARGET_MS = 20
+SEARCH_TARGET_SCALE = 100_000
+SEARCH_CASE_PREFIX = "route GET /api/subscriptions/search"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> dict:
+    """Per-case statistics in milliseconds"""
+    return {
+        "iterations": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "min_ms": round(min(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+async def time_case(func: Callable[[], Awaitable], iterations: int, warmup: int) -> dict:
+    """Run func warmup + iterations times and summarize the timed calls"""
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+# ============ Dataset ============
+
+async def prepare_dataset(subscriptions: int, seed: int, reload: bool) -> dict:
+    """
+    Make sure the database holds the requested dataset, regenerating it if needed
+
+    Returns:
+        The dataset description stored alongside it
+    """
+    db = get_db()
+    wanted = {"_id": "dataset", "subscriptions": subscriptions, "seed": seed, "day": date.today().isoformat()}
+    current = await db[DATASET_META].find_one({"_id": "dataset"})
+    if current == wanted and not reload:
+        return wanted
+
+    print(f"Generating {subscriptions:,} subscriptions (seed {seed})...")
+    started = time.perf_counter()
+    await db.client.drop_database(db.name)
+    await run_migrations()
+    await load_dataset(db, subscriptions, seed)
+    await db[DATASET_META].replace_one({"_id": "dataset"}, wanted, upsert=True)
+    print(f"Dataset loaded in {time.perf_counter() - started:.1f}s")
+    return wanted
+
+
+async def sample_ids(seed: int) -> List[str]:
+    """Subscription ids spread over the collection, in a deterministic order"""
+    db = get_db()
+    docs = await db.subscriptions.aggregate([
+        {"$sample": {"size": SAMPLE_IDS}},
+        {"$project": {"_id": 0, "id": 1}},
+    ]).to_list(None)
+    ids = sorted(doc['id'] for doc in docs)
+    random.Random(seed).shuffle(ids)
+    return ids
+
+
+# ============ Cases ============
+
+def build_cases(client: httpx.AsyncClient, ids: List[str], admin: dict, headers: dict) -> Dict[str, tuple]:
+    """Case name -> (callable, iterations factor)"""
+    next_id = itertools.cycle(ids).__next__
+    admin_email = admin['email']
+    statuses_from = date.today() - timedelta(days=STATUS_DATES // 2)
+    status_dates = [statuses_from + timedelta(days=i % 1000) for i in range(STATUS_DATES)]
+
+    async def status_batch():
+        for renewal_date in status_dates:
+            calculate_subscription_status(renewal_date)
+
+    async def update_notes():
+        await SubscriptionService.update_subscription(next_id(), SubscriptionUpdate(notes=f"bench {time.time_ns()}"))
+
+    async def route(method: str, path: str, clear_cache: bool = False, **kwargs):
+        if clear_cache:
+            response_cache.clear()
+        response = await client.request(method, path, headers=headers, **kwargs)
+        response.raise_for_status()
+
+    async def login():
+        response = await client.post("/api/auth/login", json={"email": admin_email, "password": BENCHMARK_PASSWORD})
+        response.raise_for_status()
+
+    return {
+        f"helpers.calculate_subscription_status x{STATUS_DATES}": (status_batch, 1),
+        "service.get_subscriptions": (lambda: SubscriptionService.get_subscriptions(limit=50), 1),
+        "service.get_subscriptions expired": (
+            lambda: SubscriptionService.get_subscriptions(SubscriptionFilters(status=SUBSCRIPTION_STATUS_EXPIRED), limit=50), 1
+        ),
+        "service.get_subscription_by_id": (lambda: SubscriptionService.get_subscription_by_id(next_id()), 1),
+        "service.update_subscription": (update_notes, 1),
+        "service.search_subscriptions prefix": (lambda: SubscriptionService.search_subscriptions("acme lab", "prefix"), 1),
+        "service.get_dashboard_stats": (SubscriptionService.get_dashboard_stats, 0.2),
+        "service.authenticate_user": (lambda: UserService.authenticate_user(admin_email, BENCHMARK_PASSWORD), 0.1),
+        "route GET /api/subscriptions": (lambda: route("GET", "/api/subscriptions", True, params={"limit": 50}), 1),
+        "route GET /api/subscriptions (cached)": (lambda: route("GET", "/api/subscriptions", params={"limit": 50}), 1),
+        "route GET /api/subscriptions/{id}": (lambda: route("GET", f"/api/subscriptions/{next_id()}"), 1),
+        "route PUT /api/subscriptions/{id}": (
+            lambda: route("PUT", f"/api/subscriptions/{next_id()}", json={"notes": f"bench {time.time_ns()}"}), 1
+        ),
+        SEARCH_CASE_PREFIX: (
+            lambda: route("GET", "/api/subscriptions/search", params={"q": "acme lab", "mode": "prefix"}), 1
+        ),
+        f"{SEARCH_CASE_PREFIX} 1 char": (
+            lambda: route("GET", "/api/subscriptions/search", params={"q": "a", "mode": "prefix"}), 1
+        ),
+        f"{SEARCH_CASE_PREFIX} 2 terms": (
+            lambda: route("GET", "/api/subscriptions/search", params={"q": "ce stu", "mode": "prefix"}), 1
+        ),
+        f"{SEARCH_CASE_PREFIX} text": (
+            lambda: route("GET", "/api/subscriptions/search", params={"q": "acme labs", "mode": "text"}), 1
+        ),
+        "route GET /api/dashboard/stats": (lambda: route("GET", "/api/dashboard/stats", True), 0.2),
+        "route POST /api/auth/login": (login, 0.1),
+    }
+
+
+def search_target_misses(result: dict) -> List[str]:
+    """Search cases whose median is over SEARCH_TARGET_MS on a dataset of SEARCH_TARGET_SCALE or more"""
+    if result['meta']['subscriptions'] < SEARCH_TARGET_SCALE:
+        return []
+    return [
+        name for name, summary in result['results'].items()
+        if name.startswith(SEARCH_CASE_PREFIX) and summary['median_ms'] > SEARCH_TARGET_MS
+    ]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args) -> dict:
+    subscriptions = parse_scale(args.scale)
+    dataset = await prepare_dataset(subscriptions, args.seed, args.reload)
+    ids = await sample_ids(args.seed)
+    admin = await get_db().users.find_one({"role": "admin"}, {"_id": 0, "id": 1, "email": 1})
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': admin['id']})}"}
+
+    # Every login comes from the same client and account
+    rate_limit.LOGIN_RATE_LIMIT_ENABLED = False
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        for name, (func, factor) in build_cases(client, ids, admin, headers).items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            iterations = max(3, int(args.iterations * factor))
+            results[name] = await time_case(func, iterations, warmup=max(1, iterations // 10))
+            print(f"{name:<44}median={results[name]['median_ms']:>9.2f}ms  p95={results[name]['p95_ms']:>9.2f}ms")
+
+    build_info = await get_db().command("buildInfo")
+    return {
+        "meta": {
+            "subscriptions": subscriptions,
+            "seed": args.seed,
+            "dataset_day": dataset['day'],
+            "iterations": args.iterations,
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongodb": build_info.get("version"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+async def main_async(args) -> int:
+    if args.db == DB_NAME:
+        print(f"Refusing to benchmark against the application database '{DB_NAME}'; pass another --db")
+        return 2
+
+    await connect_db(args.mongo_url, args.db)
+    # The dataset is loaded into MongoDB, so the services run on the mongo backend
+    await open_repositories("mongo")
+    try:
+        result = await run_suite(args)
+    finally:
+        await stop_background_migrations()
+        await close_repositories()
+        await close_db()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    status = 0
+    for name in search_target_misses(result):
+        print(f"{name}: median {result['results'][name]['median_ms']:.2f}ms is over the {SEARCH_TARGET_MS}ms target")
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        if report(baseline, result, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or a number of subscriptions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="subscription_manager_bench", help="Database to load the dataset into")
+    parser.add_argument("--reload", action="store_true", help="Regenerate the dataset even if it is current")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per case (fewer for slow cases)")
+    parser.add_argument("--only", nargs="+", help="Run only cases whose name contains one of these")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this result file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed median slowdown")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
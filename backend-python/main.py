@@ -3,6 +3,7 @@
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 from starlette.middleware.cors import CORSMiddleware
 
 from app.core.config import (
@@ -13,12 +14,26 @@ from app.core.config import (
     LOG_LEVEL,
     LOG_FORMAT,
     ADMIN_EMAIL,
-    ADMIN_PASSWORD
+    ADMIN_PASSWORD,
+    REMINDER_INTERVAL_SECONDS,
+    STARTUP_LOCK_HOLD_SECONDS,
+    METRICS_ENABLED,
+    REPOSITORY_BACKEND
 )
-from app.core.database import connect_db, close_db
+from app.core.database import connect_db, close_db, pool_stats
+from app.core.migrations import run_migrations, stop_background_migrations
+from app.core.scheduler import scheduler
+from app.core.locks import run_exclusive
+from app.core.metrics import registry, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.core.cache import user_cache, response_cache
+from app.core.events import subscription_events
+from app.core.notifications import notification_workers
+from app.core.revocation import revocation_list
+from app.repositories import open_repositories, close_repositories, repository_backend
 from app.api.endpoints import api_router
 from app.services.user_service import UserService
-from app.core.security import hash_password
+from app.services.subscription_service import SubscriptionService
+from app.core.security import shutdown_password_executor, verify_password_async
 
 # Configure logging
 logging.basicConfig(
@@ -36,15 +51,51 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Starting application...")
-    await connect_db()
-    await create_default_admin()
+    # Only the mongo backend needs a MongoDB connection and its migrations
+    uses_mongo = REPOSITORY_BACKEND == "mongo"
+    if uses_mongo:
+        await connect_db()
+    await open_repositories(REPOSITORY_BACKEND)
+    if uses_mongo:
+        applied = await run_migrations()
+        if applied:
+            logger.info(f"Applied database migrations: {applied}")
+    await revocation_list.start()
+    # One worker creates the admin; workers starting within the hold period skip it
+    await run_exclusive("startup:create_default_admin", create_default_admin, hold_for=STARTUP_LOCK_HOLD_SECONDS)
+    
+    # Jobs run on the elected scheduler leader only. The leader recomputes statuses
+    # when elected, catching up on days missed while the app was down
+    scheduler.add_daily_job("recompute_statuses", SubscriptionService.recompute_statuses)
+    
+    # Every worker delivers reminders; the queue dedupes and claims atomically
+    if not uses_mongo:
+        logger.info("Renewal reminders need the mongo repository backend, reminders disabled")
+    elif notification_workers.start():
+        scheduler.add_interval_job(
+            "enqueue_reminders",
+            notification_workers.enqueue_due_reminders,
+            REMINDER_INTERVAL_SECONDS
+        )
+    else:
+        logger.info("No notification channels configured, renewal reminders disabled")
+    scheduler.start()
+    subscription_events.start()
     logger.info(f"{APP_NAME} v{APP_VERSION} started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
-    await close_db()
+    await subscription_events.stop()
+    await revocation_list.stop()
+    await scheduler.stop()
+    await notification_workers.stop()
+    await stop_background_migrations()
+    shutdown_password_executor()
+    await close_repositories()
+    if uses_mongo:
+        await close_db()
     logger.info("Application stopped")
 
 
@@ -66,6 +117,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request latency per route (outermost, so CORS handling is included)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router)
 
@@ -85,10 +140,26 @@ async def health():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "version": APP_VERSION
+        "version": APP_VERSION,
+        "user_cache": user_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "events": subscription_events.stats(),
+        "notifications": notification_workers.stats(),
+        "scheduler": scheduler.stats(),
+        "revocations": revocation_list.stats(),
+        "repository_backend": repository_backend(),
+        "mongo_pool": pool_stats.stats()
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus text-format metrics for this worker process"""
+    if not METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 async def create_default_admin():
     """Create default admin user on startup"""
     try:
@@ -119,7 +190,10 @@ async def create_default_admin():
         if existing_admin:
             # 3. Update existing admin password
             user_id = existing_admin.get('id')
-            if user_id:
+            if user_id and await verify_password_async(password, existing_admin.get('password_hash', '')):
+                # Unchanged; updating would needlessly sign the admin out everywhere
+                logger.info(f"Default admin password unchanged: {ADMIN_EMAIL}")
+            elif user_id:
                 try:
                     update_data = UserUpdate(password=password)
                     await UserService.update_user(user_id, update_data)
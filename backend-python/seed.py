@@ -0,0 +1,263 @@
+"""
+Database Seeding CLI
+
+Fills a database with realistic synthetic users and subscriptions, and takes
+and restores snapshots, to reproduce production-size issues locally.
+
+    python seed.py generate --subscriptions 1m --drop
+    python seed.py dump snapshots/1m [--gzip]
+    python seed.py restore snapshots/1m --drop
+
+generate uses the deterministic datasets from benchmarks.datasets (realistic
+category, duration, type, price and renewal date distributions) and writes
+them in parallel insert_many batches. Into an empty subscriptions collection
+it loads without secondary indexes and builds them once at the end, which is
+much faster than maintaining the search and text indexes per insert. All
+generated users log in with the password "benchmark-password"; the first one
+(user0@bench.example.com) is an admin.
+
+A snapshot is a directory with one <collection>.bson file per collection (raw
+BSON documents back to back, the mongodump format) and a
+<collection>.metadata.json holding its index definitions. Documents are copied
+as raw BSON, without decoding them into Python objects.
+
+MONGO_URL and DB_NAME are used unless --mongo-url / --db are given.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+import bson
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel, TEXT
+
+from app.core.config import MONGO_URL, DB_NAME
+from app.core.database import connect_db, close_db, get_db
+from app.core.migrations import run_migrations, stop_background_migrations
+from app.repositories import open_repositories, close_repositories
+from benchmarks.datasets import load_dataset, parse_scale
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+
+def rate(count: int, seconds: float) -> str:
+    return f"{count:,} documents in {seconds:.1f}s ({count / seconds if seconds else 0:,.0f}/s)"
+
+
+# ============ Indexes ============
+
+def index_model(spec: dict) -> IndexModel:
+    """
+    Rebuild an IndexModel from an index definition as returned by list_indexes
+
+    Text indexes are listed with internal _fts/_ftsx keys; the indexed fields
+    are recovered from their weights.
+    """
+    options = {k: v for k, v in spec.items() if k not in ("key", "v", "ns")}
+    keys = list(spec['key'].items())
+    if ("_fts", "text") in keys:
+        position = keys.index(("_fts", "text"))
+        text_keys = [(field, TEXT) for field in spec.get('weights', {})]
+        keys = keys[:position] + text_keys + [key for key in keys[position + 1:] if key[0] != "_ftsx"]
+    return IndexModel(keys, **options)
+
+
+async def secondary_indexes(collection) -> List[dict]:
+    """Index definitions of a collection, other than the _id index"""
+    return [dict(spec) async for spec in collection.list_indexes() if spec['name'] != "_id_"]
+
+
+async def create_indexes(collection, specs: List[dict]):
+    if specs:
+        await collection.create_indexes([index_model(spec) for spec in specs])
+
+
+# ============ Generate ============
+
+async def generate(args) -> int:
+    db = get_db()
+    if args.drop:
+        await db.client.drop_database(db.name)
+    # Indexes and migration records as in a real deployment
+    await run_migrations()
+
+    subscriptions = parse_scale(args.subscriptions)
+    deferred = []
+    if not args.keep_indexes and await db.subscriptions.estimated_document_count() == 0:
+        deferred = await secondary_indexes(db.subscriptions)
+        await db.subscriptions.drop_indexes()
+
+    print(f"Generating {subscriptions:,} subscriptions (seed {args.seed})...")
+    started = time.perf_counter()
+    try:
+        users = await load_dataset(db, subscriptions, args.seed, args.batch_size, args.concurrency, args.users)
+    finally:
+        if deferred:
+            loaded = time.perf_counter()
+            print(f"Inserted {rate(subscriptions, loaded - started)}; building {len(deferred)} indexes...")
+            await create_indexes(db.subscriptions, deferred)
+            print(f"Indexes built in {time.perf_counter() - loaded:.1f}s")
+    print(f"Seeded {len(users):,} users and {rate(subscriptions, time.perf_counter() - started)} in total")
+    print(f"Admin login: {users[0]['email']} / benchmark-password")
+    return 0
+
+
+# ============ Dump ============
+
+async def dump_collection(name: str, directory: Path, compress: bool, batch_size: int) -> int:
+    db = get_db()
+    collection = db.get_collection(name, codec_options=RAW_CODEC)
+    path = directory / f"{name}.bson{'.gz' if compress else ''}"
+    count = 0
+    with (gzip.open(path, "wb", compresslevel=1) if compress else open(path, "wb")) as f:
+        chunk = []
+        async for doc in collection.find({}, batch_size=batch_size):
+            chunk.append(doc.raw)
+            if len(chunk) >= batch_size:
+                await asyncio.to_thread(f.write, b"".join(chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            await asyncio.to_thread(f.write, b"".join(chunk))
+            count += len(chunk)
+
+    indexes = await secondary_indexes(db[name])
+    (directory / f"{name}.metadata.json").write_text(json_util.dumps({"indexes": indexes}, indent=2))
+    return count
+
+
+async def dump(args) -> int:
+    db = get_db()
+    directory = Path(args.path)
+    directory.mkdir(parents=True, exist_ok=True)
+    names = [name for name in await db.list_collection_names() if not name.startswith("system.")]
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(dump_collection(name, directory, args.gzip, args.batch_size) for name in names))
+    manifest = {
+        "database": db.name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "compressed": args.gzip,
+        "collections": dict(zip(names, counts)),
+    }
+    (directory / SNAPSHOT_MANIFEST).write_text(json.dumps(manifest, indent=2))
+    print(f"Dumped {len(names)} collections, {rate(sum(counts), time.perf_counter() - started)} to {directory}")
+    return 0
+
+
+# ============ Restore ============
+
+async def restore_collection(
+    name: str,
+    directory: Path,
+    compress: bool,
+    drop: bool,
+    batch_size: int,
+    concurrency: int
+) -> int:
+    db = get_db()
+    collection = db.get_collection(name, codec_options=RAW_CODEC)
+    if drop:
+        await collection.drop()
+
+    slots = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def insert(batch: List[RawBSONDocument]):
+        try:
+            await collection.insert_many(batch, ordered=False, bypass_document_validation=True)
+        finally:
+            slots.release()
+
+    path = directory / f"{name}.bson{'.gz' if compress else ''}"
+    count = 0
+    with (gzip.open(path, "rb") if compress else open(path, "rb")) as f:
+        batch = []
+        for doc in bson.decode_file_iter(f, RAW_CODEC):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await slots.acquire()
+                tasks.append(asyncio.create_task(insert(batch)))
+                count += len(batch)
+                batch = []
+                # Let the insert start before reading the next batch
+                await asyncio.sleep(0)
+        if batch:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(insert(batch)))
+            count += len(batch)
+    await asyncio.gather(*tasks)
+
+    # Indexes are built after the data, in one pass per collection
+    metadata_path = directory / f"{name}.metadata.json"
+    if metadata_path.exists():
+        await create_indexes(db[name], json_util.loads(metadata_path.read_text())['indexes'])
+    return count
+
+
+async def restore(args) -> int:
+    directory = Path(args.path)
+    manifest = json.loads((directory / SNAPSHOT_MANIFEST).read_text())
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(
+        restore_collection(name, directory, manifest['compressed'], args.drop, args.batch_size, args.concurrency)
+        for name in manifest['collections']
+    ))
+    print(f"Restored {len(counts)} collections, {rate(sum(counts), time.perf_counter() - started)}")
+    return 0
+
+
+# ============ CLI ============
+
+async def run(args) -> int:
+    await connect_db(args.mongo_url, args.db)
+    # Migrations take their lease through the lock repository
+    await open_repositories("mongo")
+    try:
+        return await args.command(args)
+    finally:
+        await stop_background_migrations()
+        await close_repositories()
+        await close_db()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=MONGO_URL)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documents per insert_many")
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many calls in flight")
+    commands = parser.add_subparsers(required=True)
+
+    generate_parser = commands.add_parser("generate", help="Insert synthetic users and subscriptions")
+    generate_parser.add_argument("--subscriptions", default="100k", help="1k, 10k, 100k, 1m or a number")
+    generate_parser.add_argument("--users", type=int, help="Defaults to one per thousand subscriptions")
+    generate_parser.add_argument("--seed", type=int, default=42, help="Use a new seed to add to existing data")
+    generate_parser.add_argument("--drop", action="store_true", help="Drop the database first")
+    generate_parser.add_argument("--keep-indexes", action="store_true", help="Maintain indexes while inserting")
+    generate_parser.set_defaults(command=generate)
+
+    dump_parser = commands.add_parser("dump", help="Write a snapshot of every collection")
+    dump_parser.add_argument("path", help="Snapshot directory")
+    dump_parser.add_argument("--gzip", action="store_true", help="Compress the BSON files")
+    dump_parser.set_defaults(command=dump)
+
+    restore_parser = commands.add_parser("restore", help="Load a snapshot")
+    restore_parser.add_argument("path", help="Snapshot directory")
+    restore_parser.add_argument("--drop", action="store_true", help="Drop each collection before restoring it")
+    restore_parser.set_defaults(command=restore)
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(build_parser().parse_args())))
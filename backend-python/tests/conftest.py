@@ -0,0 +1,111 @@
+"""Shared Test Fixtures
+
+Tests run on the memory repository backend, and repository tests also on
+sqlite, so they need no MongoDB server; tests that need one (MONGO_URL) are
+skipped when it is not reachable. Run from backend-python/:
+
+    python -m pytest
+"""
+
+import asyncio
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+import pytest_asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import database, migrations  # noqa: E402
+from app.core.cache import response_cache, user_cache  # noqa: E402
+from app.core.config import MONGO_URL  # noqa: E402
+from app.repositories import close_repositories, open_repositories  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "admin-password"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Cached users and responses belong to the repositories of one test"""
+    user_cache.clear()
+    response_cache.clear()
+
+
+@asynccontextmanager
+async def mongo_test_database():
+    """Connect to a throwaway database at MONGO_URL, dropped afterwards; skips the test when unreachable"""
+    probe = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        await probe.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"MongoDB not reachable at {MONGO_URL}")
+    finally:
+        probe.close()
+
+    db_name = f"test_{uuid.uuid4().hex[:8]}"
+    await database.connect_db(MONGO_URL, db_name)
+    try:
+        await open_repositories("mongo")
+        yield database.get_db()
+    finally:
+        await migrations.stop_background_migrations()
+        await close_repositories()
+        await database._db_client.drop_database(db_name)
+        await database.close_db()
+        # Later tests run without a connection
+        database._db_client, database._db = None, None
+
+
+@pytest_asyncio.fixture
+async def mongo_database():
+    """A throwaway MongoDB database with mongo repositories open"""
+    async with mongo_test_database() as db:
+        yield db
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "mongo"])
+async def repositories(request, tmp_path):
+    """Open repositories of each backend, mongo only when a server is reachable; yields the backend name"""
+    if request.param == "mongo":
+        async with mongo_test_database():
+            await migrations.run_migrations()
+            await asyncio.gather(*migrations._background_tasks)
+            yield request.param
+        return
+    await open_repositories(request.param, sqlite_path=str(tmp_path / "subscriptions.db"))
+    yield request.param
+    await close_repositories()
+
+
+@pytest_asyncio.fixture
+async def app_client(monkeypatch):
+    """Client of the application, started through its lifespan on the memory backend"""
+    import main
+    from app.core.rate_limit import LoginThrottle
+    from app.routes import auth
+
+    monkeypatch.setattr(main, "REPOSITORY_BACKEND", "memory")
+    monkeypatch.setattr(auth, "login_throttle", LoginThrottle("memory"))
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+@pytest_asyncio.fixture
+async def admin_headers(app_client) -> dict:
+    """Authorization header of a freshly created admin"""
+    await UserService.create_user(UserCreate(
+        name="Admin", email=ADMIN_EMAIL, phone="9999999999", password=ADMIN_PASSWORD, role="admin"
+    ))
+    response = await app_client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
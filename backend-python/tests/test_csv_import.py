@@ -0,0 +1,57 @@
+"""CSV exports import back unchanged, including quoted cells that span lines"""
+
+import pytest
+
+from app.utils.streams import iter_csv_rows
+
+NOTES = 'Renews with the "Pro" plan,\nthen moves to monthly\r\nbilling'
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_exported_csv_round_trips_multi_line_notes(app_client, admin_headers):
+    for business_name, notes in (("Acme Bakery", NOTES), ("Acorn Studio", None)):
+        response = await app_client.post("/api/subscriptions", headers=admin_headers, json={
+            "client_name": "Jane Doe",
+            "business_name": business_name,
+            "price": 100,
+            "paid_date": "2026-01-10",
+            "renewal_date": "2027-01-10",
+            "duration": "1 Year",
+            "type": "Client",
+            "category": "Hosting",
+            "notes": notes,
+        })
+        assert response.status_code == 201
+
+    response = await app_client.get("/api/subscriptions/export?format=csv", headers=admin_headers)
+    assert response.status_code == 200
+    exported = response.content
+
+    # Chunk boundaries fall inside the quoted cell as well as between records
+    for size in (1, 7, len(exported)):
+        rows = [row async for row in iter_csv_rows(chunked(exported, size))]
+        assert [error for _, error in rows] == [None, None]
+        assert sorted((row["business_name"], row["notes"]) for row, _ in rows) == [
+            ("Acme Bakery", NOTES), ("Acorn Studio", None)
+        ]
+
+    response = await app_client.post(
+        "/api/subscriptions/bulk", headers={**admin_headers, "Content-Type": "text/csv"}, content=exported
+    )
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2, "failed": 0, "errors": []}
+
+    response = await app_client.get("/api/subscriptions/search?q=acme", headers=admin_headers)
+    assert [item["notes"] for item in response.json()["items"]] == [NOTES, NOTES]
+
+
+@pytest.mark.asyncio
+async def test_unterminated_quoted_cell_is_reported():
+    data = b'business_name,notes\nAcme,"open\nstill open\n'
+    rows = [row async for row in iter_csv_rows(chunked(data, 4))]
+    assert rows == [(None, "Unterminated quoted cell")]
@@ -0,0 +1,124 @@
+"""The subscription event feed outlives lost resume points and unreadable documents"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.core import events
+from app.core.events import EVENT_INVALIDATE, EVENT_UPSERT, SubscriptionEventBroker
+from app.schemas.subscription import SubscriptionCreate
+from app.services.subscription_service import SubscriptionService
+
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+def subscription_document(business_name: str) -> dict:
+    return SubscriptionService._build_subscription_document(SubscriptionCreate(
+        client_name="Jane Doe",
+        business_name=business_name,
+        price=100,
+        paid_date="2026-01-10",
+        renewal_date="2027-01-10",
+        duration="1 Year",
+        type="Client",
+        category="Hosting",
+    ), "user-1")
+
+
+async def next_event(subscriber, event: str):
+    while True:
+        received = await asyncio.wait_for(subscriber.queue.get(), 5)
+        if received.event == event:
+            return received
+
+
+class FakeChangeStream:
+    """Delivers one change, then loses its history as an oplog rollover would"""
+
+    def __init__(self, change: dict):
+        self.change = change
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        self.resume_token = {"_data": "token-1"}
+        yield self.change
+        raise OperationFailure("resume point no longer in the oplog", code=CHANGE_STREAM_HISTORY_LOST)
+
+
+class FakeCollection:
+    def __init__(self, change: dict):
+        self.change = change
+        self.resumed_after = []
+        self.reopened = asyncio.Event()
+        self.database = self
+
+    async def command(self, name: str):
+        return {"versionArray": [7, 0, 0, 0]}
+
+    def watch(self, resume_after=None, **options):
+        self.resumed_after.append(resume_after)
+        if len(self.resumed_after) > 1:
+            self.reopened.set()
+        return FakeChangeStream(self.change)
+
+
+@pytest.mark.asyncio
+async def test_change_stream_restarts_without_a_lost_resume_token(monkeypatch):
+    collection = FakeCollection({"operationType": "insert", "fullDocument": subscription_document("Acme")})
+
+    async def get_subscriptions_collection():
+        return collection
+
+    monkeypatch.setattr(events, "get_subscriptions_collection", get_subscriptions_collection)
+    broker = SubscriptionEventBroker()
+    subscriber = broker.subscribe()
+    task = asyncio.create_task(broker._follow_change_stream())
+    try:
+        assert (await next_event(subscriber, EVENT_UPSERT)).data["business_name"] == "Acme"
+        await next_event(subscriber, EVENT_INVALIDATE)
+        await asyncio.wait_for(collection.reopened.wait(), 5)
+        # The stale token is not offered again, so the stream starts over instead of failing forever
+        assert collection.resumed_after[:2] == [None, None]
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_polling_skips_unreadable_documents(monkeypatch):
+    bad = subscription_document("Broken")
+    bad["price"] = "not a price"
+    good = subscription_document("Acme")
+    bad["updated_at"] = good["updated_at"] = datetime.now(timezone.utc) + timedelta(seconds=1)
+    polls = [[bad, good]]
+
+    class FakeRepository:
+        async def count(self):
+            return 2
+
+        async def find_updated_since(self, since, limit):
+            return polls.pop(0) if polls else []
+
+        async def last_updated_at(self):
+            return None
+
+    monkeypatch.setattr(events, "get_subscription_repository", FakeRepository)
+    monkeypatch.setattr(events, "EVENTS_POLL_INTERVAL_SECONDS", 0.01)
+    broker = SubscriptionEventBroker()
+    subscriber = broker.subscribe()
+    task = asyncio.create_task(broker._poll())
+    try:
+        assert (await next_event(subscriber, EVENT_UPSERT)).data["business_name"] == "Acme"
+        assert subscriber.queue.empty() or (await subscriber.queue.get()).event == EVENT_INVALIDATE
+        assert not task.done()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,66 @@
+"""Lease heartbeats when the lock is taken over or cannot be renewed"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.core.locks import Lease
+from app.repositories import close_repositories, get_lock_repository, open_repositories
+
+TTL = 0.3
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def memory_repositories():
+    await open_repositories("memory")
+    yield
+    await close_repositories()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_restarts_after_steal_and_reacquire():
+    lease = Lease("job", ttl=TTL, owner="a")
+    assert await lease.acquire()
+    lease.start_heartbeat()
+
+    # Another worker takes the lock over as if the lease had expired
+    locks = get_lock_repository()
+    later = datetime.now(timezone.utc) + timedelta(seconds=TTL)
+    assert await locks.acquire("job", "b", later, later + timedelta(seconds=TTL))
+    await asyncio.wait_for(lease.lost.wait(), TTL * 2)
+    await asyncio.sleep(0)
+    assert lease._heartbeat_task is None
+
+    await locks.release("job", "b")
+    assert await lease.acquire()
+    assert not lease.lost.is_set()
+    lease.start_heartbeat()
+    assert lease._heartbeat_task is not None
+
+    # The new heartbeat keeps the lock past its original expiry
+    await asyncio.sleep(TTL * 2)
+    now = datetime.now(timezone.utc)
+    assert not await locks.acquire("job", "b", now, now + timedelta(seconds=TTL))
+    assert not lease.lost.is_set()
+    await lease.release()
+
+
+@pytest.mark.asyncio
+async def test_failing_renewals_lose_the_lease_after_expiry(monkeypatch):
+    lease = Lease("job", ttl=TTL, owner="a")
+    assert await lease.acquire()
+
+    async def unavailable(*args):
+        raise ConnectionError("lock store unavailable")
+
+    monkeypatch.setattr(get_lock_repository(), "renew", unavailable)
+    lease.start_heartbeat()
+
+    # Renewals fail before expiry without losing the lease
+    await asyncio.sleep(TTL / 2)
+    assert not lease.lost.is_set()
+
+    await asyncio.wait_for(lease.lost.wait(), TTL * 2)
+    assert lease._expires_at <= datetime.now(timezone.utc)
@@ -0,0 +1,97 @@
+"""Login floods are rejected before password hashing and do not slow other requests"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import security
+from app.core.config import (
+    LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS,
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS,
+)
+from app.core.rate_limit import TokenBucketLimiter
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
+
+# Stands in for the cost of a bcrypt verification
+VERIFY_SECONDS = 0.2
+
+FLOOD_SIZE = 60
+
+
+@pytest.fixture
+def bcrypt_calls(monkeypatch):
+    """Counts password verifications, each taking VERIFY_SECONDS in the hashing pool"""
+    calls = []
+    lock = threading.Lock()
+    verify = security.verify_password
+
+    def counted_verify(plain_password: str, hashed_password: str) -> bool:
+        with lock:
+            calls.append(plain_password)
+        time.sleep(VERIFY_SECONDS)
+        return verify(plain_password, hashed_password)
+
+    monkeypatch.setattr(security, "verify_password", counted_verify)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rejects_flood_after_capacity():
+    limiter = TokenBucketLimiter(5, 60)
+    results = [await limiter.hit("key") for _ in range(50)]
+    assert results[:5] == [None] * 5
+    assert all(retry_after is not None and 0 < retry_after <= 12 for retry_after in results[5:])
+    # Other keys keep their own buckets
+    assert await limiter.hit("other") is None
+
+
+@pytest.mark.asyncio
+async def test_login_flood_is_throttled_before_bcrypt(app_client, admin_headers, bcrypt_calls):
+    await UserService.create_user(UserCreate(
+        name="Staff", email="staff@example.com", phone="1", password="staff-password"
+    ))
+
+    async def attempt(password: str):
+        return await app_client.post("/api/auth/login", json={"email": "staff@example.com", "password": password})
+
+    async def timed_read():
+        started = time.perf_counter()
+        response = await app_client.get("/api/subscriptions", headers=admin_headers)
+        return response, time.perf_counter() - started
+
+    read = asyncio.create_task(timed_read())
+    responses = await asyncio.gather(*(attempt(f"guess-{i}") for i in range(FLOOD_SIZE)))
+    read_response, read_seconds = await read
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(401) == LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS
+    assert statuses.count(429) == FLOOD_SIZE - LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS
+    assert all(
+        int(response.headers["Retry-After"]) >= 1 for response in responses if response.status_code == 429
+    )
+    # Only the attempts within the limit reached bcrypt
+    assert len(bcrypt_calls) == LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS
+
+    # The read ran alongside the flood instead of queueing behind the password checks
+    assert read_response.status_code == 200
+    assert read_seconds < VERIFY_SECONDS
+
+    # Once limited, even the right password is rejected without hashing
+    response = await attempt("staff-password")
+    assert response.status_code == 429
+    assert len(bcrypt_calls) == LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_login_flood_across_emails_is_throttled_per_ip(app_client):
+    responses = await asyncio.gather(*(
+        app_client.post("/api/auth/login", json={"email": f"user{i}@example.com", "password": "x"})
+        for i in range(FLOOD_SIZE)
+    ))
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(401) == LOGIN_RATE_LIMIT_IP_ATTEMPTS
+    assert statuses.count(429) == FLOOD_SIZE - LOGIN_RATE_LIMIT_IP_ATTEMPTS
@@ -0,0 +1,106 @@
+"""The application on the memory repository backend, with no MongoDB server"""
+
+import pytest
+
+from app.core import database
+from app.core.cache import subscriptions_generation
+from app.repositories import get_subscription_repository
+from app.schemas.subscription import SubscriptionCreate
+from app.services.subscription_service import SubscriptionService
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD
+
+SUBSCRIPTION = {
+    "client_name": "Jane Doe",
+    "business_name": "Acme Bakery",
+    "client_email": "jane@acme.example",
+    "price": 1200,
+    "paid_date": "2026-01-10",
+    "renewal_date": "2027-01-10",
+    "duration": "1 Year",
+    "type": "Client",
+    "category": "Hosting",
+}
+
+
+@pytest.mark.asyncio
+async def test_starts_without_mongodb(app_client):
+    with pytest.raises(RuntimeError):
+        database.get_db()
+
+    response = await app_client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["repository_backend"] == "memory"
+    assert response.json()["events"]["mode"] == "polling"
+
+
+@pytest.mark.asyncio
+async def test_subscription_crud_and_search(app_client, admin_headers):
+    me = await app_client.get("/api/auth/me", headers=admin_headers)
+    assert me.status_code == 200
+    assert me.json()["email"] == ADMIN_EMAIL
+
+    created = await app_client.post("/api/subscriptions", json=SUBSCRIPTION, headers=admin_headers)
+    assert created.status_code == 201
+    subscription_id = created.json()["id"]
+
+    page = await app_client.get("/api/subscriptions", headers=admin_headers)
+    assert page.status_code == 200
+    assert [item["id"] for item in page.json()["items"]] == [subscription_id]
+
+    found = await app_client.get("/api/subscriptions/search", params={"q": "acm"}, headers=admin_headers)
+    assert found.status_code == 200
+    assert [item["id"] for item in found.json()["items"]] == [subscription_id]
+
+    deleted = await app_client.delete(f"/api/subscriptions/{subscription_id}", headers=admin_headers)
+    assert deleted.status_code == 204
+    page = await app_client.get("/api/subscriptions", headers=admin_headers)
+    assert page.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_token(app_client, admin_headers):
+    response = await app_client.post("/api/auth/logout", headers=admin_headers)
+    assert response.status_code == 204
+
+    response = await app_client.get("/api/auth/me", headers=admin_headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_all_revokes_every_session(app_client, admin_headers):
+    login = await app_client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    other_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    response = await app_client.post("/api/auth/logout-all", headers=admin_headers)
+    assert response.status_code == 204
+
+    for headers in (admin_headers, other_headers):
+        response = await app_client.get("/api/auth/me", headers=headers)
+        assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_keep_cached_responses(app_client, admin_headers):
+    generation = await subscriptions_generation.value()
+    response = await app_client.delete("/api/subscriptions/missing", headers=admin_headers)
+    assert response.status_code == 404
+    response = await app_client.put("/api/subscriptions/missing", json={"notes": "x"}, headers=admin_headers)
+    assert response.status_code == 404
+    assert await subscriptions_generation.value() == generation
+
+
+@pytest.mark.asyncio
+async def test_writes_from_other_workers_invalidate_cached_responses(app_client, admin_headers):
+    first = await app_client.get("/api/subscriptions", headers=admin_headers)
+    assert first.json()["items"] == []
+
+    # Another worker writes through the shared backend; this worker's cache is untouched
+    subscriptions = get_subscription_repository()
+    await subscriptions.insert(SubscriptionService._build_subscription_document(SubscriptionCreate(**SUBSCRIPTION), "other"))
+    await subscriptions.bump_generation()
+
+    response = await app_client.get("/api/subscriptions", headers={**admin_headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert len(response.json()["items"]) == 1
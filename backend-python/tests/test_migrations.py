@@ -0,0 +1,94 @@
+"""Migrations and the service query plans they index; the server tests need MongoDB (MONGO_URL)"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import migrations
+from app.schemas.subscription import SubscriptionCreate
+from app.services.subscription_service import SubscriptionService
+
+SEED_SIZE = 200
+
+
+async def seed(db):
+    """
+    Documents matching none of the representative queries
+
+    On empty collections every candidate plan ends at once and the planner
+    cannot tell them apart; with data the plan answered from index bounds wins.
+    """
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    subscriptions = []
+    for i in range(SEED_SIZE):
+        doc = SubscriptionService._build_subscription_document(SubscriptionCreate(
+            client_name=f"Client {i}",
+            business_name=f"Business {i}",
+            price=10,
+            paid_date="2026-01-10",
+            renewal_date=f"2027-{i % 12 + 1:02d}-10",
+            duration="1 Year",
+            type="Personal",
+            category="SSL",
+        ), "seed-user")
+        subscriptions.append(doc)
+    await db.subscriptions.insert_many(subscriptions)
+    await db.users.insert_many([
+        {"id": f"user-{i}", "email": f"user{i}@example.com", "name": "User", "role": "admin"} for i in range(SEED_SIZE)
+    ])
+    await db.notifications.insert_many([
+        {
+            "id": f"n-{i}",
+            "key": f"key-{i}",
+            "status": "pending" if i % 2 else "sending",
+            "next_attempt_at": later,
+            "locked_until": later,
+        }
+        for i in range(SEED_SIZE)
+    ])
+    await db.revoked_tokens.insert_many([
+        {"_id": f"token:{i}", "jti": str(i), "revoked_at": later - timedelta(days=2), "expires_at": later - timedelta(days=2)}
+        for i in range(SEED_SIZE)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_service_queries_use_indexes(mongo_database):
+    applied = await migrations.run_migrations()
+    assert applied == sorted(applied) and applied
+    await asyncio.gather(*migrations._background_tasks)
+
+    await seed(mongo_database)
+    await migrations.assert_queries_use_indexes()
+
+    # Every migration is recorded once, so a second run applies nothing
+    assert await migrations.run_migrations() == []
+
+
+def test_plan_problems():
+    served = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "type_renewal_date_id"}}
+    assert migrations.plan_problems(served, ("type_renewal_date_id",)) == []
+
+    # The filter is checked on every document the renewal_date_id scan returns
+    filtered = {
+        "stage": "FETCH",
+        "filter": {"type": {"$eq": "Client"}},
+        "inputStage": {"stage": "IXSCAN", "indexName": "renewal_date_id"},
+    }
+    assert migrations.plan_problems(filtered, ("type_renewal_date_id",)) == [
+        "scans renewal_date_id instead of type_renewal_date_id",
+        "filters documents in FETCH",
+    ]
+    assert migrations.plan_problems({"stage": "COLLSCAN", "filter": {}}, ("id_unique",)) == [
+        "scans no index instead of id_unique",
+        "filters documents in COLLSCAN",
+    ]
+
+    # Index scans may filter on their own keys; both branches of an $or must be indexed
+    branches = {"stage": "SUBPLAN", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN", "indexName": "status_next_attempt_at", "filter": {}},
+        {"stage": "IXSCAN", "indexName": "status_locked_until"},
+    ]}}}
+    assert migrations.plan_problems(branches, ("status_next_attempt_at", "status_locked_until")) == []
+    assert migrations.plan_problems({"stage": "EXPRESS_IXSCAN", "indexName": "id_unique"}, ("id_unique",)) == []
@@ -0,0 +1,55 @@
+"""Notification workers survive failures in delivery bookkeeping"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from app.core import notifications
+from app.core.notifications import NotificationSender, NotificationWorkerPool
+from app.services.notification_service import NotificationService
+
+BATCHES = 12
+
+
+class RecordingSender(NotificationSender):
+    """Records deliveries; notifications with an odd id fail"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def send(self, notification: dict):
+        self.delivered.append(notification['id'])
+        if notification['id'] % 2:
+            raise RuntimeError("channel unavailable")
+
+
+@pytest.mark.asyncio
+async def test_workers_keep_running_when_bookkeeping_fails(monkeypatch):
+    sender = RecordingSender()
+    monkeypatch.setitem(notifications._sender_factories, "test", lambda: sender)
+    batches = [[{"id": i, "channel": "test", "attempts": 1, "claim_id": "c"}] for i in range(BATCHES)]
+
+    async def claim_batch(limit: int):
+        return batches.pop(0) if batches else []
+
+    async def unavailable(*args):
+        raise AutoReconnect("connection reset")
+
+    monkeypatch.setattr(NotificationService, "claim_batch", claim_batch)
+    monkeypatch.setattr(NotificationService, "mark_sent", unavailable)
+    monkeypatch.setattr(NotificationService, "mark_failed", unavailable)
+
+    pool = NotificationWorkerPool()
+    assert pool.start(["test"])
+    try:
+        for _ in range(100):
+            if len(sender.delivered) == BATCHES:
+                break
+            await asyncio.sleep(0.01)
+        # More failures than workers, yet every notification was delivered and no worker died
+        assert sorted(sender.delivered) == list(range(BATCHES))
+        assert BATCHES > len(pool._tasks)
+        assert not any(task.done() for task in pool._tasks)
+    finally:
+        await pool.stop()
@@ -0,0 +1,49 @@
+"""Read preference of the read-heavy subscription queries"""
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from starlette.requests import Request
+
+from app.core import cache, database
+
+
+@pytest.fixture
+def mongo_client(monkeypatch):
+    """A client that never connects; read preferences are resolved locally"""
+    client = AsyncIOMotorClient("mongodb://localhost:27017", connect=False)
+    monkeypatch.setattr(database, "_db", client["test"])
+    monkeypatch.setattr(database, "_read_heavy_preference", SecondaryPreferred())
+    yield client
+    client.close()
+
+
+def get_request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+@pytest.mark.asyncio
+async def test_read_heavy_queries_use_secondaries(mongo_client):
+    collection = await database.get_subscriptions_read_collection()
+    assert collection.read_preference == SecondaryPreferred()
+
+
+@pytest.mark.asyncio
+async def test_cache_fills_read_from_the_primary(mongo_client):
+    seen = []
+
+    class Generation:
+        async def value(self):
+            return 0
+
+    async def build():
+        seen.append((await database.get_subscriptions_read_collection()).read_preference)
+        return b"[]"
+
+    response = await cache.cached_json_response(get_request("/api/subscriptions"), Generation(), build)
+    assert response.status_code == 200
+    assert seen == [Primary()]
+
+    # The primary is only pinned while the cache entry is built
+    collection = await database.get_subscriptions_read_collection()
+    assert collection.read_preference == SecondaryPreferred()
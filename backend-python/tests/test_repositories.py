@@ -0,0 +1,173 @@
+"""Repository contract on the memory and sqlite backends"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repositories import (
+    DuplicateEntryError,
+    close_repositories,
+    get_lock_repository,
+    get_revocation_repository,
+    get_subscription_repository,
+    get_user_repository,
+    open_repositories,
+)
+from app.schemas.subscription import SubscriptionCreate
+from app.services.subscription_service import SubscriptionService
+
+
+def subscription_document(business_name: str, renewal_date: str = "2027-01-10") -> dict:
+    return SubscriptionService._build_subscription_document(SubscriptionCreate(
+        client_name="Jane Doe",
+        business_name=business_name,
+        price=100,
+        paid_date="2026-01-10",
+        renewal_date=renewal_date,
+        duration="1 Year",
+        type="Client",
+        category="Hosting",
+    ), "user-1")
+
+
+@pytest.mark.asyncio
+async def test_users(repositories):
+    users = get_user_repository()
+    await users.insert({"id": "u1", "email": "a@example.com", "name": "A", "role": "staff", "version": 1})
+    with pytest.raises(DuplicateEntryError):
+        await users.insert({"id": "u2", "email": "a@example.com", "name": "B", "role": "staff", "version": 1})
+
+    assert (await users.find_by_email("a@example.com"))["id"] == "u1"
+    assert await users.update("u1", {"name": "A2"}, expected_version=2) is None
+    updated = await users.update("u1", {"name": "A2"}, expected_version=1)
+    assert updated["name"] == "A2" and updated["version"] == 2
+    assert await users.delete("u1")
+    assert await users.find_by_id("u1") is None
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_page_search_and_polling(repositories):
+    subscriptions = get_subscription_repository()
+    before = datetime.now(timezone.utc) - timedelta(seconds=1)
+    late = subscription_document("Acme Bakery", "2027-03-01")
+    early = subscription_document("Acorn Studio", "2027-02-01")
+    await subscriptions.insert(late)
+    await subscriptions.insert(early)
+
+    page = await subscriptions.find_page(None, None, 10)
+    assert [doc["id"] for doc in page] == [early["id"], late["id"]]
+
+    found = await subscriptions.search_prefix(["ac"], 0, 10)
+    assert {doc["id"] for doc in found} == {early["id"], late["id"]}
+    found = await subscriptions.search_prefix(["bak"], 0, 10)
+    assert [doc["id"] for doc in found] == [late["id"]]
+
+    assert await subscriptions.count() == 2
+    changed = await subscriptions.find_updated_since(before, 10)
+    assert {doc["id"] for doc in changed} == {early["id"], late["id"]}
+    assert await subscriptions.last_updated_at() >= before
+
+    assert await subscriptions.delete(early["id"])
+    assert not await subscriptions.delete(early["id"])
+    assert await subscriptions.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_revocations(repositories):
+    revocations = get_revocation_repository()
+    # BSON dates keep milliseconds only
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    await revocations.save("token:live", {"jti": "live", "revoked_at": now, "expires_at": now + timedelta(hours=1)})
+    await revocations.save("token:old", {
+        "jti": "old", "revoked_at": now - timedelta(hours=2), "expires_at": now - timedelta(hours=1)
+    })
+
+    live = await revocations.find_live(now)
+    assert [doc["jti"] for doc in live] == ["live"]
+    recent = await revocations.find_revoked_since(now - timedelta(minutes=1))
+    assert [doc["jti"] for doc in recent] == ["live"]
+
+    # Saving again replaces the entry
+    await revocations.save("token:live", {"jti": "live", "revoked_at": now, "expires_at": now + timedelta(hours=2)})
+    assert [doc["expires_at"] for doc in await revocations.find_live(now)] == [now + timedelta(hours=2)]
+
+
+@pytest.mark.asyncio
+async def test_locks(repositories):
+    locks = get_lock_repository()
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=30)
+
+    assert await locks.acquire("job", "a", now, expires_at)
+    assert not await locks.acquire("job", "b", now, expires_at)
+    assert await locks.renew("job", "a", now, expires_at)
+    assert not await locks.renew("job", "b", now, expires_at)
+
+    # An expired lock can be taken over
+    assert await locks.acquire("job", "b", expires_at, expires_at + timedelta(seconds=30))
+    assert not await locks.renew("job", "a", expires_at, expires_at + timedelta(seconds=30))
+    await locks.release("job", "a")
+    assert not await locks.acquire("job", "a", expires_at, expires_at + timedelta(seconds=30))
+    await locks.release("job", "b")
+    assert await locks.acquire("job", "a", expires_at, expires_at + timedelta(seconds=30))
+
+
+@pytest.mark.asyncio
+async def test_generation(repositories):
+    subscriptions = get_subscription_repository()
+    assert await subscriptions.generation() == 0
+    await subscriptions.bump_generation()
+    await subscriptions.bump_generation()
+    assert await subscriptions.generation() == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_generation_survives_restart(tmp_path):
+    path = str(tmp_path / "subscriptions.db")
+    await open_repositories("sqlite", sqlite_path=path)
+    await get_subscription_repository().bump_generation()
+    await open_repositories("sqlite", sqlite_path=path)
+    try:
+        # Counting on after a restart keeps ETags issued before it from matching new responses
+        assert await get_subscription_repository().generation() == 1
+    finally:
+        await close_repositories()
+
+
+@pytest.mark.asyncio
+async def test_prefix_search_ranks_closest_completion_first(repositories):
+    subscriptions = get_subscription_repository()
+    docs = {}
+    for sub_id, business_name in (("a", "Acmeware"), ("b", "Acme"), ("c", "Acme"), ("d", "Acorn Acme")):
+        doc = subscription_document(business_name)
+        doc["id"] = sub_id
+        await subscriptions.insert(doc)
+        docs[sub_id] = doc
+
+    # "acme" before "acmeware", ties broken by id; "acorn" does not count for "acm"
+    found = await subscriptions.search_prefix(["acm"], 0, 10, ["id"])
+    assert [doc["id"] for doc in found] == ["b", "c", "d", "a"]
+    found = await subscriptions.search_prefix(["acm"], 1, 2)
+    assert [doc["id"] for doc in found] == ["c", "d"]
+    assert found[0]["business_name"] == "Acme"
+
+
+@pytest.mark.asyncio
+async def test_prefix_search_ranks_exact_terms_first(repositories):
+    subscriptions = get_subscription_repository()
+    for sub_id, business_name in (("w", "Clinic 1"), ("x", "Client 12"), ("y", "Clients 1"), ("z", "Client 1")):
+        doc = subscription_document(business_name)
+        doc["id"] = sub_id
+        await subscriptions.insert(doc)
+
+    # "1" is a whole term of y and z, then "client" is closer than "clients"
+    found = await subscriptions.search_prefix(["clie", "1"], 0, 10, ["id"])
+    assert [doc["id"] for doc in found] == ["z", "y", "x"]
+    # z matches both terms exactly; x and y one each, then x completes "client" closest
+    found = await subscriptions.search_prefix(["client", "1"], 0, 10, ["id"])
+    assert [doc["id"] for doc in found] == ["z", "x", "y"]
+    # Completions count in query order: all but x match "1" exactly, then "client" < "clients" < "clinic"
+    found = await subscriptions.search_prefix(["1", "cli"], 0, 10, ["id"])
+    assert [doc["id"] for doc in found] == ["z", "y", "w", "x"]
+    found = await subscriptions.search_prefix(["1", "cli"], 1, 2, ["id"])
+    assert [doc["id"] for doc in found] == ["y", "w"]
@@ -0,0 +1,28 @@
+"""The list fast path encodes pages byte for byte like the models do"""
+
+import pytest
+
+from app.repositories import get_subscription_repository
+from app.schemas.subscription import SubscriptionFilters
+from app.services.subscription_service import SubscriptionService
+from test_repositories import subscription_document
+
+
+@pytest.mark.asyncio
+async def test_encoded_page_matches_model_dump(repositories):
+    subscriptions = get_subscription_repository()
+    full = subscription_document("Acme Bakery", "2027-02-01")
+    full.update(price=99.5, notes="Renews yearly", client_email="jane@example.com")
+    whole_price = subscription_document("Acorn Studio", "2027-03-01")
+    whole_price["price"] = 5
+    # Written before the optional fields existed
+    older = subscription_document("Apex Labs", "2027-04-01")
+    for field in ("client_email", "client_phone", "notes", "status"):
+        older.pop(field, None)
+    for doc in (full, whole_price, older):
+        await subscriptions.insert(doc)
+
+    for filters, limit in ((None, 10), (None, 2), (SubscriptionFilters(type="Client"), 10)):
+        page = await SubscriptionService.get_subscriptions(filters, None, limit)
+        encoded = await SubscriptionService.get_subscriptions_json(filters, None, limit)
+        assert encoded == page.model_dump_json().encode()
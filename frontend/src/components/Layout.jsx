@@ -4,6 +4,7 @@ import { LogOut, LayoutDashboard, FileText, Users } from "lucide-react";
 import { toast } from "sonner";
 import { useState } from "react";
 import ConfirmDialog from "./ConfirmDialog";
+import { authService } from "@/services";
 
 import { hasPermission } from "@/utils/permissions";
 
@@ -12,9 +13,8 @@ export default function Layout({ user, setUser }) {
   const location = useLocation();
   const [logoutConfirmOpen, setLogoutConfirmOpen] = useState(false);
 
-  const handleLogout = () => {
-    localStorage.removeItem("token");
-    localStorage.removeItem("user");
+  const handleLogout = async () => {
+    await authService.logout();
     setUser(null);
     toast.success("Logged out successfully");
     navigate("/login");
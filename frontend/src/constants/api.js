@@ -8,6 +8,7 @@ export const API_ENDPOINTS = {
   AUTH_REGISTER: '/auth/register',
   AUTH_LOGIN: '/auth/login',
   AUTH_ME: '/auth/me',
+  AUTH_LOGOUT: '/auth/logout',
 
   // Staff
   STAFF_LIST: '/staff',
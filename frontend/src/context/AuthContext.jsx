@@ -101,8 +101,8 @@ export const AuthProvider = ({ children }) => {
   /**
    * Logout function
    */
-  const logout = useCallback(() => {
-    authService.logout();
+  const logout = useCallback(async () => {
+    await authService.logout();
     dispatch({ type: 'LOGOUT' });
   }, []);
 
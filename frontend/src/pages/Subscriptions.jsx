@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -31,6 +31,8 @@ export default function Subscriptions({ user }) {
   const [editingSubscription, setEditingSubscription] = useState(null);
   const [viewOpen, setViewOpen] = useState(false);
   const [viewingSubscription, setViewingSubscription] = useState(null);
+  // True while the live event stream is connected and delivering changes
+  const liveRef = useRef(false);
 
   const canCreate = hasPermission(user, "subscriptions_create");
   const canEdit = hasPermission(user, "subscriptions_edit");
@@ -41,6 +43,44 @@ export default function Subscriptions({ user }) {
     fetchSubscriptions();
   }, []);
 
+  useEffect(() => {
+    // Apply live deltas instead of reloading the whole list (Python API only)
+    const token = localStorage.getItem("token");
+    if (!window.EventSource || !token) return;
+
+    const source = new EventSource(
+      `${API}/subscriptions/events?token=${encodeURIComponent(token)}`
+    );
+    source.onopen = () => {
+      liveRef.current = true;
+    };
+    source.onerror = () => {
+      liveRef.current = false;
+    };
+    source.addEventListener("upsert", (event) => {
+      const changed = JSON.parse(event.data);
+      setSubscriptions((previous) => {
+        const index = previous.findIndex((sub) => sub.id === changed.id);
+        if (index === -1) return [...previous, changed];
+        const next = [...previous];
+        next[index] = changed;
+        return next;
+      });
+    });
+    source.addEventListener("delete", (event) => {
+      const { id } = JSON.parse(event.data);
+      setSubscriptions((previous) => previous.filter((sub) => sub.id !== id));
+    });
+    // The server could not describe the change as a delta, or we fell behind
+    source.addEventListener("invalidate", () => fetchSubscriptions());
+    source.addEventListener("dropped", () => fetchSubscriptions());
+
+    return () => {
+      liveRef.current = false;
+      source.close();
+    };
+  }, []);
+
   useEffect(() => {
     filterSubscriptions();
   }, [subscriptions, searchTerm, filterType, filterCategory, filterStatus]);
@@ -48,10 +88,23 @@ export default function Subscriptions({ user }) {
   const fetchSubscriptions = async () => {
     try {
       const token = localStorage.getItem("token");
-      const response = await axios.get(`${API}/subscriptions`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setSubscriptions(response.data);
+      const items = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API}/subscriptions`, {
+          headers: { Authorization: `Bearer ${token}` },
+          params: { limit: 500, ...(cursor && { cursor }) },
+        });
+        // Paged envelope from the Python API, plain list from the Node API
+        if (Array.isArray(response.data)) {
+          items.push(...response.data);
+          cursor = null;
+        } else {
+          items.push(...response.data.items);
+          cursor = response.data.next_cursor;
+        }
+      } while (cursor);
+      setSubscriptions(items);
     } catch (error) {
       console.error("Error fetching subscriptions:", error);
       toast.error("Failed to load subscriptions");
@@ -117,7 +170,7 @@ export default function Subscriptions({ user }) {
         headers: { Authorization: `Bearer ${token}` },
       });
       toast.success("Subscription deleted successfully");
-      fetchSubscriptions();
+      setSubscriptions((previous) => previous.filter((sub) => sub.id !== id));
     } catch (error) {
       console.error("Error deleting subscription:", error);
       toast.error("Failed to delete subscription");
@@ -127,7 +180,8 @@ export default function Subscriptions({ user }) {
   const handleDialogClose = (refresh = false) => {
     setDialogOpen(false);
     setEditingSubscription(null);
-    if (refresh) {
+    // With the event stream connected the change arrives as a delta
+    if (refresh && !liveRef.current) {
       fetchSubscriptions();
     }
   };
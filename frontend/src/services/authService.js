@@ -33,11 +33,20 @@ export const authService = {
   },
 
   /**
-   * Logout user
+   * Logout user - revokes the token on the server, then clears it locally
+   * @returns {Promise}
    */
-  logout: () => {
-    localStorage.removeItem('token');
-    localStorage.removeItem('user');
+  logout: async () => {
+    try {
+      if (localStorage.getItem('token')) {
+        await apiClient.post(API_ENDPOINTS.AUTH_LOGOUT);
+      }
+    } catch (error) {
+      // The token is discarded locally either way
+    } finally {
+      localStorage.removeItem('token');
+      localStorage.removeItem('user');
+    }
   },
 
   /**